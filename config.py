@@ -13,6 +13,9 @@ FFTW3 : bool
 FFTW3MPI : bool
     True if FFTW3-MPI library is available
 
+FFTW3THREADS : bool
+    True if FFTW3 threads library is available
+
 dict_ldd : dict
     list of flags to use while building shared objects (*.so)
 
@@ -110,6 +113,7 @@ else:
 
 FFTW3 = check_avail_library('fftw3')
 FFTW3MPI = check_avail_library('fftw3_mpi')
+FFTW3THREADS = check_avail_library('fftw3_threads')
 
 # Shared libraries used while compiling shared objects
 keys = ['mpi', 'fftw']
@@ -131,6 +135,9 @@ if FFTW3 or FFTW3MPI:
     if FFTW3MPI:
         print('  ... and also fftw3_mpi.h and libfftw3_mpi.so')
         dict_ldd['fftw'].append('fftw3_mpi')
+    if FFTW3THREADS:
+        print('  ... and also libfftw3_threads.so')
+        dict_ldd['fftw'].append('fftw3_threads')
 
     try:
         dict_lib['fftw'].append(os.environ['FFTW_DIR'])
@@ -12,7 +12,7 @@ with different simple methods (pseudo-spectral, finite differences)
 and geometries (1D, 2D and 3D periodic, 1 inhomogeneous direction,
 ...).
 
-The package is organised in four sub-packages:
+The package is organised in five sub-packages:
 
 .. autosummary::
    :toctree:
@@ -21,6 +21,7 @@ The package is organised in four sub-packages:
    base
    operators
    solvers
+   bench
 
 """
 
@@ -0,0 +1,396 @@
+"""Ensemble of simulations (:mod:`fluidsim.base.ensemble`)
+=========================================================
+
+.. currentmodule:: fluidsim.base.ensemble
+
+Provides:
+
+.. autoclass:: EnsembleBase
+   :members:
+   :private-members:
+
+An ensemble is a set of small simulations (the members) which only differ by
+some scalar parameters (for example the viscosity). Instead of running one
+simulation per process, the states of all members are stored in one
+:class:`fluidsim.base.setofvariables.SetOfVariables` with a leading member
+axis and are advanced together by a batched time stepping. The parameters
+varying between the members are arrays broadcast over the member axis so
+that the linear and nonlinear terms are computed with vectorized numpy
+expressions for all members at once. For small resolutions, the overhead of
+Python and of the time stepping is thus shared by all members.
+
+The Fourier transforms of a field of all members are computed with the
+functions `fft2_many` and `ifft2_many` of the operators (the plans of the
+fft object are reused and the results are written in preallocated arrays).
+
+The time scheme is the Runge-Kutta 4 scheme with integrating factor (see
+:func:`fluidsim.base.time_stepping.pseudo_spect.TimeSteppingPseudoSpectral._time_step_RK4`)
+and the time step is common to all members (equal to
+`params.time_stepping.deltat0` or given by the CFL condition computed over
+all members).
+
+Outputs (only if `params.output.HAS_TO_SAVE`):
+
+- the energy of each member as a function of time is saved every
+  `params.output.periods_save.spatial_means` in the file ``ensemble.h5``
+  (dataset ``energy`` of shape ``(nb_times, nb_members)``, with the values
+  of the parameters of the members),
+
+- the physical fields of all members are saved at the end of the run,
+  either stacked in one file (dataset ``state_phys`` of shape
+  ``(nb_members, nvar, ny, nx)``) or in one file per member (see
+  :func:`EnsembleBase.save_states_phys`).
+
+"""
+
+from __future__ import division, print_function
+
+from builtins import range
+from builtins import object
+from abc import ABCMeta, abstractmethod
+from time import time
+import datetime
+import os
+
+import numpy as np
+import h5py
+from future.utils import with_metaclass
+
+from fluiddyn.util import mpi
+
+from fluidsim.base.setofvariables import SetOfVariables
+from fluidsim.base.time_stepping.pseudo_spect import step_RK4
+from fluidsim.operators.dealiasing import compute_selections_dealiased, dealias
+
+
+class EnsembleBase(with_metaclass(ABCMeta, object)):
+    """Ensemble of simulations advanced in one batched state.
+
+    This abstract class has to be subclassed for each solver (see for
+    example :class:`fluidsim.solvers.ns2d.ensemble.EnsembleNS2D`), which
+    defines the abstract methods.
+
+    Parameters
+    ----------
+
+    Simul : class
+
+      The Simul class of the solver.
+
+    params : :class:`fluidsim.base.params.Parameters`
+
+      Parameters common to all members. A simulation is created with these
+      parameters to provide the operators, the initial state (the same for
+      all members) and the directory of the results.
+
+    params_members : dict
+
+      Parameters varying between the members (``{name: sequence of
+      values}``). All sequences have the same length, which is the number
+      of members. The names allowed are listed in
+      `_keys_params_members`.
+
+    """
+    _keys_params_members = ('nu_2', 'nu_4', 'nu_8', 'nu_m4')
+
+    def __init__(self, Simul, params, params_members):
+
+        if mpi.nb_proc > 1:
+            raise ValueError('The ensemble mode has to be used without MPI.')
+
+        if params.FORCING:
+            raise ValueError('The ensemble mode does not support forcing.')
+
+        if params.time_stepping.type_time_scheme != 'RK4':
+            raise ValueError(
+                'The ensemble mode only supports the time scheme RK4.')
+
+        nb_members = None
+        for key, values in params_members.items():
+            if key not in self._keys_params_members:
+                raise ValueError(
+                    'The parameter {} can not vary between the members '
+                    '(allowed: {}).'.format(key, self._keys_params_members))
+            if nb_members is None:
+                nb_members = len(values)
+            elif len(values) != nb_members:
+                raise ValueError(
+                    'All sequences of params_members have to have the same '
+                    'length.')
+        if not nb_members:
+            raise ValueError('params_members defines no member.')
+
+        self.nb_members = nb_members
+
+        self.sim = sim = Simul(params)
+        self.params = sim.params
+        self.oper = oper = sim.oper
+
+        shapeK_loc = tuple(oper.shapeK_loc)
+        shapeX_loc = tuple(oper.shapeX_loc)
+
+        # arrays broadcast over the member axis of one variable
+        shape_param = (nb_members,) + (1,)*len(shapeK_loc)
+        self.params_members = {
+            key: np.array(values, dtype=np.float64).reshape(shape_param)
+            for key, values in params_members.items()}
+
+        state = sim.state
+        self.state_fft = SetOfVariables(
+            keys=state.keys_state_fft, shape_variable=shapeK_loc,
+            nb_members=nb_members, dtype=state.state_fft.dtype,
+            info='state_fft')
+        self.state_fft[:] = state.state_fft
+        self.state_phys = SetOfVariables(
+            keys=state.keys_state_phys, shape_variable=shapeX_loc,
+            nb_members=nb_members, dtype=state.state_phys.dtype,
+            info='state_phys')
+        self.statephys_from_statefft()
+
+        self._selections_dealiased = compute_selections_dealiased(
+            oper.where_dealiased)
+
+        time_stepping = sim.time_stepping
+        self.freq_lin = self._compute_freq_lin()
+        self.deltat_max = time_stepping.deltat_max
+        self.t = time_stepping.t
+        self.it = time_stepping.it
+        self.deltat = time_stepping.deltat
+        self._deltat_exact_coefs = None
+
+        self.path_file = None
+        self.period_save = 0.
+
+    def get_param(self, key):
+        """Return a parameter (an array broadcast over the members if it
+        varies between the members)."""
+        try:
+            return self.params_members[key]
+        except KeyError:
+            return getattr(self.params, key)
+
+    def _compute_freq_lin(self):
+        """Compute the linear frequency of each member.
+
+        The function `_init_freq_lin` of the time stepping of the template
+        simulation is called with the parameters of each member.
+
+        """
+        params = self.params
+        time_stepping = self.sim.time_stepping
+        values_template = {
+            key: getattr(params, key) for key in self.params_members}
+
+        freqs_lin = []
+        try:
+            for im in range(self.nb_members):
+                for key, values in self.params_members.items():
+                    setattr(params, key, float(values.flat[im]))
+                time_stepping._init_freq_lin()
+                freqs_lin.append(np.array(time_stepping.freq_lin))
+        finally:
+            for key, value in values_template.items():
+                setattr(params, key, value)
+            time_stepping._init_freq_lin()
+
+        freq_lin = np.array(freqs_lin)
+        if freq_lin.ndim == self.state_fft.ndim - 1:
+            # same frequency for all variables
+            freq_lin = freq_lin[:, np.newaxis]
+        return freq_lin
+
+    def fft2_members(self, arr, out=None):
+        """Compute the Fourier transform of a field of all members."""
+        return self.oper.fft2_many(arr, out)
+
+    def ifft2_members(self, arr_fft, out=None):
+        """Compute the inverse Fourier transform of a field of all
+        members."""
+        return self.oper.ifft2_many(arr_fft, out)
+
+    def dealiasing(self, *arrays):
+        """Dealiase arrays whose last dimensions are the wavenumbers."""
+        for arr in arrays:
+            dealias(arr, self._selections_dealiased)
+
+    @abstractmethod
+    def statephys_from_statefft(self):
+        """Compute `self.state_phys` from `self.state_fft`."""
+
+    @abstractmethod
+    def tendencies_nonlin(self, state_fft=None, out=None):
+        """Compute the nonlinear tendencies of all members.
+
+        If `state_fft` is None, the tendencies are computed from
+        `self.state_fft` and `self.state_phys`.
+
+        """
+
+    @abstractmethod
+    def compute_energy_members(self):
+        """Compute the spatially averaged energy of each member."""
+
+    @abstractmethod
+    def _compute_deltat_CFL(self):
+        """Compute the time step given by the CFL condition."""
+
+    def _get_exact_coefs(self):
+        if self.deltat != self._deltat_exact_coefs:
+            self._exact2 = np.exp(-self.deltat/2*self.freq_lin)
+            self._exact = self._exact2**2
+            self._deltat_exact_coefs = self.deltat
+        return self._exact, self._exact2
+
+    def start(self):
+        """Run the time stepping of all members.
+
+        If `params.time_stepping.USE_T_END` is true, run till ``t >=
+        t_end``, otherwise run `params.time_stepping.it_end` time steps.
+
+        """
+        params_ts = self.params.time_stepping
+        print_stdout = self.sim.output.print_stdout
+
+        self._init_save()
+
+        print_stdout(
+            '*************************************\n' +
+            'Beginning of the computation (ensemble of {} members)'.format(
+                self.nb_members))
+        time_begining_simul = time()
+        if params_ts.USE_T_END:
+            while self.t < params_ts.t_end:
+                self.one_time_step()
+        else:
+            while self.it < params_ts.it_end:
+                self.one_time_step()
+        total_time_simul = time() - time_begining_simul
+
+        print_stdout(
+            'Computation completed in {:8.6g} s\n'.format(total_time_simul) +
+            'path_run =\n' + self.sim.output.path_run)
+
+        if self.path_file is not None:
+            self._save_energy()
+            self.save_states_phys()
+
+    def one_time_step(self):
+        """Advance all members of one time step."""
+        if self.params.time_stepping.USE_CFL:
+            self._update_deltat(self._compute_deltat_CFL())
+        self._time_step_RK4()
+        # as in TimeSteppingPseudoSpectral.one_time_step_computation
+        self.dealiasing(self.state_fft)
+        self.statephys_from_statefft()
+        self.t += self.deltat
+        self.it += 1
+        if (self.period_save > 0 and
+                self.t - self._t_last_save >= self.period_save - 1e-14):
+            self._save_energy()
+
+    def _update_deltat(self, deltat_CFL):
+        maybe_new_dt = min(deltat_CFL, self.deltat_max)
+        # same rule as the time stepping of the simulations
+        if abs(self.deltat - maybe_new_dt) / maybe_new_dt > 0.02:
+            self.deltat = maybe_new_dt
+
+    def _time_step_RK4(self):
+        """Advance in time with the Runge-Kutta 4 method (all members)."""
+        diss, diss2 = self._get_exact_coefs()
+        self.state_fft[:] = step_RK4(
+            self.state_fft, self.tendencies_nonlin, self.deltat, diss, diss2)
+
+    def _init_save(self):
+        output = self.sim.output
+        if not output.has_to_save:
+            return
+
+        self.period_save = self.params.output.periods_save.spatial_means
+        self.path_file = os.path.join(output.path_run, 'ensemble.h5')
+
+        with h5py.File(self.path_file, 'w') as f:
+            f.attrs['date saving'] = str(datetime.datetime.now()).encode()
+            f.attrs['name_solver'] = output.name_solver
+            f.attrs['name_run'] = output.name_run
+            f.attrs['nb_members'] = self.nb_members
+            self.sim.info._save_as_hdf5(hdf5_parent=f)
+
+            group_params = f.create_group('params_members')
+            for key, values in self.params_members.items():
+                group_params.create_dataset(key, data=values.ravel())
+
+            f.create_dataset(
+                'times', data=np.array([self.t]), maxshape=(None,))
+            energy = self.compute_energy_members()
+            f.create_dataset(
+                'energy', data=energy[np.newaxis],
+                maxshape=(None, self.nb_members))
+
+        self._t_last_save = self.t
+
+    def _save_energy(self):
+        if self.t == self._t_last_save:
+            return
+        self._t_last_save = self.t
+        energy = self.compute_energy_members()
+        with h5py.File(self.path_file, 'r+') as f:
+            dset_times = f['times']
+            nb_saved_times = dset_times.shape[0]
+            dset_times.resize((nb_saved_times+1,))
+            dset_times[nb_saved_times] = self.t
+            dset_energy = f['energy']
+            dset_energy.resize((nb_saved_times+1, self.nb_members))
+            dset_energy[nb_saved_times] = energy
+
+    def save_states_phys(self, stacked=True):
+        """Save the physical fields of all members.
+
+        Parameters
+        ----------
+
+        stacked : bool
+
+          If True, save one file with a dataset ``state_phys`` of shape
+          ``(nb_members, nvar) + shape_variable``. Otherwise, save one file
+          per member with the same layout as the files saved by
+          :class:`fluidsim.base.output.phys_fields.PhysFieldsBase`.
+
+        """
+        path_run = self.sim.output.path_run
+        print_stdout = self.sim.output.print_stdout
+        state_phys = self.state_phys
+
+        def create_group(f):
+            group = f.create_group('state_phys')
+            group.attrs['what'] = 'obj state_phys for solveq2d'
+            group.attrs['name_type_variables'] = state_phys.info
+            group.attrs['time'] = self.t
+            group.attrs['it'] = self.it
+            return group
+
+        if stacked:
+            name_save = 'state_phys_members_t={:07.3f}.hd5'.format(self.t)
+            print_stdout('save state_phys of the members in file ' +
+                         name_save)
+            with h5py.File(os.path.join(path_run, name_save), 'w') as f:
+                group = create_group(f)
+                group.attrs['keys'] = [
+                    key.encode() for key in state_phys.keys]
+                group.create_dataset('state_phys', data=state_phys)
+                group_params = f.create_group('params_members')
+                for key, values in self.params_members.items():
+                    group_params.create_dataset(key, data=values.ravel())
+        else:
+            for im in range(self.nb_members):
+                name_save = 'state_phys_t={:07.3f}_member{:03d}.hd5'.format(
+                    self.t, im)
+                with h5py.File(os.path.join(path_run, name_save), 'w') as f:
+                    group = create_group(f)
+                    for key in state_phys.keys:
+                        group.create_dataset(
+                            key, data=state_phys.get_var(key)[im])
+                    for key, values in self.params_members.items():
+                        group.attrs[key] = values.flat[im]
+            print_stdout(
+                'save state_phys of the members in files '
+                'state_phys_t={:07.3f}_member*.hd5'.format(self.t))
@@ -19,6 +19,10 @@ Provides:
    increments
    print_stdout
    spect_energy_budget
+   async_writer
+   histograms
+   time_means
+   hdf5_layout
 
 
 .. autoclass:: OutputBase
@@ -0,0 +1,142 @@
+"""Asynchronous writer (:mod:`fluidsim.base.output.async_writer`)
+================================================================
+
+.. currentmodule:: fluidsim.base.output.async_writer
+
+Provides:
+
+.. autoclass:: AsyncWriterHDF5
+   :members:
+   :private-members:
+
+With `params.output.ASYNC_SAVE = True`, the results of the specific outputs
+(the dictionaries given to
+:func:`fluidsim.base.output.base.SpecificOutput.add_dico_arrays_to_file`) are
+copied and put in a bounded queue. A thread keeps the files open and appends
+the results in batches, so that the time stepping does not wait for the
+disk (except if the queue is full). The queue is flushed and the files are
+closed at the end of the simulation (also when the simulation is stopped
+with the signal 12) and at the exit of the interpreter.
+
+The files must not be opened by the same process during the simulation (for
+example with the functions `load` of the outputs).
+
+"""
+
+from __future__ import print_function
+
+from builtins import object
+import atexit
+import numbers
+import threading
+from collections import OrderedDict
+from queue import Queue, Empty
+
+import numpy as np
+import h5py
+
+from . import hdf5_layout
+
+
+class AsyncWriterHDF5(object):
+    """Append results to hdf5 files in a thread.
+
+    Parameters
+    ----------
+
+    size_queue : int
+
+      Maximum number of results in the queue. The main thread waits if the
+      queue is full.
+
+    size_batch : int
+
+      Maximum number of results written in one batch.
+
+    """
+
+    _end = None
+
+    def __init__(self, size_queue=32, size_batch=16):
+        self._queue = Queue(maxsize=size_queue)
+        self.size_batch = size_batch
+        self._files = {}
+        self._error = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, path_file, time, dico_arrays):
+        """Add results (saved at the time `time`) in the queue."""
+        self._check_error()
+        if not self._thread.is_alive():
+            raise ValueError('The writer has been closed.')
+        dico_arrays = {
+            k: (v if isinstance(v, numbers.Number) else np.array(v))
+            for k, v in dico_arrays.items()}
+        self._queue.put((path_file, time, dico_arrays))
+
+    def flush(self):
+        """Wait until all results in the queue have been written."""
+        if self._thread.is_alive():
+            self._queue.join()
+        self._check_error()
+
+    def close(self):
+        """Flush the queue, stop the thread and close the files."""
+        if self._thread.is_alive():
+            self._queue.put(self._end)
+            self._thread.join()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        self._check_error()
+
+    def _check_error(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while items[-1] is not self._end and len(items) < self.size_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            try:
+                self._write_batch(
+                    [item for item in items if item is not self._end])
+            except Exception as error:
+                self._error = error
+
+            for item in items:
+                self._queue.task_done()
+
+            if items[-1] is self._end:
+                break
+
+    def _get_file(self, path_file):
+        try:
+            return self._files[path_file]
+        except KeyError:
+            f = self._files[path_file] = h5py.File(path_file, 'r+')
+            return f
+
+    def _write_batch(self, items):
+        """Append the results of a batch (at most one resize per dataset)."""
+        items_files = OrderedDict()
+        for path_file, time, dico_arrays in items:
+            items_files.setdefault(path_file, []).append((time, dico_arrays))
+
+        for path_file, results in items_files.items():
+            f = self._get_file(path_file)
+            hdf5_layout.append_to_file(
+                f, [time for time, dico in results],
+                {k: [dico[k] for time, dico in results]
+                 for k in results[0][1]})
+            f.flush()
@@ -28,6 +28,7 @@ import os
 import shutil
 import numbers
 from time import sleep
+from heapq import heappop, heappush
 
 import numpy as np
 import h5py
@@ -39,6 +40,31 @@ from fluiddyn.util import mpi, run_from_ipython
 from fluiddyn.io import FLUIDSIM_PATH, FLUIDDYN_PATH_SCRATCH
 from fluiddyn.util.util import time_as_str, print_memory_usage
 from fluidsim.util.util import load_params_simul
+from .async_writer import AsyncWriterHDF5
+from . import hdf5_layout
+
+inf = float('inf')
+
+
+def _time_next_online(spec_output, kind):
+    """Time at which the online method of kind `kind` ('print', 'plot' or
+    'save') of an output has to be called again.
+
+    The names of the attributes containing the time of the last call and the
+    period are given by the class attribute `_attribs_online` of the output.
+    The time is slightly underestimated so that the method is never called
+    later than with the check ``tsim - t_last >= period`` done at each time
+    step. If the time can not be computed, the method is called at each time
+    step.
+
+    """
+    try:
+        name_t_last, name_period = spec_output._attribs_online[kind]
+        t_last = getattr(spec_output, name_t_last)
+        period = getattr(spec_output, name_period)
+    except (AttributeError, KeyError):
+        return -inf
+    return t_last + period - 1e-14 - 1e-10 * (abs(t_last) + abs(period))
 
 
 class OutputBase(object):
@@ -67,12 +93,15 @@ class OutputBase(object):
         attribs = {'period_refresh_plots': 1,
                    'ONLINE_PLOT_OK': True,
                    'HAS_TO_SAVE': True,
+                   # see fluidsim.base.output.async_writer
+                   'ASYNC_SAVE': False,
                    'sub_directory': ''}
         params._set_child('output', attribs=attribs)
 
         params.output._set_child('periods_save')
         params.output._set_child('periods_print')
         params.output._set_child('periods_plot')
+        hdf5_layout._complete_params_with_default(params)
 
         dict_classes = info_solver.classes.Output.import_classes()
         for Class in list(dict_classes.values()):
@@ -94,6 +123,7 @@ class OutputBase(object):
         self.oper = sim.oper
 
         self.has_to_save = self.params.HAS_TO_SAVE
+        self.writer = None
         self.name_solver = sim.info.solver.short_name
 
         # initialisation name_run and path_run
@@ -168,13 +198,16 @@ Warning: params.NEW_DIR_RESULTS is False but the resolutions of the simulation
                         try:
                             os.makedirs(path_run)
                         except OSError:
-                            # in case of simultaneously launched simulations
-                            print("Warning: NEW_DIR_RESULTS=True, but path", path_run,
-                                  "already exists. Trying a new path...")
-                            sleep(1)
-                            self.init_name_run()
+                            pass
                         else:
                             break
+                    # in case of simultaneously launched simulations (the
+                    # name of the run contains the date with a precision of
+                    # one second)
+                    print("Warning: NEW_DIR_RESULTS=True, but path", path_run,
+                          "already exists. Trying a new path...")
+                    sleep(1)
+                    self.init_name_run()
             else:
                 path_run = ''
 
@@ -287,6 +320,9 @@ Warning: params.NEW_DIR_RESULTS is False but the resolutions of the simulation
         # The class PrintStdOut has already been instantiated.
         dict_classes.pop('PrintStdOut')
 
+        if self.has_to_save and self.params.ASYNC_SAVE and mpi.rank == 0:
+            self.writer = AsyncWriterHDF5()
+
         # to get always the initialization in the same order (important with mpi)
         keys = list(dict_classes.keys())
         keys.sort()
@@ -297,6 +333,8 @@ Warning: params.NEW_DIR_RESULTS is False but the resolutions of the simulation
                 print(Class, Class._tag)
             self.__dict__[Class._tag] = Class(self)
 
+        self._init_online_schedule()
+
         print_memory_usage(
             '\nMemory usage at the end of init. (equiv. seq.)')
 
@@ -305,24 +343,64 @@ Warning: params.NEW_DIR_RESULTS is False but the resolutions of the simulation
         except AttributeError:
             self.print_size_in_Mo(self.sim.state.state_phys, 'state_phys')
 
-    def one_time_step(self):
+    def _init_online_schedule(self):
+        """Initialize the schedule of the online methods of the outputs.
 
-        for k in self.params.periods_print._get_key_attribs():
-            period = self.params.periods_print.__dict__[k]
-            if period != 0:
-                self.__dict__[k].online_print()
+        The methods `online_print`, `online_plot` and `online_save` of the
+        specific outputs are listed (in the order used since the beginning:
+        prints, plots and saves sorted by key) and a priority queue contains
+        the time at which each method has to be called again. The time is
+        computed by :func:`_time_next_online` from the attributes declared in
+        the class attribute `_attribs_online` of the output. Methods for
+        which this time can not be computed are called at each time step
+        (the outputs still check themselves whether they have to work).
 
-        if self.params.ONLINE_PLOT_OK:
-            for k in self.params.periods_plot._get_key_attribs():
-                period = self.params.periods_plot.__dict__[k]
-                if period != 0:
-                    self.__dict__[k].online_plot()
+        """
+        self._online_methods = []
 
+        kinds = ['print']
+        if self.params.ONLINE_PLOT_OK:
+            kinds.append('plot')
         if self.has_to_save:
-            for k in self.params.periods_save._get_key_attribs():
-                period = self.params.periods_save.__dict__[k]
-                if period != 0:
-                    self.__dict__[k].online_save()
+            kinds.append('save')
+
+        for kind in kinds:
+            periods = self.params['periods_' + kind]
+            for k in periods._get_key_attribs():
+                if periods.__dict__[k] != 0:
+                    spec_output = self.__dict__[k]
+                    self._online_methods.append((
+                        'output.{}.{}'.format(kind, k), spec_output, kind,
+                        getattr(spec_output, 'online_' + kind)))
+
+        # all methods are called at the first time step
+        self._queue_online = [
+            (-inf, index) for index in range(len(self._online_methods))]
+
+    def one_time_step(self, timers=None):
+        """Call the online methods of the outputs which have to work.
+
+        If `timers` (:class:`fluidsim.util.timers.Timers`) is given, the
+        duration of each call is accumulated.
+
+        """
+        queue = self._queue_online
+        tsim = self.sim.time_stepping.t
+        if not queue or queue[0][0] > tsim:
+            return
+
+        indices = []
+        while queue and queue[0][0] <= tsim:
+            indices.append(heappop(queue)[1])
+        indices.sort()
+
+        for index in indices:
+            name, spec_output, kind, method = self._online_methods[index]
+            if timers is None:
+                method()
+            else:
+                timers.call(name, method)
+            heappush(queue, (_time_next_online(spec_output, kind), index))
 
     def figure_axe(self, numfig=None, size_axe=None):
         if mpi.rank == 0:
@@ -350,6 +428,10 @@ Warning: params.NEW_DIR_RESULTS is False but the resolutions of the simulation
         if self.has_to_save:
             self.phys_fields.save()
         if mpi.rank == 0 and self.has_to_save:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+
             self.print_stdout.close()
 
             for k in self.params.periods_save._get_key_attribs():
@@ -358,6 +440,8 @@ Warning: params.NEW_DIR_RESULTS is False but the resolutions of the simulation
                     if hasattr(self.__dict__[k], 'close_file'):
                         print('close_file', k)
                         self.__dict__[k].close_file()
+                    if hasattr(self.__dict__[k], 'trim_files'):
+                        self.__dict__[k].trim_files()
 
         if (not self.path_run.startswith(FLUIDSIM_PATH) and mpi.rank == 0):
             path_base = FLUIDSIM_PATH
@@ -418,6 +502,11 @@ class OutputBasePseudoSpectral(OutputBase):
 class SpecificOutput(object):
     """Small class for features useful for specific outputs"""
 
+    # names of the attributes (time of the last call, period) used to
+    # schedule the online methods (see OutputBase._init_online_schedule)
+    _attribs_online = {'save': ('t_last_save', 'period_save'),
+                       'plot': ('t_last_plot', 'period_plot')}
+
     def __init__(self, output, period_save=0, period_plot=0,
                  has_to_plot_saved=False,
                  dico_arrays_1time=None):
@@ -522,34 +611,31 @@ class SpecificOutput(object):
 
     def create_file_from_dico_arrays(self, path_file,
                                      dico_matrix, dico_arrays_1time):
+        """Create a file (datasets with one row per time, see
+        :mod:`fluidsim.base.output.hdf5_layout`)."""
         if os.path.exists(path_file):
             print('file NOT created since it already exists!')
         elif mpi.rank == 0:
-            with h5py.File(path_file, 'w') as f:
+            params_layout = self.output.params.hdf5_layout
+            with hdf5_layout.create_file(path_file) as f:
                 f.attrs['date saving'] = str(datetime.datetime.now()).encode()
                 f.attrs['name_solver'] = self.output.name_solver
                 f.attrs['name_run'] = self.output.name_run
+                f.attrs['coef_alloc'] = max(params_layout.coef_alloc, 1.)
 
                 self.sim.info._save_as_hdf5(hdf5_parent=f)
 
-                times = np.array([self.sim.time_stepping.t], dtype=np.float64)
-                f.create_dataset(
-                    'times', data=times, maxshape=(None,))
+                hdf5_layout.create_dataset_rows(
+                    f, 'times', np.float64(self.sim.time_stepping.t),
+                    params_layout)
 
                 for k, v in list(dico_arrays_1time.items()):
                     f.create_dataset(k, data=v)
 
                 for k, v in list(dico_matrix.items()):
                     if isinstance(v, numbers.Number):
-                        arr = np.array([v], dtype=v.__class__)
-                        arr.resize((1,))
-                        f.create_dataset(
-                            k, data=arr, maxshape=(None,))
-                    else:
-                        arr = np.array(v)
-                        arr.resize((1,) + v.shape)
-                        f.create_dataset(
-                            k, data=arr, maxshape=((None,) + v.shape))
+                        v = np.array(v, dtype=v.__class__)
+                    hdf5_layout.create_dataset_rows(f, k, v, params_layout)
 
     def add_dico_arrays_to_file_old(self, path_file, dico_arrays):
         if not os.path.exists(path_file):
@@ -568,31 +654,30 @@ class SpecificOutput(object):
     def add_dico_arrays_to_file(self, path_file, dico_matrix):
         if not os.path.exists(path_file):
             raise ValueError('can not add dico matrix in nonexisting file!')
+        elif mpi.rank == 0 and self.output.writer is not None:
+            self.output.writer.add(
+                path_file, self.sim.time_stepping.t, dico_matrix)
         elif mpi.rank == 0:
             with h5py.File(path_file, 'r+') as f:
-                dset_times = f['times']
-                nb_saved_times = dset_times.shape[0]
-                dset_times.resize((nb_saved_times+1,))
-                dset_times[nb_saved_times] = self.sim.time_stepping.t
-                for k, v in list(dico_matrix.items()):
-                    if isinstance(v, numbers.Number):
-                        dset_k = f[k]
-                        dset_k.resize((nb_saved_times+1,))
-                        dset_k[nb_saved_times] = v
-                    else:
-                        dset_k = f[k]
-                        dset_k.resize((nb_saved_times+1,) + v.shape)
-                        dset_k[nb_saved_times] = v
+                hdf5_layout.append_to_file(
+                    f, [self.sim.time_stepping.t],
+                    {k: [v] for k, v in dico_matrix.items()})
 
     def add_dico_arrays_to_open_file(self, f, dico_arrays, nb_saved_times):
         if mpi.rank == 0:
-            dset_times = f['times']
-            dset_times.resize((nb_saved_times+1,))
-            dset_times[nb_saved_times] = self.sim.time_stepping.t
-            for k, v in list(dico_arrays.items()):
-                dset_k = f[k]
-                dset_k.resize((nb_saved_times+1, v.size))
-                dset_k[nb_saved_times] = v
+            hdf5_layout.append_to_file(
+                f, [self.sim.time_stepping.t],
+                {k: [v] for k, v in dico_arrays.items()})
+
+    def trim_files(self):
+        """Trim the preallocated datasets of the hdf5 files (see
+        :mod:`fluidsim.base.output.hdf5_layout`)."""
+        for name in ('path_file', 'path_file1D', 'path_file2D'):
+            path_file = getattr(self, name, None)
+            if (path_file is not None and os.path.exists(path_file) and
+                    h5py.is_hdf5(path_file)):
+                with h5py.File(path_file, 'r+') as f:
+                    hdf5_layout.trim_file(f)
 
     def _has_to_online_save(self):
         return (self.sim.time_stepping.t - self.t_last_save >=
@@ -0,0 +1,180 @@
+"""Layout of the hdf5 files (:mod:`fluidsim.base.output.hdf5_layout`)
+===================================================================
+
+.. currentmodule:: fluidsim.base.output.hdf5_layout
+
+Provides:
+
+.. autofunction:: create_file
+
+.. autofunction:: compute_chunks
+
+.. autofunction:: create_dataset_rows
+
+.. autofunction:: append_rows
+
+.. autofunction:: append_to_file
+
+.. autofunction:: trim_file
+
+The datasets of the specific outputs saved in hdf5 files (for example
+spectra1D.h5, spectra2D.h5, increments.h5, time_sigK.h5 and
+spect_energy_budg.h5) contain one row per saved time. They are created with
+chunks of several rows (of about `params.output.hdf5_layout.size_chunk`
+bytes) and can be compressed with lossless filters (parameters `compression`,
+`compression_opts` and `shuffle`, as for `h5py.Group.create_dataset`).
+
+Resizing the datasets at each save is costly. The datasets can be
+preallocated by setting `params.output.hdf5_layout.coef_alloc` to a value
+larger than 1 (the number of allocated rows is then multiplied by
+`coef_alloc` when a dataset is full). By default (`coef_alloc` equal to 1),
+there is no preallocation. The preallocated datasets are trimmed to the
+number of saved times at the end of the simulation. During the simulation (or
+after a crash), the number of saved times is the size of the dataset 'times'
+(which is never preallocated) and only the first rows of the other datasets
+have to be read, for example with ``f[key][:len(f['times'])]``.
+
+The free space of the files is tracked (and reused) across the openings of
+the files (if supported by h5py and the hdf5 library). Without this, the
+space of the compressed chunks rewritten at each save is lost and the
+compressed files are much larger than the uncompressed ones.
+
+"""
+
+from __future__ import division
+
+import numpy as np
+import h5py
+
+
+def _complete_params_with_default(params):
+    """Complete the parameters `params.output.hdf5_layout`."""
+    params.output._set_child(
+        'hdf5_layout',
+        attribs={'size_chunk': 2**16,
+                 'compression': None,
+                 'compression_opts': None,
+                 'shuffle': False,
+                 'coef_alloc': 1.})
+
+
+def create_file(path_file):
+    """Create a hdf5 file (opened in mode 'w') reusing its free space."""
+    try:
+        return h5py.File(
+            path_file, 'w', fs_strategy='fsm', fs_persist=True)
+    except (TypeError, ValueError):
+        # old versions of h5py or of the hdf5 library
+        return h5py.File(path_file, 'w')
+
+
+def compute_chunks(shape_row, itemsize, size_chunk=2**16):
+    """Compute the shape of the chunks of a dataset with one row per time.
+
+    The chunks contain entire rows (at least one) and have a size close to
+    `size_chunk` (in bytes).
+
+    """
+    shape_row = tuple(shape_row)
+    size_row = itemsize * int(np.prod(shape_row))
+    nb_rows = max(size_chunk // max(size_row, 1), 1)
+    return (nb_rows,) + shape_row
+
+
+def create_dataset_rows(group, name, row, params_layout=None):
+    """Create a resizable dataset containing one row.
+
+    Parameters
+    ----------
+
+    group : h5py.Group
+
+    name : str
+
+    row : number or np.ndarray
+
+      The values saved at the first time.
+
+    params_layout : None or ParamContainer
+
+      The parameters `params.output.hdf5_layout` (if None, the dataset is
+      created without compression and without preallocation).
+
+    """
+    row = np.asarray(row)
+    kwargs = {}
+    size_chunk = 2**16
+    nb_alloc = 1
+    if params_layout is not None:
+        size_chunk = params_layout.size_chunk
+        if params_layout.compression is not None:
+            kwargs['compression'] = params_layout.compression
+            kwargs['compression_opts'] = params_layout.compression_opts
+        if params_layout.shuffle:
+            kwargs['shuffle'] = True
+
+    chunks = compute_chunks(row.shape, row.dtype.itemsize, size_chunk)
+
+    if (params_layout is not None and params_layout.coef_alloc > 1 and
+            name != 'times'):
+        # the first chunk is anyway allocated
+        nb_alloc = chunks[0]
+
+    dset = group.create_dataset(
+        name, shape=(nb_alloc,) + row.shape, dtype=row.dtype,
+        maxshape=(None,) + row.shape, chunks=chunks, **kwargs)
+    dset[0] = row
+    return dset
+
+
+def append_rows(dset, rows, nb_rows, coef_alloc=1.):
+    """Write rows after the `nb_rows` first rows of a dataset.
+
+    If the dataset is too small, it is resized with geometric growth (the
+    number of allocated rows is multiplied by `coef_alloc`).
+
+    """
+    rows = np.asarray(rows)
+    nb_needed = nb_rows + len(rows)
+    nb_alloc = dset.shape[0]
+    if nb_alloc < nb_needed:
+        nb_alloc = max(nb_needed, int(np.ceil(coef_alloc * nb_alloc)))
+        dset.resize((nb_alloc,) + dset.shape[1:])
+    dset[nb_rows:nb_needed] = rows
+
+
+def append_to_file(f, times, dico_rows):
+    """Append rows (one per time) to the datasets of a file.
+
+    Parameters
+    ----------
+
+    f : h5py.File
+
+    times : sequence
+
+      The times of the rows.
+
+    dico_rows : dict
+
+      For each dataset, the rows (first dimension of the same size as
+      `times`).
+
+    """
+    coef_alloc = f.attrs.get('coef_alloc', 1.)
+    dset_times = f['times']
+    nb_saved_times = dset_times.shape[0]
+    dset_times.resize((nb_saved_times + len(times),))
+    dset_times[nb_saved_times:] = times
+    for k, rows in dico_rows.items():
+        append_rows(f[k], rows, nb_saved_times, coef_alloc)
+
+
+def trim_file(f):
+    """Resize the preallocated datasets to the number of saved times."""
+    nb_saved_times = f['times'].shape[0]
+    for dset in f.values():
+        if (isinstance(dset, h5py.Dataset) and dset.maxshape and
+                dset.maxshape[0] is None and
+                dset.shape[0] > nb_saved_times):
+            dset.resize((nb_saved_times,) + dset.shape[1:])
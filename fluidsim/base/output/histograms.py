@@ -0,0 +1,194 @@
+"""Streaming histograms (:mod:`fluidsim.base.output.histograms`)
+==============================================================
+
+.. currentmodule:: fluidsim.base.output.histograms
+
+Provides:
+
+.. autoclass:: StreamingHistograms
+   :members:
+   :private-members:
+
+.. autofunction:: pdf_from_counts
+
+The histograms used by the outputs `pdf` and `increments` keep their bins
+from one save to the next, so that there is no global pre-pass to compute
+the range of the values. The counts of all histograms of an output are
+reduced over the processes with one `Allreduce` per save. The values out of
+the range of the bins are counted (underflow and overflow) and the bins of
+the next saves are adapted (the range is doubled on the side of the
+outliers, or reduced when the values occupy a small part of it). The files
+contain the counts, which can be summed over times (if the edges are the
+same) and over runs.
+
+"""
+
+from __future__ import division
+
+from builtins import object
+
+import numpy as np
+
+from fluiddyn.util import mpi
+
+
+def pdf_from_counts(counts, nb_outliers, valmin, valmax):
+    """Compute normalized pdfs from counts (last axis: bins).
+
+    The pdfs are normalized with the total number of values (including the
+    outliers), so that their integral is the fraction of values in the
+    range of the bins.
+
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    nbins = counts.shape[-1]
+    nb_values = counts.sum(axis=-1) + np.asarray(nb_outliers).sum(axis=-1)
+    widths = (np.asarray(valmax) - np.asarray(valmin)) / nbins
+    return counts / (np.maximum(nb_values, 1) * widths)[..., np.newaxis]
+
+
+class StreamingHistograms(object):
+    """Histograms (with bins kept across saves) of several quantities.
+
+    Each quantity (key) has `nb_hists` histograms of `nbins` bins (for
+    example one histogram per separation for the increments).
+
+    Parameters
+    ----------
+
+    nbins : int
+
+      Number of bins.
+
+    coef_margin : float
+
+      Relative margin added to the ranges computed from the values.
+
+    """
+
+    def __init__(self, nbins, coef_margin=0.1):
+        self.nbins = nbins
+        self.coef_margin = coef_margin
+        self.mins = {}
+        self.maxs = {}
+        self._counts = {}
+
+    def has_ranges(self, key):
+        """Return True if the bins of the key have been initialized."""
+        return key in self.mins
+
+    def init_ranges(self, key, valmins, valmaxs):
+        """Initialize the bins from the global extrema of the values."""
+        valmins = np.array(valmins, dtype=np.float64, ndmin=1)
+        valmaxs = np.array(valmaxs, dtype=np.float64, ndmin=1)
+        # no value for a histogram
+        valmins[np.isinf(valmins)] = 0.
+        valmaxs[np.isinf(valmaxs)] = 0.
+        margins = self.coef_margin * (valmaxs - valmins)
+        # same behavior as np.histogram if the values are equal
+        margins[margins == 0] = 0.5
+        self.mins[key] = valmins - margins
+        self.maxs[key] = valmaxs + margins
+
+    def init_ranges_from_values(self, keys_values):
+        """Initialize the bins of several keys (one histogram per key) from
+        their (local) values with one reduction."""
+        keys = sorted(keys_values)
+        extrema = np.empty(2 * len(keys))
+        for ik, key in enumerate(keys):
+            values = keys_values[key]
+            extrema[2*ik] = -values.min()
+            extrema[2*ik + 1] = values.max()
+        if mpi.nb_proc > 1:
+            mpi.comm.Allreduce(mpi.MPI.IN_PLACE, extrema, op=mpi.MPI.MAX)
+        for ik, key in enumerate(keys):
+            self.init_ranges(key, -extrema[2*ik], extrema[2*ik + 1])
+
+    def add_counts(self, key, counts):
+        """Add local counts (shape ``(nb_hists, nbins + 2)``, the first and
+        last columns contain the numbers of values smaller and larger than
+        the range)."""
+        if key in self._counts:
+            self._counts[key] += counts
+        else:
+            self._counts[key] = np.array(counts, dtype=np.int64)
+
+    def add_values(self, key, values):
+        """Add (local) values to the histogram of a key (one histogram)."""
+        valmin = self.mins[key][0]
+        valmax = self.maxs[key][0]
+        counts = np.empty((1, self.nbins + 2), dtype=np.int64)
+        counts[0, 1:-1] = np.histogram(
+            values, bins=self.nbins, range=(valmin, valmax))[0]
+        counts[0, 0] = np.count_nonzero(values < valmin)
+        counts[0, -1] = np.count_nonzero(values > valmax)
+        self.add_counts(key, counts)
+
+    def reduce(self):
+        """Reduce the counts of all keys (one reduction) and reset them.
+
+        The bins are adapted for the next counts.
+
+        Returns
+        -------
+
+        results : dict
+
+          For each key, a tuple ``(counts, nb_outliers, valmins, valmaxs)``
+          with the global counts (shape ``(nb_hists, nbins)``), the numbers
+          of values smaller and larger than the ranges (shape
+          ``(nb_hists, 2)``) and the ranges used for these counts.
+
+        """
+        keys = sorted(self._counts)
+        if not keys:
+            return {}
+        buffer = np.concatenate([self._counts[key].ravel() for key in keys])
+        if mpi.nb_proc > 1:
+            mpi.comm.Allreduce(mpi.MPI.IN_PLACE, buffer, op=mpi.MPI.SUM)
+
+        results = {}
+        start = 0
+        for key in keys:
+            shape = self._counts[key].shape
+            counts = buffer[start:start + shape[0]*shape[1]].reshape(shape)
+            start += counts.size
+            valmins = self.mins[key].copy()
+            valmaxs = self.maxs[key].copy()
+            results[key] = (counts[:, 1:-1], counts[:, [0, -1]],
+                            valmins, valmaxs)
+            self._adapt_ranges(key, counts)
+
+        self._counts.clear()
+        return results
+
+    def _adapt_ranges(self, key, counts):
+        """Adapt the ranges of the next counts (same result on all
+        processes since the counts have been reduced)."""
+        mins = self.mins[key]
+        maxs = self.maxs[key]
+        nbins = self.nbins
+        for ih in range(counts.shape[0]):
+            width = maxs[ih] - mins[ih]
+            has_under = counts[ih, 0] > 0
+            has_over = counts[ih, -1] > 0
+            if has_under and has_over:
+                mins[ih] -= width/2
+                maxs[ih] += width/2
+            elif has_under:
+                mins[ih] -= width
+            elif has_over:
+                maxs[ih] += width
+            else:
+                nonzero = np.nonzero(counts[ih, 1:-1])[0]
+                if nonzero.size == 0:
+                    continue
+                ibin_min = nonzero[0]
+                ibin_max = nonzero[-1] + 1
+                if ibin_max - ibin_min < nbins // 4:
+                    # the values occupy a small part of the range
+                    valmin = mins[ih] + ibin_min*width/nbins
+                    valmax = mins[ih] + ibin_max*width/nbins
+                    margin = (self.coef_margin + 0.5)*(valmax - valmin)
+                    mins[ih] = valmin - margin
+                    maxs[ih] = valmax + margin
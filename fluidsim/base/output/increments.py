@@ -3,6 +3,7 @@
 from __future__ import division, print_function
 
 from builtins import range
+import hashlib
 import h5py
 import os
 import numpy as np
@@ -10,6 +11,147 @@ import numpy as np
 from fluiddyn.util import mpi
 
 from .base import SpecificOutput
+from .histograms import StreamingHistograms, pdf_from_counts
+from .time_means import (
+    get_indices_time_window, iter_chunks, compute_time_means,
+    load_or_compute_cached)
+from . import increments_pythran
+
+
+def compute_separations(n):
+    """Compute the separations (in number of grid points) of the increments
+    for a direction discretized with `n` points."""
+    nr = min(n//16, 128)
+    nr = max(nr, n//2)
+    rmin = 1
+    rmax = int(0.8*n)
+    delta_logr = np.log(rmax/rmin)/(nr-1)
+    logr = np.log(rmin) + delta_logr*np.arange(nr)
+    rs = np.array(np.round(np.exp(logr)), dtype=np.int32)
+
+    for ir in range(1, nr):
+        if rs[ir-1] >= rs[ir]:
+            rs[ir] = rs[ir-1] + 1
+    return rs
+
+
+def _increments(var, r, istart, istop):
+    stop = max(istart, min(istop, var.shape[1] - r))
+    return var[:, istart+r:stop+r] - var[:, istart:stop]
+
+
+def _minmax_increments_numpy(var, rs, istart, istop):
+    mins = np.empty(rs.size)
+    maxs = np.empty(rs.size)
+    for ir, r in enumerate(rs):
+        inc = _increments(var, r, istart, istop)
+        if inc.size > 0:
+            mins[ir] = inc.min()
+            maxs[ir] = inc.max()
+        else:
+            mins[ir] = np.inf
+            maxs[ir] = -np.inf
+    return mins, maxs
+
+
+def _histograms_increments_numpy(var, rs, istart, istop, mins, maxs, nbins):
+    hists = np.empty((rs.size, nbins + 2), dtype=np.int64)
+    for ir, r in enumerate(rs):
+        inc = _increments(var, r, istart, istop)
+        hists[ir, 1:-1] = np.histogram(
+            inc, bins=nbins, range=(mins[ir], maxs[ir]))[0]
+        hists[ir, 0] = np.count_nonzero(inc < mins[ir])
+        hists[ir, -1] = np.count_nonzero(inc > maxs[ir])
+    return hists
+
+
+if hasattr(increments_pythran, '__pythran__'):
+    _minmax_increments = increments_pythran.minmax_increments
+    _histograms_increments = increments_pythran.histograms_increments
+else:
+    _minmax_increments = _minmax_increments_numpy
+    _histograms_increments = _histograms_increments_numpy
+
+
+def _prepare_field(var, axis):
+    """Return the (contiguous) field and the range of the first indices of
+    the increments along the axis 1 of this field."""
+    if axis == 1:
+        istart, istop = 0, var.shape[1]
+    elif axis == 0:
+        if mpi.nb_proc > 1:
+            vars_loc = mpi.comm.allgather(np.asarray(var))
+            istart = sum(var_loc.shape[0] for var_loc in vars_loc[:mpi.rank])
+            istop = istart + var.shape[0]
+            var = np.concatenate(vars_loc)
+        else:
+            istart, istop = 0, var.shape[0]
+        var = var.T
+    else:
+        raise ValueError('axis should be 0 or 1.')
+    return np.ascontiguousarray(var, dtype=np.float64), istart, istop
+
+
+def _compute_minmax_increments(var, rs, istart, istop):
+    """Global extrema of the increments (one reduction)."""
+    mins, maxs = _minmax_increments(var, rs, istart, istop)
+    if mpi.nb_proc > 1:
+        extrema = np.concatenate((-mins, maxs))
+        mpi.comm.Allreduce(mpi.MPI.IN_PLACE, extrema, op=mpi.MPI.MAX)
+        mins = -extrema[:rs.size]
+        maxs = extrema[rs.size:]
+    return mins, maxs
+
+
+def compute_pdfs_increments(var, rs, nbins, axis=1):
+    """Compute the normalized pdfs of the increments of a 2D field.
+
+    The increments ``var[i0, i1+r] - var[i0, i1]`` (for ``axis=1``, x
+    direction) or ``var[i0+r, i1] - var[i0, i1]`` (for ``axis=0``, y
+    direction) are computed for all separations `rs` (not periodic). If the
+    module `increments_pythran` is pythranized, the increments are not
+    stored: each field is read twice for all separations (once for the
+    ranges of the histograms and once to fill them).
+
+    With MPI, `var` is the local part of the field (the fields are
+    distributed over the axis 0). For the y direction, the whole field is
+    gathered on all processes, which compute the increments starting in
+    their local part.
+
+    The output `increments` does not use this function but keeps its bins
+    across saves (see :mod:`fluidsim.base.output.histograms`).
+
+    Returns
+    -------
+
+    pdfs : np.ndarray
+
+      Shape ``(len(rs), nbins)``.
+
+    valmins, valmaxs : np.ndarray
+
+      Edges of the histograms (as ``bin_edges[0]`` and ``bin_edges[-1]``
+      with `np.histogram`).
+
+    """
+    var, istart, istop = _prepare_field(var, axis)
+    rs = np.ascontiguousarray(rs, dtype=np.int32)
+
+    mins, maxs = _compute_minmax_increments(var, rs, istart, istop)
+
+    # no increment for the separation or same behavior as np.histogram
+    mins[np.isinf(mins)] = 0.
+    maxs[np.isinf(maxs)] = 0.
+    cond = maxs <= mins
+    mins[cond] -= 0.5
+    maxs[cond] += 0.5
+
+    hists = _histograms_increments(var, rs, istart, istop, mins, maxs, nbins)
+    if mpi.nb_proc > 1:
+        mpi.comm.Allreduce(mpi.MPI.IN_PLACE, hists, op=mpi.MPI.SUM)
+
+    pdfs = pdf_from_counts(hists[:, 1:-1], hists[:, [0, -1]], mins, maxs)
+    return pdfs, mins, maxs
 
 
 class Increments(SpecificOutput):
@@ -26,23 +168,22 @@ class Increments(SpecificOutput):
 
         params.output.periods_save._set_attrib(tag, 0)
         params.output._set_child(tag,
-                                attribs={'HAS_TO_PLOT_SAVED': False})
+                                 attribs={'HAS_TO_PLOT_SAVED': False,
+                                          # 'x' or 'xy'
+                                          'directions': 'x'})
 
     def __init__(self, output):
         params = output.sim.params
         self.nx = params.oper.nx
+        self.rxs = compute_separations(self.nx)
 
-        self.nrx = min(self.nx//16, 128)
-        self.nrx = max(self.nrx, self.nx//2)
-        rmin = 1
-        rmax = int(0.8*self.nx)
-        delta_logr = np.log(rmax/rmin)/(self.nrx-1)
-        logr = np.log(rmin) + delta_logr*np.arange(self.nrx)
-        self.rxs = np.array(np.round(np.exp(logr)), dtype=np.int32)
-
-        for ir in range(1, self.nrx):
-            if self.rxs[ir-1] >= self.rxs[ir]:
-                self.rxs[ir] = self.rxs[ir-1] + 1
+        directions = params.output.increments.directions
+        if directions not in ('x', 'xy'):
+            raise ValueError(
+                "params.output.increments.directions should be 'x' or 'xy'")
+        self.has_to_compute_y = directions == 'xy'
+        if self.has_to_compute_y:
+            self.rys = compute_separations(params.oper.ny)
 
         self.nbins = 400
 
@@ -54,17 +195,25 @@ class Increments(SpecificOutput):
                 with h5py.File(self.path_file, 'r') as f:
                     self.rxs = f['rxs'][...]
                     self.nbins = f['nbins'][...]
+                    if self.has_to_compute_y and 'rys' in f:
+                        self.rys = f['rys'][...]
             if mpi.nb_proc > 1:
                 self.rxs = mpi.comm.bcast(self.rxs)
                 self.nbins = mpi.comm.bcast(self.nbins)
+                if self.has_to_compute_y:
+                    self.rys = mpi.comm.bcast(self.rys)
 
         self.nrx = self.rxs.size
         dico_arrays_1time = {
             'rxs': self.rxs,
             'nbins': self.nbins}
+        if self.has_to_compute_y:
+            dico_arrays_1time['rys'] = self.rys
 
         self.keys_vars_to_compute = list(output.sim.state.state_phys.keys)
 
+        self._histograms = StreamingHistograms(int(self.nbins))
+
         super(Increments, self).__init__(
             output,
             period_save=params.output.periods_save.increments,
@@ -83,10 +232,12 @@ class Increments(SpecificOutput):
 
     def _online_plot(self, dico_results, key='rot'):
         """online plot on pdf"""
-        pdf = dico_results['pdf_delta_'+key]
-        pdf = pdf.reshape([self.nrx, self.nbins])
         valmin = dico_results['valmin_'+key]
         valmax = dico_results['valmax_'+key]
+        pdf = pdf_from_counts(
+            dico_results['hist_delta_'+key].reshape([self.nrx, self.nbins]),
+            dico_results['nb_out_delta_'+key].reshape([self.nrx, 2]),
+            valmin, valmax)
 
         for irx, rx in enumerate(self.rxs):
             values_inc = self.compute_values_inc(
@@ -94,28 +245,59 @@ class Increments(SpecificOutput):
             self.axe.plot(values_inc+irx, pdf[irx])
 
     def compute(self):
-        """compute the values at one time."""
-        dico_results = {}
-        for key in self.keys_vars_to_compute:
-            var = self.sim.state(key)
+        """compute the values at one time.
 
-            pdf_var = np.empty([self.nrx, self.nbins])
-            valmin = np.empty([self.nrx])
-            valmax = np.empty([self.nrx])
+        The histograms of the increments (for all variables and separations)
+        are saved as counts ('hist_delta_' + key, shape ``(nrx, nbins)``
+        flattened), with the numbers of increments out of the ranges
+        ('nb_out_delta_' + key) and the ranges ('valmin_' + key and
+        'valmax_' + key). The bins are kept from one save to the next (see
+        :mod:`fluidsim.base.output.histograms`). The results for the y
+        direction (if `params.output.increments.directions` is 'xy') are
+        saved with the suffix '_y' (for example 'hist_delta_ux_y').
 
-            for irx, rx in enumerate(self.rxs):
-                inc_var = self.oper.compute_increments_dim1(var, rx)
-                (pdf_var[irx], bin_edges_var
-                 ) = self.oper.pdf_normalized(inc_var, self.nbins)
-                valmin[irx] = bin_edges_var[0]
-                valmax[irx] = bin_edges_var[self.nbins]
+        """
+        histograms = self._histograms
+        directions = [('', 1, self.rxs)]
+        if self.has_to_compute_y:
+            directions.append(('_y', 0, self.rys))
+
+        for key in self.keys_vars_to_compute:
+            var = self.sim.state(key)
+            for suffix, axis, rs in directions:
+                name = key + suffix
+                var_c, istart, istop = _prepare_field(var, axis)
+                rs = np.ascontiguousarray(rs, dtype=np.int32)
+                if not histograms.has_ranges(name):
+                    histograms.init_ranges(
+                        name, *_compute_minmax_increments(
+                            var_c, rs, istart, istop))
+                histograms.add_counts(name, _histograms_increments(
+                    var_c, rs, istart, istop, histograms.mins[name],
+                    histograms.maxs[name], self.nbins))
 
-            dico_results['pdf_delta_'+key] = pdf_var.flatten()
-            dico_results['valmin_'+key] = valmin
-            dico_results['valmax_'+key] = valmax
+        dico_results = {}
+        for name, (counts, nb_outliers, valmin, valmax) in \
+                histograms.reduce().items():
+            dico_results['hist_delta_'+name] = counts.flatten()
+            dico_results['nb_out_delta_'+name] = nb_outliers.flatten()
+            dico_results['valmin_'+name] = valmin
+            dico_results['valmax_'+name] = valmax
 
         return dico_results
 
+    def _load_pdf(self, f, key_var, it):
+        """Load the pdfs (shape ``(nrx, nbins)``) saved at the index `it`."""
+        valmin = f['valmin_'+key_var][it]
+        valmax = f['valmax_'+key_var][it]
+        if 'hist_delta_'+key_var in f:
+            return pdf_from_counts(
+                f['hist_delta_'+key_var][it].reshape([self.nrx, self.nbins]),
+                f['nb_out_delta_'+key_var][it].reshape([self.nrx, 2]),
+                valmin, valmax)
+        # files saved with former versions
+        return f['pdf_delta_'+key_var][it].reshape([self.nrx, self.nbins])
+
     def compute_values_inc(self, valmin, valmax):
         return (valmin +
                 (valmax-valmin)/self.nbins*np.arange(0.5, self.nbins))
@@ -125,14 +307,19 @@ class Increments(SpecificOutput):
         f = h5py.File(self.path_file, 'r')
         dset_times = f['times']
         times = dset_times[...]
+        nt = len(times)
 
-        list_base_keys = ['pdf_delta_', 'valmin_', 'valmax_', 'struc_func_']
+        list_base_keys = ['hist_delta_', 'nb_out_delta_', 'pdf_delta_',
+                          'valmin_', 'valmax_', 'struc_func_']
 
         dico_results = {'times': times}
         for key in self.keys_vars_to_compute:
             for base_key in list_base_keys:
+                if base_key+key not in f:
+                    continue
                 dset_pdf = f[base_key+key]
-                result = dset_pdf[...]
+                # the datasets can be preallocated (see hdf5_layout)
+                result = dset_pdf[:nt]
                 dico_results[base_key+key] = result
 
         return dico_results
@@ -346,97 +533,92 @@ class Increments(SpecificOutput):
 
 
     def load_pdf_from_file(self, tmin=0, tmax=None, key_var='ux',
-                           irx_to_plot=None):
-        """Plot some pdf."""
-        f = h5py.File(self.path_file, 'r')
-        dset_times = f['times']
-        times = dset_times[...]
-        nt = len(times)
+                           irx_to_plot=None, use_cache=True):
+        """Load the time mean of the pdfs of the increments.
 
-        if tmax is None:
-            tmax = times.max()
-
-        rxs = f['rxs'][...]
-
-        oper = f['/info_simul/params/oper']
-        nx = oper.attrs['nx']
-        Lx = oper.attrs['Lx']
-
-        deltax = Lx/nx
-
-        rxs = np.array(rxs, dtype=np.float64)*deltax
-
-        # orders = f['orders'][...]
-
-        delta_t_save = np.mean(times[1:]-times[0:-1])
-        delta_t = delta_t_save
-
-        imin_plot = np.argmin(abs(times-tmin))
-        imax_plot = np.argmin(abs(times-tmax))
-
-        tmin_plot = times[imin_plot]
-        tmax_plot = times[imax_plot]
+        The pdfs are interpolated on the mean bins. The saved results are
+        read by chunks and the time means are cached (see
+        :mod:`fluidsim.base.output.time_means`).
 
+        """
+        with h5py.File(self.path_file, 'r') as f:
+            times = f['times'][...]
 
-#         to_print = '''load pdf of the increments
-# tmin = {0:8.6g} ; tmax = {1:8.6g}
-# imin = {2:8d} ; imax = {3:8d}'''.format(
-# tmin_plot, tmax_plot,
-# imin_plot, imax_plot)
-#         print(to_print)
+        if tmax is None:
+            tmax = times.max()
 
+        imin_plot, imax_plot = get_indices_time_window(times, tmin, tmax)
 
         if irx_to_plot is None:
-            irx_to_plot = np.arange(rxs.size)
-
+            irx_to_plot = np.arange(self.nrx)
+        irx_to_plot = np.asarray(irx_to_plot, dtype=np.int64)
         nb_rx_to_plot = irx_to_plot.size
 
-        # print 'irx_to_plot', irx_to_plot
-        # print 'self.rxs[irx_to_plot]', self.rxs[irx_to_plot]
-
-        pdf_timemean = np.zeros([nb_rx_to_plot, self.nbins])
-        values_inc_timemean = np.zeros([nb_rx_to_plot, self.nbins])
-
-        valmin_timemean = np.zeros([nb_rx_to_plot])
-        valmax_timemean = np.zeros([nb_rx_to_plot])
-        nb_timemean = 0
-
-        for it in range(imin_plot, imax_plot+1):
-            nb_timemean += 1
-            valmin = f['valmin_'+key_var][it]
-            valmax = f['valmax_'+key_var][it]
-
-            for irxp, irx in enumerate(irx_to_plot):
-                valmin_timemean[irxp] += valmin[irx]
-                valmax_timemean[irxp] += valmax[irx]
+        name = 'pdf_{}_imin{}_imax{}_irx{}'.format(
+            key_var, imin_plot, imax_plot,
+            hashlib.md5(irx_to_plot.tobytes()).hexdigest()[:16])
 
-        valmin_timemean /= nb_timemean
-        valmax_timemean /= nb_timemean
+        results = load_or_compute_cached(
+            self.path_file, name,
+            lambda: self._compute_pdf_timemean(
+                key_var, imin_plot, imax_plot, irx_to_plot),
+            use_cache)
 
-        for irxp, irx in enumerate(irx_to_plot):
-            values_inc_timemean[irxp] = self.compute_values_inc(
-                valmin_timemean[irxp], valmax_timemean[irxp])
-
-        nt = 0
-        for it in range(imin_plot, imax_plot+1):
-            nt += 1
-            pdf_dvar2D = f['pdf_delta_'+key_var][it]
-            pdf_dvar2D = pdf_dvar2D.reshape([self.nrx, self.nbins])
-            valmin = f['valmin_'+key_var][it]
-            valmax = f['valmax_'+key_var][it]
-
-            for irxp, irx in enumerate(irx_to_plot):
-                pdf_dvar = pdf_dvar2D[irx]
-                values_inc = self.compute_values_inc(
-                    valmin[irx], valmax[irx])
-
-                pdf_timemean[irxp] += np.interp(
-                    values_inc_timemean[irxp], values_inc, pdf_dvar)
+        return (results['pdf_timemean'], results['values_inc_timemean'],
+                nb_rx_to_plot)
 
-        pdf_timemean /= nt
-
-
-        return pdf_timemean, values_inc_timemean, nb_rx_to_plot
+    def _compute_pdf_timemean(self, key_var, imin, imax, irx_to_plot):
+        nbins = self.nbins
+        nb_rx_to_plot = irx_to_plot.size
+        pdf_timemean = np.zeros([nb_rx_to_plot, nbins])
+
+        with h5py.File(self.path_file, 'r') as f:
+            dset_valmin = f['valmin_'+key_var]
+            dset_valmax = f['valmax_'+key_var]
+            means = compute_time_means(
+                f, ['valmin_'+key_var, 'valmax_'+key_var], imin, imax)
+            valmin_timemean = means['valmin_'+key_var][irx_to_plot]
+            valmax_timemean = means['valmax_'+key_var][irx_to_plot]
+            values_inc_timemean = np.array([
+                self.compute_values_inc(valmin, valmax)
+                for valmin, valmax in zip(valmin_timemean, valmax_timemean)])
+
+            if 'hist_delta_'+key_var in f:
+                dset = f['hist_delta_'+key_var]
+            else:
+                # files saved with former versions
+                dset = f['pdf_delta_'+key_var]
+
+            for start, chunk in iter_chunks(dset, imin, imax):
+                stop = start + len(chunk)
+                valmins = dset_valmin[start:stop]
+                valmaxs = dset_valmax[start:stop]
+                chunk = chunk.reshape([-1, self.nrx, nbins])
+                if dset.name.endswith('hist_delta_'+key_var):
+                    nb_outliers = f['nb_out_delta_'+key_var][start:stop]
+                    pdfs = pdf_from_counts(
+                        chunk, nb_outliers.reshape([-1, self.nrx, 2]),
+                        valmins, valmaxs)
+                else:
+                    pdfs = chunk
+
+                for irxp, irx in enumerate(irx_to_plot):
+                    edges = np.stack((valmins[:, irx], valmaxs[:, irx]), 1)
+                    # consecutive saves with the same bins are averaged
+                    # before the (linear) interpolation
+                    starts_runs = np.nonzero(
+                        np.any(edges[1:] != edges[:-1], axis=1))[0] + 1
+                    for pdfs_run, edges_run in zip(
+                            np.split(pdfs[:, irx], starts_runs),
+                            np.split(edges, starts_runs)):
+                        values_inc = self.compute_values_inc(*edges_run[0])
+                        pdf_timemean[irxp] += len(pdfs_run) * np.interp(
+                            values_inc_timemean[irxp], values_inc,
+                            pdfs_run.mean(0))
+
+        pdf_timemean /= imax + 1 - imin
+        return {'pdf_timemean': pdf_timemean,
+                'values_inc_timemean': values_inc_timemean}
 
 
 
@@ -0,0 +1,73 @@
+"""Histograms of increments
+========================
+
+The increments ``var[i0, i1+r] - var[i0, i1]`` (for the first indices `i1`
+in ``range(istart, istop)`` and ``i1 + r < n1``) are computed on the fly for
+all separations `r`, without temporary arrays. These functions are used only
+if this module is pythranized (the loops would be very slow in Python).
+
+"""
+
+import numpy as np
+
+
+# pythran export minmax_increments(float64[][], int32[], int, int)
+
+
+def minmax_increments(var, rs, istart, istop):
+    """Return the minima and maxima of the increments for each separation."""
+    n0, n1 = var.shape
+    nr = rs.size
+    mins = np.empty(nr)
+    maxs = np.empty(nr)
+    for ir in range(nr):
+        r = rs[ir]
+        vmin = np.inf
+        vmax = -np.inf
+        for i0 in range(n0):
+            for i1 in range(istart, min(istop, n1 - r)):
+                inc = var[i0, i1 + r] - var[i0, i1]
+                if inc < vmin:
+                    vmin = inc
+                if inc > vmax:
+                    vmax = inc
+        mins[ir] = vmin
+        maxs[ir] = vmax
+    return mins, maxs
+
+
+# pythran export histograms_increments(
+#     float64[][], int32[], int, int, float64[], float64[], int)
+
+
+def histograms_increments(var, rs, istart, istop, mins, maxs, nbins):
+    """Return the histograms of the increments for each separation.
+
+    The bins of the separation ``rs[ir]`` divide regularly the interval
+    ``[mins[ir], maxs[ir]]`` (closed, as with `np.histogram`). The counts of
+    the bins are in ``hists[ir, 1:nbins+1]``. The numbers of increments
+    smaller and larger than the range are in ``hists[ir, 0]`` and
+    ``hists[ir, nbins+1]``.
+
+    """
+    n0, n1 = var.shape
+    nr = rs.size
+    hists = np.zeros((nr, nbins + 2), dtype=np.int64)
+    for ir in range(nr):
+        r = rs[ir]
+        vmin = mins[ir]
+        vmax = maxs[ir]
+        coef = nbins / (vmax - vmin)
+        for i0 in range(n0):
+            for i1 in range(istart, min(istop, n1 - r)):
+                inc = var[i0, i1 + r] - var[i0, i1]
+                if inc < vmin:
+                    ibin = 0
+                elif inc > vmax:
+                    ibin = nbins + 1
+                else:
+                    ibin = 1 + int((inc - vmin) * coef)
+                    if ibin > nbins:
+                        ibin = nbins
+                hists[ir, ibin] += 1
+    return hists
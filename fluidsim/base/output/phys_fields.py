@@ -28,12 +28,16 @@ from .base import SpecificOutput
 from .movies import MoviesBase1D, MoviesBase2D
 
 cfg = h5py.h5.get_config()
+# if False, the fields are sent to the process 0 which writes them
+use_mpio = cfg.mpi
 
 
 class PhysFieldsBase(SpecificOutput):
     """Manage the output of physical fields."""
 
     _tag = 'phys_fields'
+    # slices of the local arrays (see _get_slices_Xspace)
+    _slices_Xspace = None
 
     @staticmethod
     def _complete_params_with_default(params):
@@ -111,48 +115,46 @@ class PhysFieldsBase(SpecificOutput):
         to_print = 'save state_phys in file ' + name_save
         self.output.print_stdout(to_print)
 
-        if mpi.nb_proc == 1 or not cfg.mpi:
+        slices_Xspace = None
+        if mpi.nb_proc > 1:
+            slices_Xspace = self._get_slices_Xspace()
+
+        if slices_Xspace is not None and use_mpio:
+            # parallel hdf5: each process writes its part of the fields
+            with h5py.File(path_file, 'w', driver='mpio',
+                           comm=mpi.comm) as f:
+                group_state_phys = self._create_group_state_phys(
+                    f, state_phys)
+                slices_loc = slices_Xspace[mpi.rank]
+                for k in state_phys.keys:
+                    field_loc = state_phys.get_var(k)
+                    dset = group_state_phys.create_dataset(
+                        k, tuple(self.oper.shapeX_seq), dtype=field_loc.dtype)
+                    with dset.collective:
+                        dset[slices_loc] = field_loc
             if mpi.rank == 0:
-                f = h5py.File(path_file, 'w')
-                group_state_phys = f.create_group("state_phys")
-                group_state_phys.attrs['what'] = 'obj state_phys for solveq2d'
-                group_state_phys.attrs['name_type_variables'] = state_phys.info
-                group_state_phys.attrs['time'] = time
-                group_state_phys.attrs['it'] = self.sim.time_stepping.it
+                f = h5py.File(path_file, 'r+')
         else:
-            f = h5py.File(path_file, 'w', driver='mpio', comm=mpi.comm)
-            group_state_phys = f.create_group("state_phys")
-            group_state_phys.attrs['what'] = 'obj state_phys for solveq2d'
-            group_state_phys.attrs['name_type_variables'] = state_phys.info
-
-            group_state_phys.attrs['time'] = time
-            group_state_phys.attrs['it'] = self.sim.time_stepping.it
-
-        if mpi.nb_proc == 1:
-            for k in state_phys.keys:
-                field_seq = state_phys.get_var(k)
-                group_state_phys.create_dataset(k, data=field_seq)
-        elif not cfg.mpi:
-            for k in state_phys.keys:
-                field_loc = state_phys.get_var(k)
-                field_seq = self.oper.gather_Xspace(field_loc)
-                if mpi.rank == 0:
-                    group_state_phys.create_dataset(k, data=field_seq)
-        else:
-            for k in state_phys.keys:
-                field_loc = state_phys.get_var(k)
-                dset = group_state_phys.create_dataset(
-                    k, self.oper.shapeX_seq, dtype=field_loc.dtype)
-                f.atomic = False
-                xstart = self.oper.seq_index_firstK0
-                xend = self.oper.seq_index_firstK0+self.oper.shapeX_loc[0]
-                ystart = self.oper.seq_index_firstK1
-                yend = self.oper.seq_index_firstK1+self.oper.shapeX_loc[1]
-                with dset.collective:
-                    dset[xstart:xend, ystart:yend, :] = field_loc
-            f.close()
             if mpi.rank == 0:
                 f = h5py.File(path_file, 'w')
+                group_state_phys = self._create_group_state_phys(
+                    f, state_phys)
+            else:
+                group_state_phys = None
+
+            if mpi.nb_proc == 1:
+                for k in state_phys.keys:
+                    field_seq = state_phys.get_var(k)
+                    group_state_phys.create_dataset(k, data=field_seq)
+            elif slices_Xspace is not None:
+                self._write_state_phys_by_slabs(
+                    group_state_phys, state_phys, slices_Xspace)
+            else:
+                for k in state_phys.keys:
+                    field_loc = state_phys.get_var(k)
+                    field_seq = self.oper.gather_Xspace(field_loc)
+                    if mpi.rank == 0:
+                        group_state_phys.create_dataset(k, data=field_seq)
 
         if mpi.rank == 0:
             f.attrs['date saving'] = str(datetime.datetime.now()).encode()
@@ -168,6 +170,79 @@ class PhysFieldsBase(SpecificOutput):
             gf_params.attrs['NEW_DIR_RESULTS'] = True
             f.close()
 
+    def _create_group_state_phys(self, f, state_phys):
+        group_state_phys = f.create_group("state_phys")
+        group_state_phys.attrs['what'] = 'obj state_phys for solveq2d'
+        group_state_phys.attrs['name_type_variables'] = state_phys.info
+        group_state_phys.attrs['time'] = self.sim.time_stepping.t
+        group_state_phys.attrs['it'] = self.sim.time_stepping.it
+        return group_state_phys
+
+    def _get_slices_Xspace(self):
+        """Return the slices of the local arrays (physical space) of all
+        processes in the global arrays.
+
+        None is returned if the decomposition of the physical space can not
+        be determined (then the fields are gathered with `gather_Xspace`).
+
+        """
+        if self._slices_Xspace is not None:
+            return self._slices_Xspace or None
+
+        oper = self.oper
+        shapeX_seq = tuple(oper.shapeX_seq)
+        shapeX_loc = tuple(oper.shapeX_loc)
+        try:
+            firsts = oper.opfft.get_seq_indices_first_X()
+        except AttributeError:
+            # slabs along the first dimension
+            firsts = mpi.comm.exscan(shapeX_loc[0]) or 0
+        firsts = list(np.atleast_1d(firsts))
+        firsts += [0] * (len(shapeX_loc) - len(firsts))
+
+        slices_loc = tuple(
+            slice(int(first), int(first) + n)
+            for first, n in zip(firsts, shapeX_loc))
+        slices_Xspace = mpi.comm.allgather(slices_loc)
+
+        # the local arrays have to tile the global arrays
+        size = 0
+        for slices in slices_Xspace:
+            if any(sl.stop > n for sl, n in zip(slices, shapeX_seq)):
+                size = -1
+                break
+            size += np.prod([sl.stop - sl.start for sl in slices])
+        if size == np.prod(shapeX_seq):
+            self._slices_Xspace = slices_Xspace
+        else:
+            self._slices_Xspace = []
+        return self._slices_Xspace or None
+
+    def _write_state_phys_by_slabs(
+            self, group_state_phys, state_phys, slices_Xspace):
+        """Write the fields with only one slab in memory in the process 0.
+
+        The local arrays of the other processes are sent one after the other
+        to the process 0 and written in the global datasets.
+
+        """
+        for ik, k in enumerate(state_phys.keys):
+            field_loc = np.ascontiguousarray(state_phys.get_var(k))
+            if mpi.rank > 0:
+                mpi.comm.Send(field_loc, dest=0, tag=ik)
+                continue
+
+            dset = group_state_phys.create_dataset(
+                k, tuple(self.oper.shapeX_seq), dtype=field_loc.dtype)
+            dset[slices_Xspace[0]] = field_loc
+            for rank in range(1, mpi.nb_proc):
+                slices = slices_Xspace[rank]
+                buffer = np.empty(
+                    [sl.stop - sl.start for sl in slices],
+                    dtype=field_loc.dtype)
+                mpi.comm.Recv(buffer, source=rank, tag=ik)
+                dset[slices] = buffer
+
     def _select_field(self, field=None, key_field=None):
         keys_state_phys = self.sim.info.solver.classes.State['keys_state_phys']
         keys_computable = self.sim.info.solver.classes.State['keys_computable']
@@ -14,6 +14,7 @@ class PrintStdOutBase(object):
     the current state of the simulation."""
 
     _tag = 'print_stdout'
+    _attribs_online = {'print': ('t_last_print_info', 'period_print')}
 
     @staticmethod
     def _complete_params_with_default(params):
@@ -78,10 +79,25 @@ class PrintStdOutBase(object):
         self.print_stdout(self._make_str_info())
 
     def _make_str_info(self):
-        return 'it = {0:6d} ; t = {1:10.6g} ; deltat  = {2:10.5g}\n'.format(
-            self.sim.time_stepping.it,
-            self.sim.time_stepping.t,
-            self.sim.time_stepping.deltat)
+        time_stepping = self.sim.time_stepping
+        to_print = (
+            'it = {0:6d} ; t = {1:10.6g} ; deltat  = {2:10.5g}\n'.format(
+                time_stepping.it, time_stepping.t, time_stepping.deltat))
+
+        exact_linear_coefs = getattr(time_stepping, 'exact_linear_coefs', None)
+        if getattr(exact_linear_coefs, 'USE_CACHE', False):
+            to_print += (
+                '              cache exact coefs: hits = {} ; misses = {}\n'
+                ''.format(exact_linear_coefs.nb_cache_hits,
+                          exact_linear_coefs.nb_cache_misses))
+
+        nb_steps_rejected = getattr(time_stepping, 'nb_steps_rejected', None)
+        if nb_steps_rejected is not None:
+            to_print += (
+                '              rejected steps = {}\n'.format(
+                    nb_steps_rejected))
+
+        return to_print
 
     def _evaluate_duration_left(self):
         t_real_word = time()
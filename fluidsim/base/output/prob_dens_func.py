@@ -7,6 +7,8 @@ import h5py
 import numpy as np
 
 from fluidsim.base.output.base import SpecificOutput
+from fluidsim.base.output.histograms import (
+    StreamingHistograms, pdf_from_counts)
 
 
 class ProbaDensityFunc(SpecificOutput):
@@ -29,6 +31,8 @@ class ProbaDensityFunc(SpecificOutput):
         self.f = params.f
         self.nx = params.oper.nx
 
+        self._histograms = StreamingHistograms(nbins=100)
+
         super(ProbaDensityFunc, self).__init__(
             output,
             period_save=params.output.periods_save.pdf,
@@ -47,14 +51,22 @@ class ProbaDensityFunc(SpecificOutput):
 
     def _online_plot(self, dico_pdf):
         """online plot on pdf"""
-        pdf_eta = dico_pdf['pdf_eta']
         bin_edges_eta = dico_pdf['bin_edges_eta']
+        pdf_eta = pdf_from_counts(
+            dico_pdf['hist_eta'], dico_pdf['nb_out_eta'],
+            bin_edges_eta[0], bin_edges_eta[-1])
         self.axe.plot(bin_edges_eta[:-1], pdf_eta, 'k')
 
     def compute(self):
-        """compute the values at one time."""
+        """compute the values at one time.
+
+        The histograms are saved as counts ('hist_eta' and 'hist_u'), with
+        the numbers of values out of the ranges ('nb_out_eta' and
+        'nb_out_u') and the edges of the bins, which are kept from one save
+        to the next (see :mod:`fluidsim.base.output.histograms`).
+
+        """
         eta = self.sim.state.state_phys.get_var('eta')
-        pdf_eta, bin_edges_eta = self.oper.pdf_normalized(eta)
 
         ux = self.sim.state.state_phys.get_var('ux')
         uy = self.sim.state.state_phys.get_var('uy')
@@ -63,14 +75,36 @@ class ProbaDensityFunc(SpecificOutput):
         uym = uy.mean()
 
         u_norme = np.sqrt((ux - uxm)**2 + (uy - uym)**2)
-        pdf_u, bin_edges_u = self.oper.pdf_normalized(u_norme)
 
-        dico_pdf = {'pdf_eta': pdf_eta,
-                    'bin_edges_eta': bin_edges_eta,
-                    'pdf_u': pdf_u,
-                    'bin_edges_u': bin_edges_u}
+        histograms = self._histograms
+        keys_values = {'eta': eta, 'u': u_norme}
+        if not histograms.has_ranges('eta'):
+            histograms.init_ranges_from_values(keys_values)
+        for key, values in keys_values.items():
+            histograms.add_values(key, values)
+
+        dico_pdf = {}
+        for key, (counts, nb_outliers, valmin, valmax) in \
+                histograms.reduce().items():
+            dico_pdf['hist_' + key] = counts[0]
+            dico_pdf['nb_out_' + key] = nb_outliers[0]
+            dico_pdf['bin_edges_' + key] = np.linspace(
+                valmin[0], valmax[0], histograms.nbins + 1)
         return dico_pdf
 
+    @staticmethod
+    def _load_pdf(f, key, it=None):
+        """Load the pdf(s) of a key (all times if `it` is None)."""
+        if it is None:
+            it = Ellipsis
+        if 'hist_' + key in f:
+            bin_edges = f['bin_edges_' + key][it]
+            return pdf_from_counts(
+                f['hist_' + key][it], f['nb_out_' + key][it],
+                bin_edges[..., 0], bin_edges[..., -1])
+        # files saved with former versions
+        return f['pdf_' + key][it]
+
     def load(self):
         """load the saved pdf and return a dictionary."""
         f = h5py.File(self.path_file, 'r')
@@ -78,17 +112,11 @@ class ProbaDensityFunc(SpecificOutput):
         # times = dset_times[...]
         # nt = len(times)
 
-        dset_pdf_eta = f['pdf_eta']
-        dset_bin_edges_eta = f['bin_edges_eta']
-
-        pdf_eta = dset_pdf_eta[...]
-        bin_edges_eta = dset_bin_edges_eta[...]
-
-        dset_pdf_u = f['pdf_u']
-        dset_bin_edges_u = f['bin_edges_u']
+        pdf_eta = self._load_pdf(f, 'eta')
+        bin_edges_eta = f['bin_edges_eta'][...]
 
-        pdf_u = dset_pdf_u[...]
-        bin_edges_u = dset_bin_edges_u[...]
+        pdf_u = self._load_pdf(f, 'u')
+        bin_edges_u = f['bin_edges_u'][...]
 
         dico_pdf = {'pdf_eta': pdf_eta,
                     'bin_edges_eta': bin_edges_eta,
@@ -103,9 +131,7 @@ class ProbaDensityFunc(SpecificOutput):
         times = dset_times[...]
         # nt = len(times)
 
-        dset_pdf_eta = f['pdf_eta']
         dset_bin_edges_eta = f['bin_edges_eta']
-        dset_pdf_u = f['pdf_u']
         dset_bin_edges_u = f['bin_edges_u']
 
         delta_t_save = np.mean(times[1:]-times[0:-1])
@@ -149,7 +175,7 @@ class ProbaDensityFunc(SpecificOutput):
         ax1.set_yscale('linear')
 
         for it in range(imin_plot, imax_plot+1, delta_i_plot):
-            pdf_eta = dset_pdf_eta[it]
+            pdf_eta = self._load_pdf(f, 'eta', it)
             bin_edges_eta = dset_bin_edges_eta[it]
 
             bin_edges_eta = old_div((bin_edges_eta[:-1]+bin_edges_eta[1:]),2)
@@ -166,7 +192,7 @@ class ProbaDensityFunc(SpecificOutput):
         ax2.set_yscale('linear')
 
         for it in range(imin_plot, imax_plot+1, delta_i_plot):
-            pdf_u = dset_pdf_u[it]
+            pdf_u = self._load_pdf(f, 'u', it)
             bin_edges_u = dset_bin_edges_u[it]
 
             bin_edges_u = old_div((bin_edges_u[:-1]+bin_edges_u[1:]),2)
@@ -2,12 +2,12 @@ from __future__ import print_function
 import h5py
 
 import os
-import numpy as np
 
 from fluiddyn.util import mpi
 
 from .base import SpecificOutput
 from .movies import MoviesBase1D
+from .time_means import load_time_means
 
 
 class Spectra(SpecificOutput, MoviesBase1D):
@@ -105,73 +105,32 @@ class Spectra(SpecificOutput, MoviesBase1D):
         pass
 
     def load2d_mean(self, tmin=None, tmax=None):
-        f = h5py.File(self.path_file2D, 'r')
-        dset_times = f['times']
-        times = dset_times[...]
-        nt = len(times)
-
-        kh = f['khE'][...]
-
-        if tmin is None:
-            imin_plot = 0
-        else:
-            imin_plot = np.argmin(abs(times-tmin))
-
-        if tmax is None:
-            imax_plot = nt-1
-        else:
-            imax_plot = np.argmin(abs(times-tmax))
-
-        tmin = times[imin_plot]
-        tmax = times[imax_plot]
-
-        print('compute mean of 2D spectra\n' +
-              ('tmin = {0:8.6g} ; tmax = {1:8.6g}'
-               'imin = {2:8d} ; imax = {3:8d}').format(
-                  tmin, tmax, imin_plot, imax_plot))
-
-        dico_results = {'kh': kh}
-        for key in list(f.keys()):
-            if key.startswith('spectr'):
-                dset_key = f[key]
-                spect = dset_key[imin_plot:imax_plot+1].mean(0)
-                dico_results[key] = spect
-        return dico_results
+        """Compute the time mean of the 2D spectra (cached, see
+        :mod:`fluidsim.base.output.time_means`)."""
+        return self._load_mean(self.path_file2D, 'khE', '2D', tmin, tmax)
 
     def load1d_mean(self, tmin=None, tmax=None):
-        f = h5py.File(self.path_file1D, 'r')
-        dset_times = f['times']
-        times = dset_times[...]
-        nt = len(times)
-
-        kx = f['kxE'][...]
-        # ky = f['kyE'][...]
-        kh = kx
+        """Compute the time mean of the 1D spectra (cached, see
+        :mod:`fluidsim.base.output.time_means`)."""
+        return self._load_mean(self.path_file1D, 'kxE', '1D', tmin, tmax)
 
-        if tmin is None:
-            imin_plot = 0
-        else:
-            imin_plot = np.argmin(abs(times-tmin))
+    def _load_mean(self, path_file, key_k, dim, tmin, tmax):
+        dico_means, times, imin_plot, imax_plot = load_time_means(
+            path_file, tmin, tmax, startswith='spectr')
 
-        if tmax is None:
-            imax_plot = nt-1
-        else:
-            imax_plot = np.argmin(abs(times-tmax))
+        with h5py.File(path_file, 'r') as f:
+            kh = f[key_k][...]
 
         tmin = times[imin_plot]
         tmax = times[imax_plot]
 
-        print('compute mean of 1D spectra' +
-              ('tmin = {0:8.6g} ; tmax = {1:8.6g}\n'
-               'imin = {2:8d} ; imax = {3:8d}\n').format(
-                   tmin, tmax, imin_plot, imax_plot))
+        print(('compute mean of {0} spectra\n'
+               'tmin = {1:8.6g} ; tmax = {2:8.6g}\n'
+               'imin = {3:8d} ; imax = {4:8d}').format(
+                   dim, tmin, tmax, imin_plot, imax_plot))
 
         dico_results = {'kh': kh}
-        for key in list(f.keys()):
-            if key.startswith('spectr'):
-                dset_key = f[key]
-                spect = dset_key[imin_plot:imax_plot+1].mean(0)
-                dico_results[key] = spect
+        dico_results.update(dico_means)
         return dico_results
 
     def plot1d(self):
@@ -0,0 +1,185 @@
+"""Time means of saved results (:mod:`fluidsim.base.output.time_means`)
+=====================================================================
+
+.. currentmodule:: fluidsim.base.output.time_means
+
+Provides:
+
+.. autofunction:: get_indices_time_window
+
+.. autofunction:: iter_chunks
+
+.. autofunction:: compute_time_means
+
+.. autofunction:: load_or_compute_cached
+
+.. autofunction:: load_time_means
+
+The files of the specific outputs contain a dataset 'times' and datasets
+with one row per saved time. The time means over a window are computed with
+bulk reads of chunks of rows (the memory used is bounded by `size_chunk`)
+and are cached in a file next to the results (for example
+``spectra1D_cache_means.h5`` for ``spectra1D.h5``). The cached results are
+used as long as the time of the last modification of the file of results
+does not change. If the cache can not be written (for example in a
+read-only directory), the results are just not cached.
+
+"""
+
+from __future__ import division, print_function
+
+import os
+
+import numpy as np
+import h5py
+
+# maximum size (in bytes) of the chunks read in memory
+size_chunk = 64 * 2**20
+
+
+def get_indices_time_window(times, tmin=None, tmax=None):
+    """Return the indices of the saved times closest to `tmin` and `tmax`.
+
+    The first and last indices are used if `tmin` or `tmax` is None (same
+    results as ``np.argmin(abs(times - t))``).
+
+    """
+    nt = len(times)
+    return (_index_closest(times, tmin, 0),
+            _index_closest(times, tmax, nt - 1))
+
+
+def _index_closest(times, t, default):
+    if t is None:
+        return default
+    if len(times) > 1 and np.all(times[1:] >= times[:-1]):
+        index = np.searchsorted(times, t)
+        if index == 0:
+            return 0
+        if index == len(times):
+            return len(times) - 1
+        if t - times[index - 1] <= times[index] - t:
+            return index - 1
+        return index
+    return np.argmin(abs(times - t))
+
+
+def iter_chunks(dset, imin, imax):
+    """Iterate over chunks of rows ``imin:imax+1`` of a dataset.
+
+    Yields the index of the first row of each chunk and the chunk (read
+    with one bulk read).
+
+    """
+    size_row = max(dset.dtype.itemsize * int(np.prod(dset.shape[1:])), 1)
+    nb_rows = max(size_chunk // size_row, 1)
+    for start in range(imin, imax + 1, nb_rows):
+        stop = min(start + nb_rows, imax + 1)
+        yield start, dset[start:stop]
+
+
+def compute_time_means(h5file, keys, imin, imax):
+    """Compute the time means of datasets over the rows ``imin:imax+1``."""
+    nt = imax + 1 - imin
+    results = {}
+    for key in keys:
+        dset = h5file[key]
+        result = np.zeros(dset.shape[1:])
+        for start, chunk in iter_chunks(dset, imin, imax):
+            result += chunk.sum(axis=0)
+        results[key] = result / nt
+    return results
+
+
+def _path_cache(path_file):
+    return os.path.splitext(path_file)[0] + '_cache_means.h5'
+
+
+def load_or_compute_cached(path_file, name, compute, use_cache=True):
+    """Load results from the cache or compute and cache them.
+
+    Parameters
+    ----------
+
+    path_file : str
+
+      Path of the file of results.
+
+    name : str
+
+      Name of the results in the cache (it has to contain the parameters of
+      the computation, for example the indices of the time window).
+
+    compute : callable
+
+      Function (without argument) returning a dictionary of arrays.
+
+    """
+    if not use_cache:
+        return compute()
+
+    path_cache = _path_cache(path_file)
+    mtime = os.path.getmtime(path_file)
+
+    if os.path.exists(path_cache):
+        try:
+            with h5py.File(path_cache, 'r') as f:
+                if name in f and f[name].attrs['mtime'] == mtime:
+                    group = f[name]
+                    return {key: group[key][...] for key in group.keys()}
+        except (IOError, KeyError):
+            pass
+
+    results = compute()
+
+    try:
+        with h5py.File(path_cache, 'a') as f:
+            if name in f:
+                del f[name]
+            group = f.create_group(name)
+            group.attrs['mtime'] = mtime
+            for key, value in results.items():
+                group.create_dataset(key, data=value)
+    except IOError:
+        pass
+
+    return results
+
+
+def load_time_means(path_file, tmin=None, tmax=None, startswith='',
+                    use_cache=True):
+    """Compute (or load from the cache) the time means of the datasets whose
+    names start with `startswith`.
+
+    Returns
+    -------
+
+    results : dict
+
+      The time means.
+
+    times : np.ndarray
+
+      The times of the file.
+
+    imin, imax : int
+
+      The indices of the time window.
+
+    """
+    with h5py.File(path_file, 'r') as f:
+        times = f['times'][...]
+    imin, imax = get_indices_time_window(times, tmin, tmax)
+
+    def compute():
+        with h5py.File(path_file, 'r') as f:
+            keys = [key for key in f.keys()
+                    if key.startswith(startswith) and key != 'times' and
+                    isinstance(f[key], h5py.Dataset) and
+                    # preallocated datasets can be longer than times
+                    f[key].ndim > 0 and f[key].shape[0] >= len(times)]
+            return compute_time_means(f, keys, imin, imax)
+
+    name = 'means_{}_imin{}_imax{}'.format(startswith, imin, imax)
+    results = load_or_compute_cached(path_file, name, compute, use_cache)
+    return results, times, imin, imax
@@ -298,7 +298,8 @@ class TimeSignalsK(SpecificOutput):
 
             for key in keys_linear_eigenmodes:
                 dset_temp = f[key[:-3]+'array_ik']
-                A = dset_temp[...]
+                # the dataset can be preallocated (see hdf5_layout)
+                A = dset_temp[:len(times)]
                 dico_results['sig_'+key] = np.ascontiguousarray(A.transpose())
         return dico_results
 
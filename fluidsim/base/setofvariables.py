@@ -9,12 +9,38 @@ Provides:
    :members:
    :private-members:
 
+.. autofunction:: get_dtypes
+
+With `params.precision = 'single'`, only the storage of the state (and of
+the arrays of the time stepping) is in single precision. The operators, the
+FFTs and the pythran kernels still compute in double precision: the fields
+are converted at their input (temporary copies in double precision) and the
+results are cast back when they are stored in the state. The memory of the
+state is halved, but the computation of the tendencies is not faster and
+its peak memory can be larger than in double precision.
+
 """
 
 from __future__ import print_function
 
 import numpy as np
 
+_dtypes_from_precision = {
+    'double': (np.float64, np.complex128),
+    'single': (np.float32, np.complex64)}
+
+
+def get_dtypes(params):
+    """Return the real and complex dtypes given by `params.precision`."""
+    # parameters saved before the introduction of precision are in double
+    precision = getattr(params, 'precision', 'double')
+    try:
+        return _dtypes_from_precision[precision]
+    except KeyError:
+        raise ValueError(
+            'params.precision has to be in {} (not {!r}).'.format(
+                sorted(_dtypes_from_precision), precision))
+
 
 class SetOfVariables(np.ndarray):
     """np.ndarray containing the variables.
@@ -43,10 +69,18 @@ class SetOfVariables(np.ndarray):
     dtype : :class:`numpy.dtype`, optional
         see :class:`numpy.ndarray` help.
 
+    nb_members : int, optional
+        Number of members of an ensemble of simulations. If provided, the
+        array has a leading member axis (shape ``(nb_members, nvar) +
+        shape_variable``) and the variables are indexed along the second
+        axis. Default to None (no member axis).
+
     """
+    nb_members = None
 
     def __new__(cls, input_array=None, keys=None, shape_variable=None,
-                like=None, value=None, info=None, dtype=None, **kargs):
+                like=None, value=None, info=None, dtype=None,
+                nb_members=None, **kargs):
         # print('in __new__')
         if input_array is not None:
             arr = input_array
@@ -54,21 +88,26 @@ class SetOfVariables(np.ndarray):
             if keys is None:
                 raise ValueError(
                     'If input_array is provided, keys has to be provided.')
-            if len(keys) != arr.shape[0]:
+            axis_var = 0 if nb_members is None else 1
+            if len(keys) != arr.shape[axis_var]:
                 raise ValueError(
-                    'len(keys) has to be equal to input_array.shape[0]')
+                    'len(keys) has to be equal to input_array.shape[{}]'
+                    ''.format(axis_var))
         else:
             if like is not None:
                 info = like.info
                 keys = like.keys
                 shape = like.shape
                 dtype = like.dtype
+                nb_members = like.nb_members
             elif keys is None or shape_variable is None:
                 raise ValueError(
                     'If like is not provided, keys and '
                     'shape_variable should be provided')
             else:
                 shape = (len(keys),) + tuple(shape_variable)
+                if nb_members is not None:
+                    shape = (nb_members,) + shape
 
             if value is None:
                 arr = np.empty(shape, dtype=dtype)
@@ -86,6 +125,7 @@ class SetOfVariables(np.ndarray):
         obj.info = info
         obj.keys = keys
         obj.nvar = len(keys)
+        obj.nb_members = nb_members
 
         return obj
 
@@ -96,6 +136,7 @@ class SetOfVariables(np.ndarray):
             self.info = getattr(obj, 'info', None)
             self.keys = getattr(obj, 'keys', None)
             self.nvar = getattr(obj, 'nvar', None)
+            self.nb_members = getattr(obj, 'nb_members', None)
 
     def set_var(self, arg, value):
         """Set a variable."""
@@ -104,7 +145,10 @@ class SetOfVariables(np.ndarray):
         else:
             index = self.keys.index(arg)
         # warning: copy...
-        self[index] = value
+        if self.nb_members is None:
+            self[index] = value
+        else:
+            self[:, index] = value
 
     def get_var(self, arg):
         """Get a variable as a np.array."""
@@ -112,7 +156,10 @@ class SetOfVariables(np.ndarray):
             index = arg
         else:
             index = self.keys.index(arg)
-        return np.asarray(self[index])
+        if self.nb_members is None:
+            return np.asarray(self[index])
+        else:
+            return np.asarray(self[:, index])
 
     def initialize(self, value=0):
         """Initialize as a constant array."""
@@ -13,6 +13,10 @@ Provides:
    :members:
    :private-members:
 
+.. autofunction:: enable_operators_reuse
+
+.. autofunction:: disable_operators_reuse
+
 """
 
 from builtins import object
@@ -27,6 +31,56 @@ from fluidsim.base.solvers.info_base import (
     InfoSolverBase, create_info_simul)
 
 
+# operators reused by the simulations created in this process (None if the
+# operators are not reused)
+_operators_reused = None
+
+
+def enable_operators_reuse():
+    """Reuse the operators for the simulations created in this process.
+
+    The operator objects (with their FFT plans and their arrays of
+    wavenumbers) are cached and reused by the next simulations with the same
+    class of operators and the same parameters `params.oper` (and the
+    physical parameters used by the operators). This is useful to run many
+    simulations in one process (see :mod:`fluidsim.util.sweep`).
+
+    """
+    global _operators_reused
+    if _operators_reused is None:
+        _operators_reused = {}
+
+
+def disable_operators_reuse():
+    """Do not reuse the operators (the default) and clear the cache."""
+    global _operators_reused
+    _operators_reused = None
+
+
+def _make_key_operators(Operators, params):
+    key = [Operators.__module__, Operators.__name__,
+           params.ONLY_COARSE_OPER,
+           repr(sorted(params.oper._make_dict().items()))]
+    # physical parameters used by some operators
+    for name in ('f', 'c2', 'kd2'):
+        key.append(getattr(params, name, None))
+    return tuple(key)
+
+
+def _create_operators(Operators, params):
+    if _operators_reused is None:
+        return Operators(params=params)
+
+    key = _make_key_operators(Operators, params)
+    try:
+        oper = _operators_reused[key]
+    except KeyError:
+        oper = _operators_reused[key] = Operators(params=params)
+    else:
+        oper.params = params
+    return oper
+
+
 class SimulBase(object):
     """Represent a solver.
 
@@ -60,6 +114,9 @@ class SimulBase(object):
                    'NEW_DIR_RESULTS': True,
                    'ONLY_COARSE_OPER': False,
                    'FORCING': False,
+                   # 'double' or 'single' (only for the storage of the
+                   # state, see fluidsim.base.setofvariables)
+                   'precision': 'double',
                    # Physical parameters:
                    'nu_2': 0.}
         params._set_attribs(attribs)
@@ -90,7 +147,7 @@ class SimulBase(object):
 
         # initialization operators and grid
         Operators = dict_classes['Operators']
-        self.oper = Operators(params=params)
+        self.oper = _create_operators(Operators, params)
 
         # initialization output
         Output = dict_classes['Output']
@@ -162,11 +162,16 @@ class SimulBasePseudoSpectral(SimulBase):
 
         return f_d, f_d_hypo
 
-    def tendencies_nonlin(self, variables=None):
+    def tendencies_nonlin(self, variables=None, out=None):
         r"""Compute the nonlinear tendencies.
 
         This function has to be overridden in a child class.
 
+        The optional argument `out` is the array in which the tendencies are
+        stored. Solvers supporting this argument avoid an allocation at each
+        call when the in-place time stepping is used
+        (`params.time_stepping.USE_INPLACE`).
+
         Returns
         -------
 
@@ -174,7 +179,10 @@ class SimulBasePseudoSpectral(SimulBase):
             An array containing only zeros.
 
         """
-        tendencies = SetOfVariables(like=self.state.state_fft)
+        if out is None:
+            tendencies = SetOfVariables(like=self.state.state_fft)
+        else:
+            tendencies = out
         tendencies.initialize(value=0.)
         return tendencies
 
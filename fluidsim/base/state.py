@@ -15,11 +15,9 @@ Provides:
 
 """
 
-from builtins import range
 from builtins import object
-import numpy as np
 
-from fluidsim.base.setofvariables import SetOfVariables
+from fluidsim.base.setofvariables import SetOfVariables, get_dtypes
 
 
 class StateBase(object):
@@ -53,9 +51,11 @@ class StateBase(object):
         except AttributeError:
             self.keys_computable = []
 
+        self.dtype_real, self.dtype_complex = get_dtypes(self.params)
+
         self.state_phys = SetOfVariables(keys=self.keys_state_phys,
                                          shape_variable=self.oper.shapeX_loc,
-                                         dtype=np.float64,
+                                         dtype=self.dtype_real,
                                          info='state_phys')
         self.vars_computed = {}
         self.it_computed = {}
@@ -121,7 +121,7 @@ class StatePseudoSpectral(StateBase):
         self.keys_state_fft = sim.info.solver.classes.State.keys_state_fft
         self.state_fft = SetOfVariables(keys=self.keys_state_fft,
                                         shape_variable=self.oper.shapeK_loc,
-                                        dtype=np.complex128,
+                                        dtype=self.dtype_complex,
                                         info='state_fft')
 
     def __call__(self, key):
@@ -150,24 +150,20 @@ class StatePseudoSpectral(StateBase):
             raise ValueError('key "'+key+'" is not known')
 
     def statefft_from_statephys(self):
-        fft2 = self.oper.fft2
-        for ik in range(self.state_fft.nvar):
-            self.state_fft[ik][:] = fft2(self.state_phys[ik])
+        nvar = self.state_fft.nvar
+        self.oper.fft2_many(self.state_phys[:nvar], self.state_fft)
 
     def statephys_from_statefft(self):
-        ifft2 = self.oper.ifft2
-        for ik in range(self.state_fft.nvar):
-            self.state_phys[ik] = ifft2(self.state_fft[ik])
+        nvar = self.state_fft.nvar
+        self.oper.ifft2_many(self.state_fft, self.state_phys[:nvar])
 
     def return_statephys_from_statefft(self, state_fft=None):
         """Return the state in physical space."""
-        ifft2 = self.oper.ifft2
         if state_fft is None:
             state_fft = self.state_fft
 
         state_phys = SetOfVariables(like=self.state_phys)
-        for ik in range(self.state_fft.nvar):
-            state_phys[ik] = ifft2(state_fft[ik])
+        self.oper.ifft2_many(state_fft, state_phys[:self.state_fft.nvar])
         return state_phys
 
     def can_this_key_be_obtained(self, key):
@@ -0,0 +1,87 @@
+import unittest
+import os
+import shutil
+from tempfile import mkdtemp
+
+import numpy as np
+import h5py
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.base.output.async_writer import AsyncWriterHDF5
+
+
+@unittest.skipIf(mpi.rank > 0, 'Only the process 0 writes.')
+class TestAsyncWriterHDF5(unittest.TestCase):
+
+    def setUp(self):
+        self.path_dir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path_dir)
+
+    def test_append(self):
+        """The results should be appended in the order of the calls."""
+        path_file = os.path.join(self.path_dir, 'results.h5')
+        with h5py.File(path_file, 'w') as f:
+            f.create_dataset('times', data=[0.], maxshape=(None,))
+            f.create_dataset('E', data=[1.], maxshape=(None,))
+            f.create_dataset('spectrum', data=np.zeros((1, 3)),
+                             maxshape=(None, 3))
+
+        writer = AsyncWriterHDF5(size_queue=2, size_batch=3)
+        spectrum = np.zeros(3)
+        for it in range(1, 8):
+            # the arrays are copied
+            spectrum[:] = it
+            writer.add(path_file, 0.1*it, {'E': float(it),
+                                           'spectrum': spectrum})
+        writer.flush()
+        writer.add(path_file, 0.8, {'E': 8., 'spectrum': spectrum})
+        writer.close()
+
+        with h5py.File(path_file, 'r') as f:
+            np.testing.assert_allclose(f['times'][...], 0.1*np.arange(9))
+            np.testing.assert_allclose(f['E'][1:], np.arange(1, 9))
+            np.testing.assert_allclose(f['spectrum'][1:, 0], [
+                1, 2, 3, 4, 5, 6, 7, 7])
+
+    def test_error(self):
+        """Errors in the thread should be raised in the main thread."""
+        writer = AsyncWriterHDF5()
+        writer.add(os.path.join(self.path_dir, 'nonexisting.h5'), 0., {})
+        with self.assertRaises(IOError):
+            writer.flush()
+        writer.close()
+
+    def test_simul(self):
+        """The files should be the same as with synchronous writes."""
+        spectra = []
+        for async_save in (False, True):
+            params = Simul.create_default_params()
+            params.short_name_type_run = 'test'
+            params.oper.nx = params.oper.ny = 16
+            params.init_fields.type = 'noise'
+            params.time_stepping.t_end = 0.5
+            params.time_stepping.USE_CFL = False
+            params.time_stepping.deltat0 = 0.02
+            params.output.ONLINE_PLOT_OK = False
+            params.output.ASYNC_SAVE = async_save
+            params.output.periods_save.spectra = 0.1
+            params.output.periods_save.spatial_means = 0.1
+
+            with stdout_redirected():
+                sim = Simul(params)
+                sim.time_stepping.start()
+
+            with h5py.File(sim.output.spectra.path_file1D, 'r') as f:
+                spectra.append(f['spectrum1Dkx_E'][...])
+            shutil.rmtree(sim.output.path_run)
+
+        np.testing.assert_allclose(spectra[0], spectra[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import h5py
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.util.paramcontainer import ParamContainer
+
+from fluidsim.base.output import hdf5_layout
+
+
+@unittest.skipIf(mpi.nb_proc > 1, 'Files written by each process.')
+class TestHDF5Layout(unittest.TestCase):
+
+    def setUp(self):
+        self.path_dir = tempfile.mkdtemp()
+        self.path_file = os.path.join(self.path_dir, 'results.h5')
+        params = ParamContainer(tag='params')
+        params._set_child('output')
+        hdf5_layout._complete_params_with_default(params)
+        self.params_layout = params.output.hdf5_layout
+
+    def tearDown(self):
+        shutil.rmtree(self.path_dir)
+
+    def test_chunks(self):
+        chunks = hdf5_layout.compute_chunks((100,), 8, 2**16)
+        self.assertEqual(chunks, (81, 100))
+        # rows larger than a chunk
+        chunks = hdf5_layout.compute_chunks((10, 2**14), 8, 2**16)
+        self.assertEqual(chunks, (1, 10, 2**14))
+
+    def test_append_trim(self):
+        params_layout = self.params_layout
+        params_layout.size_chunk = 2**12
+        params_layout.compression = 'gzip'
+        params_layout.shuffle = True
+        params_layout.coef_alloc = 2.
+        rows = np.random.rand(100, 30)
+
+        with h5py.File(self.path_file, 'w') as f:
+            f.attrs['coef_alloc'] = params_layout.coef_alloc
+            hdf5_layout.create_dataset_rows(
+                f, 'times', np.float64(0.), params_layout)
+            hdf5_layout.create_dataset_rows(f, 'a', rows[0], params_layout)
+            hdf5_layout.create_dataset_rows(
+                f, 'b', np.float64(0.), params_layout)
+
+        for it in range(1, rows.shape[0]):
+            with h5py.File(self.path_file, 'r+') as f:
+                hdf5_layout.append_to_file(
+                    f, [float(it)], {'a': [rows[it]], 'b': [float(it)]})
+
+        with h5py.File(self.path_file, 'r+') as f:
+            dset = f['a']
+            self.assertEqual(dset.chunks, (17, 30))
+            self.assertEqual(dset.compression, 'gzip')
+            self.assertEqual(f['times'].shape, (100,))
+            # preallocated
+            self.assertGreater(dset.shape[0], 100)
+            hdf5_layout.trim_file(f)
+
+        with h5py.File(self.path_file, 'r') as f:
+            self.assertEqual(f['a'].shape, rows.shape)
+            self.assertTrue(np.allclose(f['a'][...], rows))
+            self.assertTrue(np.allclose(f['b'][...], np.arange(100)))
+
+    def test_no_preallocation_by_default(self):
+        with h5py.File(self.path_file, 'w') as f:
+            hdf5_layout.create_dataset_rows(
+                f, 'a', np.zeros(30), self.params_layout)
+            self.assertEqual(f['a'].shape, (1, 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+import fluiddyn.util.mpi as mpi
+
+from fluidsim.base.output.histograms import (
+    StreamingHistograms, pdf_from_counts)
+
+
+@unittest.skipIf(mpi.nb_proc > 1, 'The values are different on each process.')
+class TestStreamingHistograms(unittest.TestCase):
+
+    def test_counts(self):
+        """All values should be counted and the bins should be adapted."""
+        nbins = 10
+        histograms = StreamingHistograms(nbins)
+        values = np.random.rand(1000)
+        histograms.init_ranges_from_values({'a': values})
+        self.assertLess(histograms.mins['a'][0], values.min())
+        self.assertGreater(histograms.maxs['a'][0], values.max())
+
+        histograms.add_values('a', values)
+        histograms.add_values('a', 3*values)
+        counts, nb_outliers, valmin, valmax = histograms.reduce()['a']
+        self.assertEqual(counts.shape, (1, nbins))
+        self.assertEqual(counts.sum() + nb_outliers.sum(), 2000)
+        self.assertEqual(nb_outliers[0, 0], 0)
+        self.assertGreater(nb_outliers[0, 1], 0)
+        # the range is enlarged for the next counts
+        self.assertGreater(histograms.maxs['a'][0], valmax[0])
+
+        pdf = pdf_from_counts(counts, nb_outliers, valmin, valmax)
+        fraction_in_range = counts.sum()/2000
+        self.assertAlmostEqual(
+            pdf.sum()*(valmax[0] - valmin[0])/nbins, fraction_in_range)
+
+    def test_several_histograms(self):
+        nbins = 8
+        histograms = StreamingHistograms(nbins)
+        histograms.init_ranges('b', [0., -1.], [1., 0.])
+        counts = np.zeros((2, nbins + 2), dtype=np.int64)
+        counts[0, 3] = 5
+        counts[1, 0] = 2
+        histograms.add_counts('b', counts)
+        histograms.add_counts('b', counts)
+        counts, nb_outliers, valmin, valmax = histograms.reduce()['b']
+        self.assertEqual(counts[0, 2], 10)
+        self.assertEqual(nb_outliers[1, 0], 4)
+        # the counts are reset
+        self.assertEqual(histograms.reduce(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
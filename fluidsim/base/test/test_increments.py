@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+import fluiddyn.util.mpi as mpi
+
+from fluidsim.base.output.increments import (
+    compute_separations, compute_pdfs_increments)
+
+
+@unittest.skipIf(mpi.nb_proc > 1, 'The field is not distributed.')
+class TestPdfsIncrements(unittest.TestCase):
+
+    def test_pdfs(self):
+        """The pdfs should be equal to the ones computed with np.histogram
+        for each separation."""
+        var = np.random.randn(24, 32)
+        nbins = 20
+        rs = compute_separations(32)
+        for axis in (1, 0):
+            pdfs, valmins, valmaxs = compute_pdfs_increments(
+                var, rs, nbins, axis=axis)
+            self.assertEqual(pdfs.shape, (rs.size, nbins))
+            if axis == 0:
+                var = var.T
+            n1 = var.shape[1]
+            for ir, r in enumerate(rs):
+                if r >= n1:
+                    self.assertTrue((pdfs[ir] == 0).all())
+                    continue
+                inc = var[:, r:] - var[:, :n1-r]
+                hist, bin_edges = np.histogram(
+                    inc, bins=nbins, range=(inc.min(), inc.max()))
+                pdf = hist/((bin_edges[1] - bin_edges[0])*hist.sum())
+                # the binning of the pythran kernel can differ for values
+                # very close to the edges
+                self.assertLess(abs(pdf - pdfs[ir]).max(),
+                                2/(hist.sum()*(bin_edges[1]-bin_edges[0])))
+                self.assertAlmostEqual(valmins[ir], bin_edges[0])
+                self.assertAlmostEqual(valmaxs[ir], bin_edges[-1])
+
+    def test_constant(self):
+        """Same ranges as np.histogram for a constant field."""
+        pdfs, valmins, valmaxs = compute_pdfs_increments(
+            np.ones((8, 8)), np.array([1, 2], dtype=np.int32), 10)
+        self.assertTrue(np.allclose(valmins, -0.5))
+        self.assertTrue(np.allclose(valmaxs, 0.5))
+        self.assertTrue(np.allclose(pdfs.sum(axis=1)*0.1, 1.))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import shutil
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.base.output.base import _time_next_online
+
+
+class FakeOutput(object):
+    _attribs_online = {'save': ('t_last_save', 'period_save')}
+    t_last_save = 1.
+    period_save = 0.5
+
+
+class TestOutputSchedule(unittest.TestCase):
+
+    def test_time_next_online(self):
+        output = FakeOutput()
+        t_next = _time_next_online(output, 'save')
+        self.assertLess(t_next, 1.5)
+        self.assertGreater(t_next, 1.5 - 1e-8)
+        # unknown attributes: called at each time step
+        self.assertEqual(_time_next_online(output, 'plot'), -float('inf'))
+
+    def test_same_times_as_checks(self):
+        """The outputs should work at the same times as with the checks
+        ``t - t_last >= period`` at each time step."""
+        params = Simul.create_default_params()
+        params.short_name_type_run = 'test'
+        params.oper.nx = params.oper.ny = 16
+        params.init_fields.type = 'noise'
+        params.time_stepping.USE_CFL = False
+        params.time_stepping.deltat0 = 0.01
+        params.time_stepping.USE_T_END = False
+        params.time_stepping.it_end = 40
+        params.output.HAS_TO_SAVE = False
+        period = 0.07
+        params.output.periods_print.print_stdout = period
+
+        with stdout_redirected():
+            sim = Simul(params)
+
+        times = []
+        print_stdout = sim.output.print_stdout
+        print_stdout._print_info = lambda: times.append(sim.time_stepping.t)
+
+        with stdout_redirected():
+            sim.time_stepping.start()
+
+        times_expected = []
+        t = 0.
+        t_last = -period
+        for it in range(40):
+            if t - t_last >= period:
+                times_expected.append(t)
+                t_last = t
+            t += 0.01
+
+        self.assertEqual(times, times_expected)
+
+        if mpi.rank == 0:
+            shutil.rmtree(sim.output.path_run, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
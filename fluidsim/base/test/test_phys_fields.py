@@ -0,0 +1,80 @@
+from __future__ import division
+
+import unittest
+import shutil
+from glob import glob
+
+import numpy as np
+import h5py
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.base.output import phys_fields
+
+
+class TestSavePhysFields(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        params = Simul.create_default_params()
+        params.short_name_type_run = 'test'
+        params.oper.nx = 32
+        params.oper.ny = 24
+        params.init_fields.type = 'noise'
+        params.output.HAS_TO_SAVE = True
+        params.output.periods_save.phys_fields = 0.
+        with stdout_redirected():
+            cls.sim = Simul(params)
+
+    @classmethod
+    def tearDownClass(cls):
+        if mpi.rank == 0:
+            shutil.rmtree(cls.sim.output.path_run)
+
+    def _check_save(self):
+        sim = self.sim
+        state_phys = sim.state.state_phys
+        sim.time_stepping.t += 1.
+        with stdout_redirected():
+            sim.output.phys_fields.save()
+
+        if mpi.nb_proc > 1:
+            fields_seq = {k: sim.oper.gather_Xspace(state_phys.get_var(k))
+                          for k in state_phys.keys}
+        else:
+            fields_seq = {k: state_phys.get_var(k) for k in state_phys.keys}
+        if mpi.rank == 0:
+            path_file = sorted(glob(
+                sim.output.path_run + '/state_phys_t=*.hd5'))[-1]
+            with h5py.File(path_file, 'r') as f:
+                group = f['state_phys']
+                self.assertEqual(group.attrs['time'], sim.time_stepping.t)
+                for k, field_seq in fields_seq.items():
+                    self.assertTrue(np.allclose(group[k][...], field_seq))
+
+    @unittest.skipIf(mpi.nb_proc == 1, 'Only for parallel runs.')
+    def test_slices(self):
+        slices_Xspace = self.sim.output.phys_fields._get_slices_Xspace()
+        self.assertIsNotNone(slices_Xspace)
+        covered = np.zeros(self.sim.oper.shapeX_seq, dtype=int)
+        for slices in slices_Xspace:
+            covered[slices] += 1
+        self.assertTrue(np.all(covered == 1))
+
+    def test_save_by_slabs(self):
+        use_mpio = phys_fields.use_mpio
+        phys_fields.use_mpio = False
+        try:
+            self._check_save()
+        finally:
+            phys_fields.use_mpio = use_mpio
+
+    @unittest.skipIf(not phys_fields.cfg.mpi, 'h5py built without mpi.')
+    def test_save_mpio(self):
+        self._check_save()
+
+
+if __name__ == '__main__':
+    unittest.main()
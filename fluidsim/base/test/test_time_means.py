@@ -0,0 +1,111 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import h5py
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.util.paramcontainer import ParamContainer
+
+from fluidsim.base.output import time_means, hdf5_layout
+from fluidsim.base.output.time_means import (
+    get_indices_time_window, load_time_means)
+
+
+@unittest.skipIf(mpi.nb_proc > 1, 'Files written by each process.')
+class TestTimeMeans(unittest.TestCase):
+
+    def setUp(self):
+        self.path_dir = tempfile.mkdtemp()
+        self.path_file = os.path.join(self.path_dir, 'spectra1D.h5')
+        self.times = np.linspace(0, 10, 41)
+        self.spectra = np.random.rand(self.times.size, 20)
+        with h5py.File(self.path_file, 'w') as f:
+            f['times'] = self.times
+            f['kxE'] = np.arange(20.)
+            f['spectrum1Dkx_E'] = self.spectra
+
+    def tearDown(self):
+        shutil.rmtree(self.path_dir)
+
+    def test_indices(self):
+        times = self.times
+        for tmin, tmax in ((None, None), (-1., 20.), (2.3, 7.6)):
+            imin, imax = get_indices_time_window(times, tmin, tmax)
+            if tmin is not None:
+                self.assertEqual(imin, np.argmin(abs(times - tmin)))
+                self.assertEqual(imax, np.argmin(abs(times - tmax)))
+            else:
+                self.assertEqual((imin, imax), (0, times.size - 1))
+
+    def test_means_and_cache(self):
+        size_chunk = time_means.size_chunk
+        # small chunks to check the sum over chunks
+        time_means.size_chunk = 3 * 20 * 8
+        try:
+            results, times, imin, imax = load_time_means(
+                self.path_file, 2., 8., startswith='spectr')
+        finally:
+            time_means.size_chunk = size_chunk
+
+        self.assertEqual(list(results), ['spectrum1Dkx_E'])
+        self.assertTrue(np.allclose(
+            results['spectrum1Dkx_E'],
+            self.spectra[imin:imax+1].mean(0)))
+
+        path_cache = os.path.join(self.path_dir, 'spectra1D_cache_means.h5')
+        self.assertTrue(os.path.exists(path_cache))
+
+        # the cached results are used...
+        with h5py.File(path_cache, 'r+') as f:
+            for group in f.values():
+                group['spectrum1Dkx_E'][...] = 0.
+        results = load_time_means(
+            self.path_file, 2., 8., startswith='spectr')[0]
+        self.assertTrue(np.all(results['spectrum1Dkx_E'] == 0.))
+
+        # ... except if the file of results has been modified
+        mtime = os.path.getmtime(self.path_file)
+        os.utime(self.path_file, (mtime + 10, mtime + 10))
+        results = load_time_means(
+            self.path_file, 2., 8., startswith='spectr')[0]
+        self.assertTrue(np.allclose(
+            results['spectrum1Dkx_E'],
+            self.spectra[imin:imax+1].mean(0)))
+
+    def test_file_not_trimmed(self):
+        """Files with preallocated datasets (before end_of_simul)."""
+        params = ParamContainer(tag='params')
+        params._set_child('output')
+        hdf5_layout._complete_params_with_default(params)
+        params_layout = params.output.hdf5_layout
+        params_layout.coef_alloc = 2.
+
+        path_file = os.path.join(self.path_dir, 'spectra_prealloc.h5')
+        with hdf5_layout.create_file(path_file) as f:
+            f.attrs['coef_alloc'] = params_layout.coef_alloc
+            hdf5_layout.create_dataset_rows(
+                f, 'times', self.times[0], params_layout)
+            hdf5_layout.create_dataset_rows(
+                f, 'spectrum1Dkx_E', self.spectra[0], params_layout)
+        for it in range(1, self.times.size):
+            with h5py.File(path_file, 'r+') as f:
+                hdf5_layout.append_to_file(
+                    f, [self.times[it]],
+                    {'spectrum1Dkx_E': self.spectra[it:it+1]})
+
+        with h5py.File(path_file, 'r') as f:
+            self.assertGreater(
+                f['spectrum1Dkx_E'].shape[0], self.times.size)
+
+        results, times, imin, imax = load_time_means(
+            path_file, startswith='spectr', use_cache=False)
+        self.assertTrue(np.allclose(times, self.times))
+        self.assertTrue(np.allclose(
+            results['spectrum1Dkx_E'], self.spectra.mean(0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+
+from fluidsim.base.time_stepping.base import compute_max_abs
+
+
+class TestComputeMaxAbs(unittest.TestCase):
+
+    def _check(self, *arrays):
+        maxima = compute_max_abs(*arrays)
+        self.assertEqual(len(maxima), len(arrays))
+        for arr, max_abs in zip(arrays, maxima):
+            self.assertAlmostEqual(max_abs, abs(arr).max(), places=6)
+
+    def test_compute_max_abs(self):
+        """The maxima should be equal to abs(arr).max()."""
+        shape = (8, 6, 5)
+        for dtype in (np.float64, np.float32):
+            arrays = [(np.random.rand(*shape) - 0.5).astype(dtype)
+                      for i in range(3)]
+            self._check(*arrays[:1])
+            self._check(*arrays[:2])
+            self._check(*arrays)
+
+        # non-contiguous arrays
+        self._check(*[arr[:, ::2] for arr in arrays])
+
+    def test_negative(self):
+        """The maximum of negative arrays should be positive."""
+        arr = -np.ones((4, 4))
+        self.assertEqual(compute_max_abs(arr, 2*arr), (1., 2.))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,25 +9,56 @@ Provides:
    :members:
    :private-members:
 
+.. autofunction:: compute_max_abs
+
 """
 from __future__ import division
 from __future__ import print_function
 
 from builtins import object
 
+import os
 from time import time
+from timeit import default_timer
 from signal import signal
 from math import pi
 from numbers import Number
 
+import numpy as np
+
 from fluiddyn.util import mpi
 
+from fluidsim.util.timers import Timers
+from . import cfl_pythran
+
+_max_abs_pythran = {2: cfl_pythran.max_abs2, 3: cfl_pythran.max_abs3}
+
+
+def compute_max_abs(*arrays):
+    """Return the maxima of the absolute values of arrays of same shape.
+
+    If the module `cfl_pythran` is pythranized, the arrays are read in one
+    pass. Otherwise, each maximum is computed with 2 reductions (`max` and
+    `min`), which do not allocate temporary arrays.
+
+    """
+    if (hasattr(cfl_pythran, '__pythran__') and
+            len(arrays) in _max_abs_pythran and
+            arrays[0].dtype in (np.float64, np.float32) and
+            all(arr.dtype == arrays[0].dtype for arr in arrays)):
+        # no copy for contiguous arrays
+        return _max_abs_pythran[len(arrays)](
+            *[np.ravel(arr) for arr in arrays])
+    return tuple(max(arr.max(), -arr.min()) for arr in arrays)
+
 
 class TimeSteppingBase(object):
     """Universal time stepping class used for all solvers.
 
 
     """
+    _nb_steps_CFL = 1
+
     @staticmethod
     def _complete_params_with_default(params):
         """This static method is used to complete the *params* container.
@@ -37,7 +68,16 @@ class TimeSteppingBase(object):
                    'it_end': 10,
                    'USE_CFL': False,
                    'type_time_scheme': 'RK4',
-                   'deltat0': 0.2}
+                   'deltat0': 0.2,
+                   # the CFL condition is evaluated every nb_steps_CFL
+                   # steps with the CFL coefficient multiplied by
+                   # coef_safety_CFL (if nb_steps_CFL > 1)
+                   'nb_steps_CFL': 1,
+                   'coef_safety_CFL': 0.8,
+                   # timers of the phases of the time steps (see
+                   # fluidsim.util.timers)
+                   'USE_TIMERS': False,
+                   'period_print_timers': 0.}
         params._set_child('time_stepping', attribs=attribs)
 
     def __init__(self, sim):
@@ -49,6 +89,12 @@ class TimeSteppingBase(object):
 
         self._has_to_stop = False
 
+        self.timers = None
+        if self.params.time_stepping.USE_TIMERS:
+            self.timers = Timers()
+            self._t_last_print_timers = 0.
+            self.one_time_step = self._one_time_step_with_timers
+
         def handler_signals(signal_number, stack):
             print('signal {} received.'.format(signal_number))
             self._has_to_stop = True
@@ -62,10 +108,21 @@ class TimeSteppingBase(object):
         if params_ts.USE_CFL:
             if params_ts.type_time_scheme == 'RK2':
                 self.CFL = 0.4
-            elif params_ts.type_time_scheme == 'RK4':
+            elif params_ts.type_time_scheme in ('RK4', 'RK4_2N'):
                 self.CFL = 1.0
+            elif params_ts.type_time_scheme in ('RK23', 'RK3_2N'):
+                self.CFL = 0.6
             else:
                 raise ValueError('Problem name time_scheme')
+
+            self._nb_steps_CFL = int(params_ts.nb_steps_CFL)
+            if self._nb_steps_CFL < 1:
+                raise ValueError(
+                    'params.time_stepping.nb_steps_CFL has to be larger '
+                    'than 0.')
+            if self._nb_steps_CFL > 1:
+                # the velocity can increase between 2 evaluations
+                self.CFL *= params_ts.coef_safety_CFL
         else:
             self.deltat = params_ts.deltat0
 
@@ -124,6 +181,11 @@ class TimeSteppingBase(object):
         print_stdout(
             '*************************************\n' +
             'Beginning of the computation')
+        if hasattr(self, 'nb_stage_arrays'):
+            print_stdout(
+                '    time scheme {}: {} preallocated arrays of the size of '
+                'the state'.format(self.params.time_stepping.type_time_scheme,
+                                   self.nb_stage_arrays))
         if self.sim.output.has_to_save:
             self.sim.output.phys_fields.save()
         time_begining_simul = time()
@@ -142,11 +204,17 @@ class TimeSteppingBase(object):
                    not self._has_to_stop):
                 self.one_time_step()
         total_time_simul = time() - time_begining_simul
+        if self.timers is not None:
+            print_stdout(self.timers.make_str())
         self.sim.output.end_of_simul(total_time_simul)
+        if self.timers is not None and self.sim.output.has_to_save:
+            self.timers.save(
+                os.path.join(self.sim.output.path_run, 'timers.txt'))
 
     def one_time_step(self):
         """Main time stepping function."""
-        if self.params.time_stepping.USE_CFL:
+        if (self.params.time_stepping.USE_CFL and
+                self.it % self._nb_steps_CFL == 0):
             self._compute_time_increment_CLF()
         if self.params.FORCING:
             self.sim.forcing.compute()
@@ -155,6 +223,37 @@ class TimeSteppingBase(object):
         self.t += self.deltat
         self.it += 1
 
+    def _one_time_step_with_timers(self):
+        """Same as :func:`one_time_step` with timers for each phase."""
+        timers = self.timers
+        t_start_step = t_start = default_timer()
+        if (self.params.time_stepping.USE_CFL and
+                self.it % self._nb_steps_CFL == 0):
+            self._compute_time_increment_CLF()
+            t_end = default_timer()
+            timers.add('CFL', t_end - t_start)
+            t_start = t_end
+        if self.params.FORCING:
+            self.sim.forcing.compute()
+            t_end = default_timer()
+            timers.add('forcing', t_end - t_start)
+            t_start = t_end
+        self.sim.output.one_time_step(timers)
+        t_end = default_timer()
+        timers.add('output', t_end - t_start)
+        t_start = t_end
+        self.one_time_step_computation()
+        t_end = default_timer()
+        timers.add('computation', t_end - t_start)
+        timers.add_total(t_end - t_start_step)
+        self.t += self.deltat
+        self.it += 1
+
+        period = self.params.time_stepping.period_print_timers
+        if period > 0 and self.t - self._t_last_print_timers >= period:
+            self._t_last_print_timers = self.t
+            self.sim.output.print_stdout(timers.make_str())
+
     def _compute_time_increment_CLF_uxuyuz(self):
         """Compute the time increment deltat with a CLF condition."""
 
@@ -162,16 +261,16 @@ class TimeSteppingBase(object):
         uy = self.sim.state('vy')
         uz = self.sim.state('vz')
 
-        max_ux = abs(ux).max()
-        max_uy = abs(uy).max()
-        max_uz = abs(uz).max()
+        max_ux, max_uy, max_uz = compute_max_abs(ux, uy, uz)
         tmp = (max_ux / self.sim.oper.deltax +
                max_uy / self.sim.oper.deltay +
                max_uz / self.sim.oper.deltaz)
 
         self._compute_time_increment_CLF_from_tmp(tmp)
 
-    def _compute_time_increment_CLF_from_tmp(self, tmp):
+    def _compute_time_increment_CLF_from_tmp(self, tmp, deltat_wave=None):
+        """Update deltat from the maximum of ``|u_i|/delta_i`` summed over
+        the components (one MPI reduction)."""
 
         if mpi.nb_proc > 1:
             tmp = mpi.comm.allreduce(tmp, op=mpi.MPI.MAX)
@@ -182,6 +281,12 @@ class TimeSteppingBase(object):
             deltat_CFL = self.deltat_max
 
         maybe_new_dt = min(deltat_CFL, self.deltat_max)
+        if deltat_wave is not None:
+            maybe_new_dt = min(maybe_new_dt, deltat_wave)
+        self._update_deltat(maybe_new_dt)
+
+    def _update_deltat(self, maybe_new_dt):
+        """Change deltat if the relative change is larger than 2 %."""
         normalize_diff = abs(self.deltat-maybe_new_dt) / maybe_new_dt
 
         if normalize_diff > 0.02:
@@ -193,8 +298,7 @@ class TimeSteppingBase(object):
         ux = self.sim.state('ux')
         uy = self.sim.state('uy')
 
-        max_ux = abs(ux).max()
-        max_uy = abs(uy).max()
+        max_ux, max_uy = compute_max_abs(ux, uy)
         tmp = (max_ux / self.sim.oper.deltax + max_uy / self.sim.oper.deltay)
 
         self._compute_time_increment_CLF_from_tmp(tmp)
@@ -213,29 +317,16 @@ class TimeSteppingBase(object):
             k_min = 2 * pi / Lh
             c = (f ** 2 / k_min ** 2 + c ** 2) ** 0.5
 
-        max_ux = abs(ux).max()
-        max_uy = abs(uy).max()
+        max_ux, max_uy = compute_max_abs(ux, uy)
         tmp = max_ux / self.sim.oper.deltax + max_uy / self.sim.oper.deltay
 
-        if mpi.nb_proc > 1:
-            tmp = mpi.comm.allreduce(tmp, op=mpi.MPI.MAX)
-
-        if tmp > 0:
-            deltat_CFL = self.CFL / tmp
-        else:
-            deltat_CFL = self.deltat_max
-
         deltat_wave = self.CFL * min(self.sim.oper.deltax, self.sim.oper.deltay) / c
-        maybe_new_dt = min(deltat_CFL, deltat_wave, self.deltat_max)
-        normalize_diff = abs(self.deltat-maybe_new_dt)/maybe_new_dt
-
-        if normalize_diff > 0.02:
-            self.deltat = maybe_new_dt
+        self._compute_time_increment_CLF_from_tmp(tmp, deltat_wave)
 
     def _compute_time_increment_CLF_ux(self):
         """Compute the time increment deltat with a CLF condition."""
         ux = self.sim.state('ux')
-        max_ux = abs(ux).max()
+        max_ux, = compute_max_abs(ux)
         tmp = max_ux / self.sim.oper.deltax
         self._compute_time_increment_CLF_from_tmp(tmp)
 
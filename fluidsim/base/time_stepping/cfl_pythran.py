@@ -0,0 +1,49 @@
+"""Reductions for the CFL condition
+==================================
+
+The maxima of the absolute values of the velocity components are computed
+in one pass over the (flattened) arrays, without the temporary arrays
+created by ``abs(ux).max()``. These functions are used only if this module
+is pythranized (the loops would be very slow in Python).
+
+"""
+
+
+# pythran export max_abs2(float64[], float64[])
+# pythran export max_abs2(float32[], float32[])
+
+
+def max_abs2(a0, a1):
+    """Return the maxima of the absolute values of 2 arrays."""
+    max0 = 0.
+    max1 = 0.
+    for i in range(a0.size):
+        value = abs(a0[i])
+        if value > max0:
+            max0 = value
+        value = abs(a1[i])
+        if value > max1:
+            max1 = value
+    return max0, max1
+
+
+# pythran export max_abs3(float64[], float64[], float64[])
+# pythran export max_abs3(float32[], float32[], float32[])
+
+
+def max_abs3(a0, a1, a2):
+    """Return the maxima of the absolute values of 3 arrays."""
+    max0 = 0.
+    max1 = 0.
+    max2 = 0.
+    for i in range(a0.size):
+        value = abs(a0[i])
+        if value > max0:
+            max0 = value
+        value = abs(a1[i])
+        if value > max1:
+            max1 = value
+        value = abs(a2[i])
+        if value > max2:
+            max2 = value
+    return max0, max1, max2
@@ -12,9 +12,180 @@ Provides:
 """
 
 from builtins import object
+from collections import OrderedDict
+from math import ceil, log
+
+try:
+    from inspect import signature as _signature
+except ImportError:
+    # Python 2
+    from inspect import getargspec as _getargspec
+
+    def _accepts_argument(func, name):
+        return name in _getargspec(func).args
+else:
+    def _accepts_argument(func, name):
+        return name in _signature(func).parameters
+
 import numpy as np
 
+from fluiddyn.util import mpi
+
+from fluidsim.base.setofvariables import SetOfVariables
+from fluidsim.util.threads import get_nb_threads, get_shared_thread_pool
+
 from .base import TimeSteppingBase
+from . import pseudo_spect_pythran
+
+
+def _check_type_kernels(type_kernels, dtype_real=np.float64):
+    if type_kernels not in ('numpy', 'pythran'):
+        raise ValueError(
+            'Unknown type_kernels: {}'.format(type_kernels))
+    if type_kernels == 'pythran' and dtype_real != np.float64:
+        raise ValueError(
+            'The pythran kernels are only compiled for double precision. '
+            'Use type_kernels = "numpy" with params.precision = "single".')
+    if (type_kernels == 'pythran' and
+            not hasattr(pseudo_spect_pythran, '__pythran__')):
+        raise ValueError(
+            'pseudo_spect_pythran has to be pythranized to use '
+            'type_kernels = "pythran". Install pythran and recompile.')
+
+
+# In-place numpy versions of the stage combinations of the RK schemes (same
+# signatures as the functions of pseudo_spect_pythran). `tendencies_fft` is
+# used as a work array. They can be run chunk by chunk in threads (see
+# fluidsim.util.threads.get_shared_thread_pool).
+
+def _rk2_step0_inplace(state_fft, tendencies_fft, diss2, dt, state_fft_n12):
+    # state_fft_n12 = (state_fft + dt/2*tendencies_fft_n)*diss2
+    np.multiply(tendencies_fft, dt/2, out=state_fft_n12)
+    state_fft_n12 += state_fft
+    state_fft_n12 *= diss2
+
+
+def _rk2_step1_inplace(state_fft, tendencies_fft, diss, diss2, dt):
+    # state_fft = state_fft*diss + dt*diss2*tendencies_fft_n12
+    state_fft *= diss
+    tendencies_fft *= diss2
+    tendencies_fft *= dt
+    state_fft += tendencies_fft
+
+
+def _rk4_step0_inplace(state_fft, tendencies_fft, diss, diss2, dt,
+                       state_fft_temp, state_fft_approx):
+    # based on approximation 1
+    # state_fft_temp = (state_fft + dt/6*tendencies_fft_0)*diss
+    np.multiply(tendencies_fft, dt/6, out=state_fft_temp)
+    state_fft_temp += state_fft
+    state_fft_temp *= diss
+    # state_fft_np12_approx1 = (state_fft + dt/2*tendencies_fft_0)*diss2
+    np.multiply(tendencies_fft, dt/2, out=state_fft_approx)
+    state_fft_approx += state_fft
+    state_fft_approx *= diss2
+
+
+def _rk4_step1_inplace(state_fft, tendencies_fft, diss2, dt,
+                       state_fft_temp, state_fft_approx):
+    # based on approximation 2
+    # state_fft_temp += dt/3*diss2*tendencies_fft_1
+    np.multiply(tendencies_fft, diss2, out=state_fft_approx)
+    state_fft_approx *= dt/3
+    state_fft_temp += state_fft_approx
+    # state_fft_np12_approx2 = state_fft*diss2 + dt/2*tendencies_fft_1
+    np.multiply(state_fft, diss2, out=state_fft_approx)
+    tendencies_fft *= dt/2
+    state_fft_approx += tendencies_fft
+
+
+def _rk4_step2_inplace(state_fft, tendencies_fft, diss, diss2, dt,
+                       state_fft_temp, state_fft_approx):
+    # based on approximation 3
+    # state_fft_temp += dt/3*diss2*tendencies_fft_2
+    tendencies_fft *= diss2
+    np.multiply(tendencies_fft, dt/3, out=state_fft_approx)
+    state_fft_temp += state_fft_approx
+    # state_fft_np1_approx = state_fft*diss + dt*diss2*tendencies_fft_2
+    np.multiply(state_fft, diss, out=state_fft_approx)
+    tendencies_fft *= dt
+    state_fft_approx += tendencies_fft
+
+
+def _rk4_step3_inplace(state_fft, tendencies_fft, dt, state_fft_temp):
+    # result using the 4 approximations
+    # state_fft = state_fft_temp + dt/6*tendencies_fft_3
+    tendencies_fft *= dt/6
+    np.add(state_fft_temp, tendencies_fft, out=state_fft)
+
+
+def step_RK4(state_fft, tendencies_nonlin, dt, diss, diss2):
+    """Compute the state after one step of the Runge-Kutta 4 scheme.
+
+    See :func:`TimeSteppingPseudoSpectral._time_step_RK4`. The function
+    `tendencies_nonlin` computes the tendencies of `state_fft` if it is
+    called without argument. `diss` and `diss2` are the exact coefficients
+    ``exp(-dt*freq_lin)`` and ``exp(-dt/2*freq_lin)``.
+
+    """
+    tendencies_fft_0 = tendencies_nonlin()
+
+    # based on approximation 1
+    state_fft_temp = (state_fft +
+                      dt/6*tendencies_fft_0)*diss
+    state_fft_np12_approx1 = (state_fft +
+                              dt/2*tendencies_fft_0)*diss2
+
+    del(tendencies_fft_0)
+    tendencies_fft_1 = tendencies_nonlin(state_fft_np12_approx1)
+    del(state_fft_np12_approx1)
+
+    # based on approximation 2
+    state_fft_temp += dt/3*diss2*tendencies_fft_1
+    state_fft_np12_approx2 = (state_fft*diss2 +
+                              dt/2*tendencies_fft_1)
+
+    del(tendencies_fft_1)
+    tendencies_fft_2 = tendencies_nonlin(state_fft_np12_approx2)
+    del(state_fft_np12_approx2)
+
+    # based on approximation 3
+    state_fft_temp += dt/3*diss2*tendencies_fft_2
+    state_fft_np1_approx = (state_fft*diss +
+                            dt*diss2*tendencies_fft_2)
+
+    del(tendencies_fft_2)
+    tendencies_fft_3 = tendencies_nonlin(state_fft_np1_approx)
+    del(state_fft_np1_approx)
+
+    # result using the 4 approximations
+    return state_fft_temp + dt/6*tendencies_fft_3
+
+
+# Coefficients (A, B, c) of the low-storage (2N) Runge-Kutta schemes
+_COEFS_RK_2N = {
+    # Williamson (1980), 3 stages, order 3
+    'RK3_2N': (
+        (0., -5./9, -153./128),
+        (1./3, 15./16, 8./15),
+        (0., 1./3, 3./4)),
+    # Carpenter & Kennedy (1994), 5 stages, order 4
+    'RK4_2N': (
+        (0.,
+         -567301805773./1357537059087,
+         -2404267990393./2016746695238,
+         -3550918686646./2091501179385,
+         -1275806237668./842570457699),
+        (1432997174477./9575080441755,
+         5161836677717./13612068292357,
+         1720146321549./2090206949498,
+         3134564353537./4481467310338,
+         2277821191437./14882151754819),
+        (0.,
+         1432997174477./9575080441755,
+         2526269341429./6820363962896,
+         2006345519317./3224310063776,
+         2802321613138./2924317926251))}
 
 
 class ExactLinearCoefs(object):
@@ -29,7 +200,25 @@ class ExactLinearCoefs(object):
         self.exact = np.empty_like(self.freq_lin)
         self.exact2 = np.empty_like(self.freq_lin)
 
-        if sim.params.time_stepping.USE_CFL:
+        params_ts = sim.params.time_stepping
+
+        self.USE_PYTHRAN = params_ts.type_kernels == 'pythran'
+        if self.USE_PYTHRAN:
+            self.compute = self.compute_pythran
+
+        self.USE_CACHE = params_ts.USE_CFL and params_ts.USE_DELTAT_LADDER
+        if self.USE_CACHE:
+            self.cache_size = params_ts.deltat_ladder_cache_size
+            if self.cache_size < 1:
+                raise ValueError(
+                    'params.time_stepping.deltat_ladder_cache_size has to '
+                    'be larger than 0.')
+            self._cache = OrderedDict()
+            self.nb_cache_hits = 0
+            self.nb_cache_misses = 0
+            self.compute = self.compute_cached
+
+        if params_ts.USE_CFL:
             self.get_updated_coefs = self.get_updated_coefs_CLF
             self.dt_old = 0.
         else:
@@ -43,6 +232,41 @@ class ExactLinearCoefs(object):
         self.exact2 = np.exp(-dt/2*f_lin)
         self.dt_old = dt
 
+    def compute_pythran(self, dt):
+        """Compute the exact coefficients in place with a fused kernel."""
+        pseudo_spect_pythran.compute_exact_coefs(
+            self.freq_lin, dt, self.exact, self.exact2)
+        self.dt_old = dt
+
+    def compute_cached(self, dt):
+        """Get the exact coefficients from a LRU cache or compute them.
+
+        The arrays of the least recently used time step are reused when the
+        cache is full.
+
+        """
+        try:
+            self.exact, self.exact2 = self._cache.pop(dt)
+        except KeyError:
+            self.nb_cache_misses += 1
+            if len(self._cache) >= self.cache_size:
+                self.exact, self.exact2 = self._cache.popitem(last=False)[1]
+            else:
+                self.exact = np.empty_like(self.freq_lin)
+                self.exact2 = np.empty_like(self.freq_lin)
+
+            if self.USE_PYTHRAN:
+                pseudo_spect_pythran.compute_exact_coefs(
+                    self.freq_lin, dt, self.exact, self.exact2)
+            else:
+                np.exp(-dt*self.freq_lin, out=self.exact)
+                np.exp(-dt/2*self.freq_lin, out=self.exact2)
+        else:
+            self.nb_cache_hits += 1
+
+        self._cache[dt] = (self.exact, self.exact2)
+        self.dt_old = dt
+
     def get_updated_coefs_CLF(self):
         """Get the exact coefficient updated if needed."""
         dt = self.time_stepping.deltat
@@ -66,12 +290,24 @@ class TimeSteppingPseudoSpectral(TimeSteppingBase):
         """
         TimeSteppingBase._complete_params_with_default(params)
         params.time_stepping.USE_CFL = True
+        params.time_stepping._set_attrib('USE_INPLACE', False)
+        params.time_stepping._set_attrib('type_kernels', 'numpy')
+        params.time_stepping._set_attrib('USE_DELTAT_LADDER', False)
+        params.time_stepping._set_attrib('deltat_ladder_ratio', 1.1)
+        params.time_stepping._set_attrib('deltat_ladder_cache_size', 4)
+        params.time_stepping._set_child(
+            'adaptive',
+            attribs={'rtol': 1e-6, 'atol': 1e-12, 'safety': 0.9,
+                     'fac_min': 0.2, 'fac_max': 5.})
 
     def __init__(self, sim):
+        _check_type_kernels(sim.params.time_stepping.type_kernels,
+                            sim.state.state_fft.real.dtype)
         super(TimeSteppingPseudoSpectral, self).__init__(sim)
 
         self._init_freq_lin()
         self._init_compute_time_step()
+        self._init_deltat_ladder()
         self._init_exact_linear_coef()
         self._init_time_scheme()
 
@@ -87,6 +323,14 @@ class TimeSteppingPseudoSpectral(TimeSteppingBase):
         else:
             self.freq_lin = freq_dissip
 
+        # same precision as the state (see params.precision)
+        state_fft = self.sim.state.state_fft
+        if np.iscomplexobj(self.freq_lin):
+            dtype = state_fft.dtype
+        else:
+            dtype = state_fft.real.dtype
+        self.freq_lin = self.freq_lin.astype(dtype, copy=False)
+
     def _compute_freq_complex(self):
         state_fft = self.sim.state.state_fft
         freq_complex = np.empty_like(state_fft)
@@ -94,9 +338,169 @@ class TimeSteppingPseudoSpectral(TimeSteppingBase):
             freq_complex[ik] = self.sim.compute_freq_complex(key)
         return freq_complex
 
+    def _init_deltat_ladder(self):
+        """Use the time steps ``deltat_max / ratio**k`` (k integer).
+
+        With the CFL condition and `params.time_stepping.USE_DELTAT_LADDER`,
+        the time step is rounded down to one of these values so that the
+        exact linear coefficients can be cached.
+
+        """
+        params_ts = self.params.time_stepping
+        if not (params_ts.USE_CFL and params_ts.USE_DELTAT_LADDER):
+            return
+
+        if params_ts.deltat_ladder_ratio <= 1:
+            raise ValueError(
+                'params.time_stepping.deltat_ladder_ratio has to be '
+                'larger than 1.')
+
+        self._deltat_ladder_ratio = params_ts.deltat_ladder_ratio
+        self._log_deltat_ladder_ratio = log(self._deltat_ladder_ratio)
+        self._update_deltat = self._update_deltat_ladder
+        self.deltat = self._get_deltat_ladder(self.deltat)
+
+    def _get_deltat_ladder(self, deltat):
+        """Return the largest time step of the ladder not larger than deltat.
+        """
+        if deltat >= self.deltat_max:
+            return self.deltat_max
+        index = int(ceil(
+            log(self.deltat_max / deltat) / self._log_deltat_ladder_ratio -
+            1e-10))
+        return self.deltat_max / self._deltat_ladder_ratio**index
+
+    def _update_deltat_ladder(self, maybe_new_dt):
+        """Change deltat to a value of the ladder."""
+        self.deltat = self._get_deltat_ladder(maybe_new_dt)
+
     def _init_exact_linear_coef(self):
         self.exact_linear_coefs = ExactLinearCoefs(self)
 
+    def _init_time_scheme(self):
+
+        params_ts = self.params.time_stepping
+
+        if params_ts.type_time_scheme == 'RK23':
+            self._init_adaptive_time_scheme()
+            return
+
+        if params_ts.type_time_scheme in _COEFS_RK_2N:
+            self._init_low_storage_time_scheme()
+            return
+
+        if params_ts.type_kernels == 'pythran':
+            suffix = '_pythran'
+        elif params_ts.USE_INPLACE:
+            suffix = '_inplace'
+        else:
+            super(TimeSteppingPseudoSpectral, self)._init_time_scheme()
+            return
+
+        if params_ts.type_time_scheme == 'RK2':
+            self._time_step_RK = getattr(self, '_time_step_RK2' + suffix)
+            nb_stage_arrays = 2
+        elif params_ts.type_time_scheme == 'RK4':
+            self._time_step_RK = getattr(self, '_time_step_RK4' + suffix)
+            nb_stage_arrays = 3
+        else:
+            raise ValueError('Problem name time_scheme')
+
+        self._init_stage_arrays(nb_stage_arrays)
+
+        nb_threads = get_nb_threads(self.params)
+        if suffix == '_inplace' and nb_threads > 1:
+            self._run_stage_combination = get_shared_thread_pool(
+                nb_threads).run
+
+    @staticmethod
+    def _run_stage_combination(func, *args):
+        """Compute a stage combination (in one thread)."""
+        func(*args)
+
+    def _init_adaptive_time_scheme(self):
+        """Initialize the adaptive scheme (`type_time_scheme = 'RK23'`).
+
+        The time step is controlled by the estimation of the local error. If
+        `params.time_stepping.USE_CFL` is true, it is also limited by the
+        CFL condition.
+
+        """
+        self._time_step_RK = self._time_step_RK23
+        self._init_stage_arrays(5)
+        self._exact_coefs_RK23 = [
+            np.empty_like(self.freq_lin) for i in range(4)]
+
+        self._update_deltat = self._update_deltat_adaptive
+        self._deltat_CFL = self.deltat_max
+        self._deltat_next = self.deltat
+        self.nb_steps_rejected = 0
+        # index of the time step for which the first tendencies are the
+        # last tendencies of the previous step (FSAL)
+        self._it_fsal = None
+
+    def _init_low_storage_time_scheme(self):
+        """Initialize a low-storage scheme ('RK3_2N' or 'RK4_2N').
+
+        Only 2 arrays of the size of the state and one array of the size of
+        `freq_lin` per distinct value of :math:`c_{i+1} - c_i` are
+        allocated.
+
+        """
+        A, B, c = _COEFS_RK_2N[self.params.time_stepping.type_time_scheme]
+        delta_c = [c_next - c_stage
+                   for c_stage, c_next in zip(c, c[1:] + (1.,))]
+        self._coefs_RK_2N = list(zip(A, B, delta_c))
+
+        self._time_step_RK = self._time_step_RK_2N
+        self._init_stage_arrays(2)
+        self._exact_coefs_RK_2N = {
+            value: np.empty_like(self.freq_lin) for value in set(delta_c)}
+        self._deltat_exact_coefs_RK_2N = None
+
+    def _get_exact_coefs_RK_2N(self, dt):
+        """Return the exponentials of the low-storage stages.
+
+        They are recomputed only when the time step changes, i.e. once for a
+        constant time step.
+
+        """
+        exacts = self._exact_coefs_RK_2N
+        if dt != self._deltat_exact_coefs_RK_2N:
+            for delta_c, exact in exacts.items():
+                np.multiply(self.freq_lin, -delta_c*dt, out=exact)
+                np.exp(exact, out=exact)
+            self._deltat_exact_coefs_RK_2N = dt
+        return exacts
+
+    def _update_deltat_adaptive(self, maybe_new_dt):
+        """Store the time step given by the CFL condition."""
+        self._deltat_CFL = maybe_new_dt
+
+    def _init_stage_arrays(self, nb_arrays):
+        """Allocate the arrays reused at each step by the in-place schemes.
+
+        If the function `sim.tendencies_nonlin` does not accept the keyword
+        argument `out`, the tendencies are computed as usual and copied in
+        the preallocated array.
+
+        """
+        state_fft = self.sim.state.state_fft
+        self.nb_stage_arrays = nb_arrays
+        self._stage_arrays = [
+            SetOfVariables(like=state_fft)
+            for i in range(nb_arrays)]
+
+        tendencies_nonlin = self.sim.tendencies_nonlin
+        if _accepts_argument(tendencies_nonlin, 'out'):
+            self._tendencies_nonlin_inplace = tendencies_nonlin
+        else:
+            def tendencies_nonlin_inplace(state_fft=None, out=None):
+                out[:] = tendencies_nonlin(state_fft)
+                return out
+
+            self._tendencies_nonlin_inplace = tendencies_nonlin_inplace
+
     def one_time_step_computation(self):
         """One time step"""
         # WARNING: if the function _time_step_RK comes from an extension, its
@@ -259,41 +663,313 @@ class TimeSteppingPseudoSpectral(TimeSteppingBase):
 
         """
 
+        diss, diss2 = self.exact_linear_coefs.get_updated_coefs()
+        self.sim.state.state_fft = step_RK4(
+            self.sim.state.state_fft, self.sim.tendencies_nonlin,
+            self.deltat, diss, diss2)
+
+    def _time_step_RK2_inplace(self):
+        """Advance in time with the Runge-Kutta 2 method (in place).
+
+        Same scheme as :func:`_time_step_RK2` but the intermediate results
+        are stored in arrays allocated once at the initialization. With
+        `params.oper.nb_threads > 1`, the stage combinations are computed
+        in threads.
+
+        """
         dt = self.deltat
         diss, diss2 = self.exact_linear_coefs.get_updated_coefs()
 
-        tendencies_nonlin = self.sim.tendencies_nonlin
+        tendencies_nonlin = self._tendencies_nonlin_inplace
+        run = self._run_stage_combination
         state_fft = self.sim.state.state_fft
+        tendencies_fft, state_fft_n12 = self._stage_arrays
 
-        tendencies_fft_0 = tendencies_nonlin()
+        tendencies_nonlin(out=tendencies_fft)
+        run(_rk2_step0_inplace,
+            state_fft, tendencies_fft, diss2, dt, state_fft_n12)
 
-        # based on approximation 1
-        state_fft_temp = (state_fft +
-                          dt/6*tendencies_fft_0)*diss
-        state_fft_np12_approx1 = (state_fft +
-                                  dt/2*tendencies_fft_0)*diss2
+        tendencies_nonlin(state_fft_n12, out=tendencies_fft)
+        run(_rk2_step1_inplace, state_fft, tendencies_fft, diss, diss2, dt)
 
-        del(tendencies_fft_0)
-        tendencies_fft_1 = tendencies_nonlin(state_fft_np12_approx1)
-        del(state_fft_np12_approx1)
+    def _time_step_RK4_inplace(self):
+        """Advance in time with the Runge-Kutta 4 method (in place).
 
-        # based on approximation 2
-        state_fft_temp += dt/3*diss2*tendencies_fft_1
-        state_fft_np12_approx2 = (state_fft*diss2 +
-                                  dt/2*tendencies_fft_1)
+        Same scheme as :func:`_time_step_RK4` but the intermediate results
+        are stored in 3 arrays allocated once at the initialization. With
+        `params.oper.nb_threads > 1`, the stage combinations are computed
+        in threads.
+
+        """
+        dt = self.deltat
+        diss, diss2 = self.exact_linear_coefs.get_updated_coefs()
+
+        tendencies_nonlin = self._tendencies_nonlin_inplace
+        run = self._run_stage_combination
+        state_fft = self.sim.state.state_fft
+        tendencies_fft, state_fft_temp, state_fft_approx = self._stage_arrays
 
-        del(tendencies_fft_1)
-        tendencies_fft_2 = tendencies_nonlin(state_fft_np12_approx2)
-        del(state_fft_np12_approx2)
+        tendencies_nonlin(out=tendencies_fft)
+        run(_rk4_step0_inplace, state_fft, tendencies_fft, diss, diss2, dt,
+            state_fft_temp, state_fft_approx)
 
-        # based on approximation 3
-        state_fft_temp += dt/3*diss2*tendencies_fft_2
-        state_fft_np1_approx = (state_fft*diss +
-                                dt*diss2*tendencies_fft_2)
+        tendencies_nonlin(state_fft_approx, out=tendencies_fft)
+        run(_rk4_step1_inplace, state_fft, tendencies_fft, diss2, dt,
+            state_fft_temp, state_fft_approx)
 
-        del(tendencies_fft_2)
-        tendencies_fft_3 = tendencies_nonlin(state_fft_np1_approx)
-        del(state_fft_np1_approx)
+        tendencies_nonlin(state_fft_approx, out=tendencies_fft)
+        run(_rk4_step2_inplace, state_fft, tendencies_fft, diss, diss2, dt,
+            state_fft_temp, state_fft_approx)
 
-        # result using the 4 approximations
-        self.sim.state.state_fft = state_fft_temp + dt/6*tendencies_fft_3
+        tendencies_nonlin(state_fft_approx, out=tendencies_fft)
+        run(_rk4_step3_inplace, state_fft, tendencies_fft, dt,
+            state_fft_temp)
+
+    def _time_step_RK2_pythran(self):
+        """Advance in time with the Runge-Kutta 2 method (fused kernels).
+
+        Same scheme as :func:`_time_step_RK2_inplace` but each stage
+        combination is done in one pass by a function of the module
+        :mod:`fluidsim.base.time_stepping.pseudo_spect_pythran`.
+
+        """
+        dt = self.deltat
+        diss, diss2 = self.exact_linear_coefs.get_updated_coefs()
+
+        tendencies_nonlin = self._tendencies_nonlin_inplace
+        state_fft = self.sim.state.state_fft
+        tendencies_fft, state_fft_n12 = self._stage_arrays
+
+        tendencies_nonlin(out=tendencies_fft)
+        pseudo_spect_pythran.rk2_step0(
+            state_fft, tendencies_fft, diss2, dt, state_fft_n12)
+
+        tendencies_nonlin(state_fft_n12, out=tendencies_fft)
+        pseudo_spect_pythran.rk2_step1(
+            state_fft, tendencies_fft, diss, diss2, dt)
+
+    def _time_step_RK4_pythran(self):
+        """Advance in time with the Runge-Kutta 4 method (fused kernels).
+
+        Same scheme as :func:`_time_step_RK4_inplace` but each stage
+        combination is done in one pass by a function of the module
+        :mod:`fluidsim.base.time_stepping.pseudo_spect_pythran`.
+
+        """
+        dt = self.deltat
+        diss, diss2 = self.exact_linear_coefs.get_updated_coefs()
+
+        tendencies_nonlin = self._tendencies_nonlin_inplace
+        state_fft = self.sim.state.state_fft
+        tendencies_fft, state_fft_temp, state_fft_approx = self._stage_arrays
+
+        tendencies_nonlin(out=tendencies_fft)
+        pseudo_spect_pythran.rk4_step0(
+            state_fft, tendencies_fft, diss, diss2, dt,
+            state_fft_temp, state_fft_approx)
+
+        tendencies_nonlin(state_fft_approx, out=tendencies_fft)
+        pseudo_spect_pythran.rk4_step1(
+            state_fft, tendencies_fft, diss2, dt,
+            state_fft_temp, state_fft_approx)
+
+        tendencies_nonlin(state_fft_approx, out=tendencies_fft)
+        pseudo_spect_pythran.rk4_step2(
+            state_fft, tendencies_fft, diss, diss2, dt,
+            state_fft_temp, state_fft_approx)
+
+        tendencies_nonlin(state_fft_approx, out=tendencies_fft)
+        pseudo_spect_pythran.rk4_step3(
+            state_fft, tendencies_fft, dt, state_fft_temp)
+
+    def _time_step_RK23(self):
+        r"""Advance in time with an adaptive Runge-Kutta 3(2) method.
+
+        Notes
+        -----
+
+        We use the Bogacki-Shampine pair in integrating factor form
+        (Lawson). With the notation of :func:`_time_step_RK2` and
+        :math:`E(\tau) = e^{\sigma \tau}`, the stages are
+
+        .. math::
+
+           S_1 = S_0,
+
+           S_2 = E(dt/2) (S_0 + \frac{dt}{2} N_1),
+
+           S_3 = E(3dt/4) S_0 + \frac{3 dt}{4} E(dt/4) N_2,
+
+           S_4 = E(dt) S_0 + dt \left[\frac{2}{9} E(dt) N_1
+           + \frac{1}{3} E(dt/2) N_2 + \frac{4}{9} E(dt/4) N_3 \right],
+
+        where :math:`N_i = N(S_i)`. :math:`S_4` is the solution (order 3).
+        The difference with the solution of order 2 is
+
+        .. math::
+
+           dt \left[ -\frac{5}{72} E(dt) N_1 + \frac{1}{12} E(dt/2) N_2
+           + \frac{1}{9} E(dt/4) N_3 - \frac{1}{8} N_4 \right].
+
+        The step is rejected and computed again with a smaller time step if
+        the maximum of this error is larger than
+        ``atol + rtol*max(abs(S))`` (parameters in
+        `params.time_stepping.adaptive`). The next time step is computed
+        from the error with the usual formula
+        :math:`dt_{new} = dt\ \min(f_{max}, \max(f_{min}, s\ err^{-1/3}))`.
+
+        Only one exponential is computed per trial since
+        :math:`E(k dt/4) = E(dt/4)^k`. :math:`N_1` does not depend on
+        :math:`dt` and is computed only once per step (not for each trial).
+        Without forcing, the scheme is "first same as last" (FSAL):
+        :math:`N_4` of an accepted step is :math:`N_1` of the next step, so
+        that an accepted step costs 3 evaluations of the tendencies. The
+        state :math:`S_4` is dealiased before the evaluation of :math:`N_4`
+        for this purpose. If the state is modified between two time steps
+        without changing `it`, `_it_fsal` has to be set to None.
+
+        """
+        params_adapt = self.params.time_stepping.adaptive
+        exponent = -1./3
+
+        tendencies_fft_1 = self._stage_arrays[4]
+        if self.params.FORCING or self._it_fsal != self.it:
+            self._tendencies_nonlin_inplace(out=tendencies_fft_1)
+
+        dt = min(self._deltat_next, self._deltat_CFL, self.deltat_max)
+        while True:
+            err = self._compute_trial_RK23(dt)
+            if np.isnan(err):
+                raise ValueError(
+                    'nan at it = {0}, t = {1:.4f}'.format(self.it, self.t))
+            if err <= 1.:
+                break
+            self.nb_steps_rejected += 1
+            dt *= max(params_adapt.fac_min,
+                      params_adapt.safety*err**exponent)
+
+        self.deltat = dt
+        state_fft_new = self._stage_arrays[2]
+        self.sim.state.state_fft[:] = state_fft_new
+
+        # N_4 (in the first stage array) is N_1 of the next step
+        stage_arrays = self._stage_arrays
+        stage_arrays[0], stage_arrays[4] = stage_arrays[4], stage_arrays[0]
+        self._it_fsal = self.it + 1
+
+        if err == 0:
+            factor = params_adapt.fac_max
+        else:
+            factor = min(params_adapt.fac_max,
+                         max(params_adapt.fac_min,
+                             params_adapt.safety*err**exponent))
+        self._deltat_next = dt*factor
+
+    def _compute_trial_RK23(self, dt):
+        """Compute a trial step of the RK23 scheme.
+
+        The tendencies of the initial state have to be in the fifth stage
+        array. The new state is stored in the third stage array and its
+        tendencies in the first one.
+
+        Returns
+        -------
+
+        err : float
+
+          The estimated error normalized by the tolerance (the step is
+          accepted if err <= 1).
+
+        """
+        tendencies_nonlin = self._tendencies_nonlin_inplace
+        state_fft = self.sim.state.state_fft
+        (tendencies_fft, state_fft_stage,
+         state_fft_new, error_fft, tendencies_fft_1) = self._stage_arrays
+
+        # exact_k = E(k*dt/4)
+        exact1, exact2, exact3, exact4 = self._exact_coefs_RK23
+        np.exp(-dt/4*self.freq_lin, out=exact1)
+        np.multiply(exact1, exact1, out=exact2)
+        np.multiply(exact2, exact1, out=exact3)
+        np.multiply(exact2, exact2, out=exact4)
+
+        state_fft_stage[:] = exact2*(state_fft + dt/2*tendencies_fft_1)
+        state_fft_new[:] = exact4*(state_fft + 2*dt/9*tendencies_fft_1)
+        error_fft[:] = -5*dt/72*exact4*tendencies_fft_1
+
+        tendencies_nonlin(state_fft_stage, out=tendencies_fft)
+
+        state_fft_stage[:] = exact3*state_fft + 3*dt/4*exact1*tendencies_fft
+        state_fft_new += dt/3*exact2*tendencies_fft
+        error_fft += dt/12*exact2*tendencies_fft
+
+        tendencies_nonlin(state_fft_stage, out=tendencies_fft)
+
+        state_fft_new += 4*dt/9*exact1*tendencies_fft
+        error_fft += dt/9*exact1*tendencies_fft
+
+        self.sim.oper.dealiasing(state_fft_new)
+        tendencies_nonlin(state_fft_new, out=tendencies_fft)
+
+        error_fft -= dt/8*tendencies_fft
+
+        max_error = abs(error_fft).max()
+        max_state = max(abs(state_fft).max(), abs(state_fft_new).max())
+        if mpi.nb_proc > 1:
+            max_error = mpi.comm.allreduce(max_error, op=mpi.MPI.MAX)
+            max_state = mpi.comm.allreduce(max_state, op=mpi.MPI.MAX)
+
+        params_adapt = self.params.time_stepping.adaptive
+        return max_error / (params_adapt.atol + params_adapt.rtol*max_state)
+
+    def _time_step_RK_2N(self):
+        r"""Advance in time with a low-storage (2N) Runge-Kutta method.
+
+        Notes
+        -----
+
+        We use the Williamson formulation of the schemes with the
+        coefficients :math:`A_i, B_i, c_i` ('RK3_2N': Williamson, 1980;
+        'RK4_2N': Carpenter & Kennedy, 1994). The linear term is treated
+        exactly with an integrating factor. Expressed at the time of the
+        stage :math:`i`, the stages of the scheme are
+
+        .. math::
+
+           dS_i = A_i E((c_i - c_{i-1}) dt) dS_{i-1} + dt N(S_i),
+
+           S_{i+1} = E((c_{i+1} - c_i) dt) (S_i + B_i dS_i),
+
+        with :math:`E(\tau) = e^{\sigma \tau}` and :math:`c_{s+1} = 1`.
+        The intermediate states are stored in `sim.state.state_fft` so that
+        only 2 other arrays of the size of the state are needed (the
+        increment :math:`dS` and the tendencies). The exponentials are
+        computed once per distinct value of :math:`c_{i+1} - c_i` and are
+        reused as long as the time step does not change.
+
+        """
+        dt = self.deltat
+
+        tendencies_nonlin = self._tendencies_nonlin_inplace
+        state_fft = self.sim.state.state_fft
+        tendencies_fft, delta_state_fft = self._stage_arrays
+        exacts = self._get_exact_coefs_RK_2N(dt)
+        nb_stages = len(self._coefs_RK_2N)
+
+        for istage, (A, B, delta_c) in enumerate(self._coefs_RK_2N):
+            if istage == 0:
+                tendencies_nonlin(out=tendencies_fft)
+                np.multiply(tendencies_fft, dt, out=delta_state_fft)
+            else:
+                tendencies_nonlin(state_fft, out=tendencies_fft)
+                delta_state_fft *= A
+                tendencies_fft *= dt
+                delta_state_fft += tendencies_fft
+
+            # state_fft = E(delta_c*dt)*(state_fft + B*delta_state_fft)
+            np.multiply(delta_state_fft, B, out=tendencies_fft)
+            state_fft += tendencies_fft
+            exact = exacts[delta_c]
+            state_fft *= exact
+            if istage < nb_stages - 1:
+                delta_state_fft *= exact
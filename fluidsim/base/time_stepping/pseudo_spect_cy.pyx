@@ -120,16 +120,21 @@ class TimeSteppingPseudoSpectral(TimeSteppingPseudoSpectralPurePython):
 
         params_ts = self.params.time_stepping
 
-        if params_ts.type_time_scheme not in ['RK2', 'RK4']:
-            raise ValueError('Problem name time_scheme')
-
         dtype = self.freq_lin.dtype
+
+        if (params_ts.USE_INPLACE or params_ts.type_kernels == 'pythran' or
+                params_ts.type_time_scheme not in ['RK2', 'RK4'] or
+                dtype not in (np.float64, np.complex128)):
+            # the in-place and the other schemes are implemented with Numpy
+            # or Pythran, as the single precision (the Cython functions are
+            # only compiled for double precision)
+            TimeSteppingPseudoSpectralPurePython._init_time_scheme(self)
+            return
+
         if dtype == np.float64:
             str_type = 'float'
-        elif dtype == np.complex128:
-            str_type = 'complex'
         else:
-            raise NotImplementedError('dtype of freq_lin:' + repr(dtype))
+            str_type = 'complex'
 
         name_function = (
             '_time_step_' + params_ts.type_time_scheme +
@@ -138,9 +143,10 @@ class TimeSteppingPseudoSpectral(TimeSteppingPseudoSpectralPurePython):
             str_type)
 
         if not hasattr(self, name_function):
-            raise NotImplementedError(
-                'The function ' + name_function +
-                ' is not implemented.')
+            # no Cython function for this case (for example RK2 with a real
+            # freq_lin), the Numpy implementation is used
+            TimeSteppingPseudoSpectralPurePython._init_time_scheme(self)
+            return
 
         exec('self._time_step_RK = self.' + name_function,
              globals(), locals())
@@ -0,0 +1,142 @@
+"""Fused kernels for the pseudo-spectral time stepping
+======================================================
+
+The stage combinations of the in-place Runge-Kutta schemes and the
+computation of the exact linear coefficients are written as numpy
+expressions assigned into preallocated arrays. When this module is
+pythranized, each function is compiled in one loop over the arrays without
+temporary arrays.
+
+The arguments `diss` and `diss2` are broadcasted over the first axis
+(variables) of the state.
+
+"""
+
+import numpy as np
+
+
+# pythran export rk2_step0(
+#     complex128[][][], complex128[][][], float64[][], float, complex128[][][])
+# pythran export rk2_step0(
+#     complex128[][][], complex128[][][], float64[][][], float,
+#     complex128[][][])
+# pythran export rk2_step0(
+#     complex128[][][], complex128[][][], complex128[][][], float,
+#     complex128[][][])
+# pythran export rk2_step0(
+#     complex128[][][][], complex128[][][][], float64[][][], float,
+#     complex128[][][][])
+
+
+def rk2_step0(state_fft, tendencies_fft, diss2, dt, state_fft_n12):
+    """state_fft_n12 = (state_fft + dt/2*tendencies_fft)*diss2"""
+    state_fft_n12[:] = (state_fft + dt/2*tendencies_fft)*diss2
+
+
+# pythran export rk2_step1(
+#     complex128[][][], complex128[][][], float64[][], float64[][], float)
+# pythran export rk2_step1(
+#     complex128[][][], complex128[][][], float64[][][], float64[][][], float)
+# pythran export rk2_step1(
+#     complex128[][][], complex128[][][], complex128[][][], complex128[][][],
+#     float)
+# pythran export rk2_step1(
+#     complex128[][][][], complex128[][][][], float64[][][], float64[][][],
+#     float)
+
+
+def rk2_step1(state_fft, tendencies_fft, diss, diss2, dt):
+    """state_fft = state_fft*diss + dt*diss2*tendencies_fft"""
+    state_fft[:] = state_fft*diss + dt*diss2*tendencies_fft
+
+
+# pythran export rk4_step0(
+#     complex128[][][], complex128[][][], float64[][], float64[][], float,
+#     complex128[][][], complex128[][][])
+# pythran export rk4_step0(
+#     complex128[][][], complex128[][][], float64[][][], float64[][][], float,
+#     complex128[][][], complex128[][][])
+# pythran export rk4_step0(
+#     complex128[][][], complex128[][][], complex128[][][], complex128[][][],
+#     float, complex128[][][], complex128[][][])
+# pythran export rk4_step0(
+#     complex128[][][][], complex128[][][][], float64[][][], float64[][][],
+#     float, complex128[][][][], complex128[][][][])
+
+
+def rk4_step0(state_fft, tendencies_fft, diss, diss2, dt,
+              state_fft_temp, state_fft_approx):
+    """First stage combination of the RK4 scheme (approximation 1)."""
+    state_fft_temp[:] = (state_fft + dt/6*tendencies_fft)*diss
+    state_fft_approx[:] = (state_fft + dt/2*tendencies_fft)*diss2
+
+
+# pythran export rk4_step1(
+#     complex128[][][], complex128[][][], float64[][], float, complex128[][][],
+#     complex128[][][])
+# pythran export rk4_step1(
+#     complex128[][][], complex128[][][], float64[][][], float,
+#     complex128[][][], complex128[][][])
+# pythran export rk4_step1(
+#     complex128[][][], complex128[][][], complex128[][][], float,
+#     complex128[][][], complex128[][][])
+# pythran export rk4_step1(
+#     complex128[][][][], complex128[][][][], float64[][][], float,
+#     complex128[][][][], complex128[][][][])
+
+
+def rk4_step1(state_fft, tendencies_fft, diss2, dt,
+              state_fft_temp, state_fft_approx):
+    """Second stage combination of the RK4 scheme (approximation 2)."""
+    state_fft_temp += dt/3*diss2*tendencies_fft
+    state_fft_approx[:] = state_fft*diss2 + dt/2*tendencies_fft
+
+
+# pythran export rk4_step2(
+#     complex128[][][], complex128[][][], float64[][], float64[][], float,
+#     complex128[][][], complex128[][][])
+# pythran export rk4_step2(
+#     complex128[][][], complex128[][][], float64[][][], float64[][][], float,
+#     complex128[][][], complex128[][][])
+# pythran export rk4_step2(
+#     complex128[][][], complex128[][][], complex128[][][], complex128[][][],
+#     float, complex128[][][], complex128[][][])
+# pythran export rk4_step2(
+#     complex128[][][][], complex128[][][][], float64[][][], float64[][][],
+#     float, complex128[][][][], complex128[][][][])
+
+
+def rk4_step2(state_fft, tendencies_fft, diss, diss2, dt,
+              state_fft_temp, state_fft_approx):
+    """Third stage combination of the RK4 scheme (approximation 3)."""
+    state_fft_temp += dt/3*diss2*tendencies_fft
+    state_fft_approx[:] = state_fft*diss + dt*diss2*tendencies_fft
+
+
+# pythran export rk4_step3(
+#     complex128[][][], complex128[][][], float, complex128[][][])
+# pythran export rk4_step3(
+#     complex128[][][][], complex128[][][][], float, complex128[][][][])
+
+
+def rk4_step3(state_fft, tendencies_fft, dt, state_fft_temp):
+    """Final combination of the RK4 scheme (result in state_fft)."""
+    state_fft[:] = state_fft_temp + dt/6*tendencies_fft
+
+
+# pythran export compute_exact_coefs(
+#     float64[][], float, float64[][], float64[][])
+# pythran export compute_exact_coefs(
+#     float64[][][], float, float64[][][], float64[][][])
+# pythran export compute_exact_coefs(
+#     complex128[][][], float, complex128[][][], complex128[][][])
+
+
+def compute_exact_coefs(freq_lin, dt, exact, exact2):
+    """exact = exp(-dt*freq_lin) and exact2 = exp(-dt/2*freq_lin)
+
+    Only one exponential is computed per element since exact = exact2**2.
+
+    """
+    exact2[:] = np.exp(-dt/2*freq_lin)
+    exact[:] = exact2*exact2
@@ -0,0 +1,25 @@
+"""Benchmarks (:mod:`fluidsim.bench`)
+====================================
+
+Time the main functions of the solvers (computation of the nonlinear
+tendencies, time steps, construction of the operators, dealiasing, specific
+outputs and saving of the state) over a matrix of resolutions. The results
+can be saved in a JSON file and compared with the results of a reference
+run, for example with::
+
+  fluidsim-bench -s ns2d sw1l -n 128 256 -o bench_new.json
+  fluidsim-bench --compare bench_ref.json bench_new.json
+
+or ``python -m fluidsim.bench`` if the command ``fluidsim-bench`` is not
+installed.
+
+.. autosummary::
+   :toctree:
+
+   bench
+
+"""
+
+from .bench import bench_solver, run_benchmarks, compare_results, main
+
+__all__ = ['bench_solver', 'run_benchmarks', 'compare_results', 'main']
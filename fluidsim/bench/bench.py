@@ -0,0 +1,277 @@
+"""Benchmarks of the solvers (:mod:`fluidsim.bench.bench`)
+=========================================================
+
+.. currentmodule:: fluidsim.bench.bench
+
+Provides:
+
+.. autofunction:: bench_solver
+
+.. autofunction:: run_benchmarks
+
+.. autofunction:: compare_results
+
+.. autofunction:: main
+
+"""
+
+from __future__ import print_function, division
+
+import argparse
+import datetime
+import gc
+import json
+import shutil
+import socket
+import sys
+from importlib import import_module
+from timeit import default_timer
+
+from fluiddyn.util import mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim import __version__
+from fluidsim.base.setofvariables import SetOfVariables
+
+keys_solvers_default = ['ns2d', 'sw1l', 'plate2d', 'ns3d']
+resolutions_2d_default = [128, 256, 512]
+resolutions_3d_default = [32, 64]
+
+# solvers without the initialization 'noise'
+types_init_fields = {'ns3d': 'dipole'}
+
+
+def _time(func, number=10, repeat=3):
+    """Return the best (over `repeat`) mean duration of `number` calls."""
+    durations = []
+    for i in range(repeat):
+        gc.collect()
+        t_start = default_timer()
+        for j in range(number):
+            func()
+        durations.append((default_timer() - t_start) / number)
+    return min(durations)
+
+
+def import_simul_class(key_solver):
+    """Import the class Simul of a solver (`key_solver` as 'ns2d' or
+    'sw1l.onlywaves')."""
+    return import_module('fluidsim.solvers.{}.solver'.format(
+        key_solver)).Simul
+
+
+def create_sim(key_solver, n):
+    """Create a simulation for the benchmarks.
+
+    The files of the specific outputs are created (but no output is saved
+    during the time steps).
+
+    """
+    Simul = import_simul_class(key_solver)
+    params = Simul.create_default_params()
+
+    params.short_name_type_run = 'bench'
+    params.oper.nx = params.oper.ny = n
+    if hasattr(params.oper, 'nz'):
+        params.oper.nz = n
+
+    params.init_fields.type = types_init_fields.get(key_solver, 'noise')
+
+    params.time_stepping.USE_CFL = False
+    params.time_stepping.deltat0 = 1e-4
+
+    params.output.ONLINE_PLOT_OK = False
+    params.output.periods_print.print_stdout = 0
+    periods = params.output.periods_save
+    for key in periods._get_key_attribs():
+        periods[key] = 1e10
+
+    with stdout_redirected():
+        sim = Simul(params)
+        sim.output.init_with_initialized_state()
+    return sim
+
+
+def bench_solver(key_solver, n, number=10):
+    """Time the main functions of a solver at one resolution.
+
+    Returns
+    -------
+
+    results : list of dict
+
+      One dictionary per measured function (keys 'solver', 'n', 'name' and
+      'time' (in s) or 'error').
+
+    """
+    results = []
+
+    def add(name, func, number=number, repeat=3):
+        result = {'solver': key_solver, 'n': n, 'name': name}
+        try:
+            with stdout_redirected():
+                result['time'] = _time(func, number, repeat)
+        except Exception as error:
+            result['error'] = repr(error)
+        results.append(result)
+
+    sim = create_sim(key_solver, n)
+    oper = sim.oper
+    state = sim.state
+    output = sim.output
+
+    Operators = type(oper)
+    add('operators_construction', lambda: Operators(params=sim.params),
+        number=1)
+
+    add('tendencies_nonlin', sim.tendencies_nonlin)
+    add('time_step', sim.time_stepping.one_time_step_computation)
+
+    if hasattr(state, 'state_fft'):
+        state_fft = SetOfVariables(like=state.state_fft)
+        state_fft[:] = state.state_fft
+        add('dealiasing', lambda: oper.dealiasing(state_fft))
+
+    for key in sorted(sim.params.output.periods_save._get_key_attribs()):
+        specific_output = getattr(output, key, None)
+        if hasattr(specific_output, 'compute'):
+            add('output.{}.compute'.format(key), specific_output.compute)
+
+            if not hasattr(specific_output, 'nb_saved_times'):
+                continue
+            # with period_save = 0, the values are computed and saved in the
+            # files of the output (one or more) at each call (online_save can
+            # be collective so it is called by all processes)
+            specific_output.period_save = 0.
+            add('output.{}.online_save'.format(key),
+                specific_output.online_save, number=1)
+
+    if hasattr(output, 'phys_fields'):
+        add('output.phys_fields.save', output.phys_fields.save, number=1)
+
+    if mpi.rank == 0:
+        shutil.rmtree(output.path_run, ignore_errors=True)
+
+    return results
+
+
+def run_benchmarks(keys_solvers=None, resolutions_2d=None,
+                   resolutions_3d=None, number=10, path_file=None):
+    """Run the benchmarks over solvers and resolutions.
+
+    The results are printed and, if `path_file` is given, saved in a JSON
+    file (with information on the version and the machine) which can be
+    compared with :func:`compare_results`.
+
+    """
+    if keys_solvers is None:
+        keys_solvers = keys_solvers_default
+    if resolutions_2d is None:
+        resolutions_2d = resolutions_2d_default
+    if resolutions_3d is None:
+        resolutions_3d = resolutions_3d_default
+
+    results = []
+    for key_solver in keys_solvers:
+        try:
+            Simul = import_simul_class(key_solver)
+        except ImportError as error:
+            results.append({'solver': key_solver, 'error': repr(error)})
+            _print_result(results[-1])
+            continue
+
+        params = Simul.create_default_params()
+        if hasattr(params.oper, 'nz'):
+            resolutions = resolutions_3d
+        else:
+            resolutions = resolutions_2d
+
+        for n in resolutions:
+            for result in bench_solver(key_solver, n, number):
+                _print_result(result)
+                results.append(result)
+
+    data = {'fluidsim_version': __version__,
+            'date': datetime.datetime.now().isoformat(),
+            'hostname': socket.gethostname(),
+            'nb_proc': mpi.nb_proc,
+            'python': sys.version.split()[0],
+            'results': results}
+
+    if path_file is not None and mpi.rank == 0:
+        with open(path_file, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        print('results saved in ' + path_file)
+
+    return data
+
+
+def _print_result(result):
+    if mpi.rank != 0:
+        return
+    name = '{:>8s} {:>5} {:32s}'.format(
+        result['solver'], result.get('n', ''), result.get('name', ''))
+    if 'time' in result:
+        print(name + ' {:10.3e} s'.format(result['time']))
+    else:
+        print(name + ' error: ' + result['error'])
+
+
+def compare_results(path_file_ref, path_file):
+    """Print the ratios of the durations of 2 JSON files of results."""
+    datas = []
+    for path in (path_file_ref, path_file):
+        with open(path) as f:
+            datas.append(json.load(f))
+
+    times_ref = {
+        (r['solver'], r.get('n'), r.get('name')): r['time']
+        for r in datas[0]['results'] if 'time' in r}
+
+    print('{:>8s} {:>5s} {:32s} {:>10s} {:>10s} {:>7s}'.format(
+        'solver', 'n', 'name', 'ref (s)', 'new (s)', 'ratio'))
+    for result in datas[1]['results']:
+        key = (result['solver'], result.get('n'), result.get('name'))
+        if 'time' not in result or key not in times_ref:
+            continue
+        t_ref = times_ref[key]
+        t = result['time']
+        print('{:>8s} {:>5} {:32s} {:10.3e} {:10.3e} {:7.2f}'.format(
+            key[0], key[1], key[2], t_ref, t, t / t_ref))
+
+
+def main(args=None):
+    """Command line interface (``fluidsim-bench`` or
+    ``python -m fluidsim.bench``)."""
+    parser = argparse.ArgumentParser(
+        prog='fluidsim-bench',
+        description='Time the main functions of fluidsim solvers.')
+    parser.add_argument(
+        '-s', '--solvers', nargs='+', default=keys_solvers_default,
+        help='keys of the solvers (default: %(default)s)')
+    parser.add_argument(
+        '-n', '--resolutions', nargs='+', type=int,
+        default=resolutions_2d_default,
+        help='resolutions of the 2D solvers (default: %(default)s)')
+    parser.add_argument(
+        '--resolutions3d', nargs='+', type=int,
+        default=resolutions_3d_default,
+        help='resolutions of the 3D solvers (default: %(default)s)')
+    parser.add_argument(
+        '--number', type=int, default=10,
+        help='number of calls per measurement (default: %(default)s)')
+    parser.add_argument(
+        '-o', '--output', default=None,
+        help='path of the JSON file of results')
+    parser.add_argument(
+        '--compare', nargs=2, metavar=('REF', 'NEW'),
+        help='compare 2 JSON files of results (no benchmark is run)')
+
+    args = parser.parse_args(args)
+
+    if args.compare is not None:
+        compare_results(*args.compare)
+        return
+
+    run_benchmarks(args.solvers, args.resolutions, args.resolutions3d,
+                   args.number, args.output)
@@ -0,0 +1,50 @@
+import unittest
+import os
+import json
+from tempfile import mkdtemp
+import shutil
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.bench import run_benchmarks, compare_results
+
+
+class TestBench(unittest.TestCase):
+
+    def setUp(self):
+        self.path_dir = mkdtemp()
+
+    def tearDown(self):
+        if mpi.rank == 0:
+            shutil.rmtree(self.path_dir)
+
+    def test_ns2d(self):
+        """The JSON file should contain a time for each measured function."""
+        path_file = os.path.join(self.path_dir, 'bench.json')
+        with stdout_redirected():
+            run_benchmarks(['ns2d'], resolutions_2d=[16], number=1,
+                           path_file=path_file)
+            if mpi.rank == 0:
+                compare_results(path_file, path_file)
+
+        if mpi.rank > 0:
+            return
+
+        with open(path_file) as f:
+            data = json.load(f)
+
+        names = set()
+        for result in data['results']:
+            self.assertNotIn('error', result, result)
+            self.assertGreater(result['time'], 0.)
+            names.add(result['name'])
+
+        for name in ['tendencies_nonlin', 'time_step', 'dealiasing',
+                     'operators_construction', 'output.phys_fields.save',
+                     'output.spectra.online_save']:
+            self.assertIn(name, names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -58,9 +58,10 @@ import cython
 
 from libc.math cimport exp
 
-from fluidsim.base.setofvariables import SetOfVariables
-
 from fluidsim.operators.fft import easypyfft
+from fluidsim.operators.fft import wisdom
+from fluidsim.operators.dealiasing import compute_selections_dealiased, dealias
+from fluidsim.util import threads
 
 # we define python and c types for physical and Fourier spaces
 DTYPEb = np.uint8
@@ -81,6 +82,23 @@ ctypedef np.complex128_t DTYPEc_t
 # - Robert Bradshaw
 
 
+def _as_double(arr):
+    """Return the array in double precision (no copy if it already is).
+
+    The operators compute in double precision. Fields stored in single
+    precision (see `params.precision`) are converted at their input, which
+    allocates a temporary copy in double precision (single precision only
+    reduces the storage of the state).
+
+    """
+    arr = np.asarray(arr)
+    if arr.dtype == np.float32:
+        return arr.astype(DTYPEf)
+    elif arr.dtype == np.complex64:
+        return arr.astype(DTYPEc)
+    return arr
+
+
 cdef class Operators(object):
     pass
 
@@ -124,7 +142,10 @@ cdef class GridPseudoSpectral2D(Operators):
     cdef public int idimx, idimy, idimkx, idimky
 
     # these names without loc or seq correspond to local quantities
-    cdef public np.ndarray XX, YY, RR, KX, KY, KK, K2, K4, K8, KX2, KY2
+    cdef public np.ndarray KX, KY
+    # the other arrays (XX, YY, RR, KK, K2, K4, K8, KX2, KY2, ...) are
+    # computed on first access (see `__getattr__`)
+    cdef dict _lazy_arrays
     cdef public np.ndarray kx_loc, ky_loc
     cdef public np.ndarray x_seq, y_seq
 
@@ -141,6 +162,9 @@ cdef class GridPseudoSpectral2D(Operators):
 
     # cdef public object where_is_wavenumber
 
+    def __cinit__(self, *args, **kwargs):
+        self._lazy_arrays = {}
+
     def __init__(self, int nx, int ny,
                  DTYPEf_t Lx=2*np.pi, DTYPEf_t Ly=2*np.pi,
                  op_fft2d=None, SEQUENTIAL=None):
@@ -247,12 +271,6 @@ cdef class GridPseudoSpectral2D(Operators):
         self.nK0_loc = self.shapeK_loc[0]
         self.nK1_loc = self.shapeK_loc[1]
 
-        x_loc = self.deltax * np.arange(self.nx_loc)
-        y_loc = (self.deltay *
-                 np.arange(self.iX0loc_start, self.iX0loc_start+self.ny_loc))
-        [self.XX, self.YY] = np.meshgrid(x_loc, y_loc)
-        self.RR = np.sqrt((self.XX-self.Lx/2)**2 + (self.YY-self.Ly/2)**2)
-
         self.kx_loc = self.deltakx * np.arange(self.iKxloc_start,
                                                self.iKxloc_start+self.nkx_loc)
         self.ky_loc = self.deltaky * np.arange(self.iKyloc_start,
@@ -270,16 +288,70 @@ cdef class GridPseudoSpectral2D(Operators):
             self.dim_kx = 0
             self.dim_ky = 1
 
-        self.KX2 = self.KX**2
-        self.KY2 = self.KY**2
-        self.K2 = self.KX2 + self.KY2
-        self.K4 = self.K2**2
-        self.K8 = self.K4**2
-        self.KK = np.sqrt(self.K2)
-
         self.kmax = np.sqrt((self.deltakx*self.nx_seq)**2 +
                             (self.deltaky*self.ny_seq)**2)/2
 
+    def __getattr__(self, name):
+        """Compute an array on first access.
+
+        The arrays which can be computed are given by the methods
+        `_compute_<name>`. They are stored and can be released with
+        :func:`release_arrays`.
+
+        """
+        try:
+            return self._lazy_arrays[name]
+        except KeyError:
+            pass
+        if name.startswith('_') or not hasattr(type(self), '_compute_' + name):
+            raise AttributeError(
+                '{} object has no attribute {}'.format(
+                    type(self).__name__, name))
+        arr = getattr(self, '_compute_' + name)()
+        self._lazy_arrays[name] = arr
+        return arr
+
+    def release_arrays(self, *names):
+        """Release arrays computed on first access (by default all).
+
+        The released arrays are computed again on the next access.
+
+        """
+        if not names:
+            self._lazy_arrays.clear()
+        for name in names:
+            self._lazy_arrays.pop(name, None)
+
+    def _compute_XX(self):
+        x_loc = self.deltax * np.arange(self.nx_loc)
+        return np.tile(x_loc, (self.ny_loc, 1))
+
+    def _compute_YY(self):
+        y_loc = (self.deltay *
+                 np.arange(self.iX0loc_start, self.iX0loc_start+self.ny_loc))
+        return np.tile(y_loc[:, np.newaxis], (1, self.nx_loc))
+
+    def _compute_RR(self):
+        return np.sqrt((self.XX-self.Lx/2)**2 + (self.YY-self.Ly/2)**2)
+
+    def _compute_KX2(self):
+        return self.KX**2
+
+    def _compute_KY2(self):
+        return self.KY**2
+
+    def _compute_K2(self):
+        return self.KX2 + self.KY2
+
+    def _compute_K4(self):
+        return self.K2**2
+
+    def _compute_K8(self):
+        return self.K4**2
+
+    def _compute_KK(self):
+        return np.sqrt(self.K2)
+
     def where_is_wavenumber(self, kx_approx, ky_approx):
         ikx_seq = int(np.round(kx_approx/self.deltakx))
 
@@ -341,13 +413,13 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
     cdef public DTYPEf_t coef_dealiasing
     cdef public object fft2, ifft2
+    cdef object _fft2d_many, _ifft2d_many
     cdef public object gather_Xspace,  gather_Kspace,
     cdef public object scatter_Xspace, scatter_Kspace
     cdef public object project_fft_on_realX
     cdef public object params
-    cdef public np.ndarray KK_not0, K2_not0, K4_not0, KX_over_K2, KY_over_K2
-    cdef public np.ndarray Kappa2, Kappa_over_ic, f_over_c2Kappa2
     cdef public np.ndarray where_dealiased
+    cdef object _selections_dealiased
 
     cdef public int nkxE, nkyE, nkhE
     cdef public np.ndarray kxE, kyE, khE
@@ -372,7 +444,8 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
                    'nx': 48,
                    'ny': 48,
                    'Lx': 8,
-                   'Ly': 8}
+                   'Ly': 8,
+                   'nb_threads': None}
         params._set_child('oper', attribs=attribs)
 
     def __init__(self,
@@ -399,6 +472,9 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
         coef_dealiasing = params.oper.coef_dealiasing
         TRANSPOSED = params.oper.TRANSPOSED_OK
 
+        nb_threads = threads.get_nb_threads(params)
+        threads.set_nb_threads_from_params(params)
+
         # if rank == 0:
         #     to_print = 'Init. operator'
         #     if goal_to_print is not None:
@@ -451,6 +527,9 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
         self.type_fft = type_fft
 
+        # the FFTW plans are faster to compute with the saved wisdom
+        has_loaded_wisdom = wisdom.load_wisdom(type_fft, (ny, nx))
+
         # Initialization of the fft transforms
         if type_fft not in ['fftwpy', 'fftpack']:
             if not TRANSPOSED and type_fft == 'fftwccy':
@@ -460,7 +539,8 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
             if type_fft == 'fftwcy':
                 op_fft2d = fftw2Dmpi.FFT2Dmpi(ny, nx,
                                               TRANSPOSED=TRANSPOSED,
-                                              SEQUENTIAL=SEQUENTIAL)
+                                              SEQUENTIAL=SEQUENTIAL,
+                                              nb_threads=nb_threads)
             else:
                 op_fft2d = fftw2Dmpi.FFT2Dmpi(ny, nx)
             if op_fft2d.nb_proc > 1:
@@ -474,36 +554,17 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
         elif type_fft == 'fftpack':
             op_fft2d = easypyfft.fftp2D(nx, ny)
 
+        if not has_loaded_wisdom:
+            wisdom.save_wisdom(type_fft, (ny, nx))
+
         self.fft2 = op_fft2d.fft2d
         self.ifft2 = op_fft2d.ifft2d
+        self._fft2d_many = getattr(op_fft2d, 'fft2d_many', None)
+        self._ifft2d_many = getattr(op_fft2d, 'ifft2d_many', None)
 
         GridPseudoSpectral2D.__init__(self, nx, ny, Lx, Ly,
                                       op_fft2d=op_fft2d, SEQUENTIAL=SEQUENTIAL)
 
-        self.KK_not0 = self.KK.copy()
-        self.K2_not0 = self.K2.copy()
-        self.K4_not0 = self.K4.copy()
-        if rank == 0 or SEQUENTIAL:
-            self.KK_not0[0, 0] = 10.e-10
-            self.K2_not0[0, 0] = 10.e-10
-            self.K4_not0[0, 0] = 10.e-10
-
-        self.KX_over_K2 = self.KX/self.K2_not0
-        self.KY_over_K2 = self.KY/self.K2_not0
-
-        try:
-            self.Kappa2 = self.K2 + self.params.kd2
-
-            self.Kappa_over_ic = -1.j * np.sqrt(self.Kappa2/self.params.c2)
-
-            if self.params.f != 0:
-                self.f_over_c2Kappa2 = self.params.f/(
-                    self.params.c2*self.Kappa2
-                    )
-
-        except AttributeError:
-            pass
-
         # for spectra, we forget the larger wavenumber,
         # since there is no energy inside because of dealiasing
         self.nkxE = self.nkx_seq - 1
@@ -522,6 +583,9 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
         CONDKY = abs(self.KY) > self.coef_dealiasing * ky_max
         where_dealiased = np.logical_or(CONDKX, CONDKY)
         self.where_dealiased = np.array(where_dealiased, dtype=DTYPEb)
+        # computed once (and not at each call of dealiasing)
+        self._selections_dealiased = compute_selections_dealiased(
+            self.where_dealiased)
 
         try:
             self.project_fft_on_realX = op_fft2d.project_fft_on_realX
@@ -532,6 +596,94 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
                     'project_fft_on_realX defined')
             self.project_fft_on_realX = self.project_fft_on_realX_seq
 
+    def fft2_many(self, arr, out=None):
+        """Compute the Fourier transforms of a stack of fields.
+
+        Parameters
+        ----------
+
+        arr : np.ndarray
+            Array of shape ``(nb_fields,) + shapeX_loc`` (for example a
+            :class:`fluidsim.base.setofvariables.SetOfVariables`).
+
+        out : np.ndarray, optional
+            Array of shape ``(nb_fields,) + shapeK_loc`` in which the
+            result is stored.
+
+        """
+        if out is None:
+            out = np.empty((len(arr),) + tuple(self.shapeK_loc),
+                           dtype=np.complex128)
+        if self._fft2d_many is not None:
+            self._fft2d_many(arr, out)
+        else:
+            for i in range(len(arr)):
+                out[i] = self.fft2(arr[i])
+        return out
+
+    def ifft2_many(self, arr_fft, out=None):
+        """Compute the inverse Fourier transforms of a stack of fields.
+
+        Parameters
+        ----------
+
+        arr_fft : np.ndarray
+            Array of shape ``(nb_fields,) + shapeK_loc``.
+
+        out : np.ndarray, optional
+            Array of shape ``(nb_fields,) + shapeX_loc`` in which the
+            result is stored.
+
+        """
+        if out is None:
+            out = np.empty((len(arr_fft),) + tuple(self.shapeX_loc))
+        if self._ifft2d_many is not None:
+            self._ifft2d_many(arr_fft, out)
+        else:
+            for i in range(len(arr_fft)):
+                out[i] = self.ifft2(arr_fft[i])
+        return out
+
+    def _not0(self, arr):
+        arr = arr.copy()
+        if self.rank == 0 or self.SEQUENTIAL:
+            # mode K2 = 0 !
+            arr[0, 0] = 10.e-10
+        return arr
+
+    def _compute_KK_not0(self):
+        return self._not0(self.KK)
+
+    def _compute_K2_not0(self):
+        return self._not0(self.K2)
+
+    def _compute_K4_not0(self):
+        return self._not0(self.K4)
+
+    def _compute_KX_over_K2(self):
+        return self.KX/self.K2_not0
+
+    def _compute_KY_over_K2(self):
+        return self.KY/self.K2_not0
+
+    def _compute_Kappa2(self):
+        try:
+            return self.K2 + self.params.kd2
+        except AttributeError:
+            return None
+
+    def _compute_Kappa_over_ic(self):
+        Kappa2 = self.Kappa2
+        if Kappa2 is None:
+            return None
+        return -1.j * np.sqrt(Kappa2/self.params.c2)
+
+    def _compute_f_over_c2Kappa2(self):
+        Kappa2 = self.Kappa2
+        if Kappa2 is None or self.params.f == 0:
+            return None
+        return self.params.f/(self.params.c2*Kappa2)
+
     def produce_str_describing_oper(self):
         """Produce a string describing the operator."""
         if (self.Lx/np.pi).is_integer():
@@ -566,13 +718,13 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
     @cython.boundscheck(False)
     @cython.wraparound(False)
-    def rotfft_from_vecfft(self,
-                           np.ndarray[DTYPEc_t, ndim=2] vecx_fft,
-                           np.ndarray[DTYPEc_t, ndim=2] vecy_fft):
+    def rotfft_from_vecfft(self, vecx_fft, vecy_fft):
         """Return the rotational of a vector in spectral space."""
         cdef Py_ssize_t i0, i1, n0, n1
         cdef np.ndarray[DTYPEc_t, ndim=2] rot_fft
         cdef np.ndarray[DTYPEf_t, ndim=2] KX, KY
+        cdef np.ndarray[DTYPEc_t, ndim=2] vx_fft = _as_double(vecx_fft)
+        cdef np.ndarray[DTYPEc_t, ndim=2] vy_fft = _as_double(vecy_fft)
 
         n0 = self.nK0_loc
         n1 = self.nK1_loc
@@ -583,8 +735,8 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
         for i0 in range(n0):
             for i1 in range(n1):
-                rot_fft[i0, i1] = 1j*(KX[i0, i1]*vecy_fft[i0, i1]
-                                      - KY[i0, i1]*vecx_fft[i0, i1])
+                rot_fft[i0, i1] = 1j*(KX[i0, i1]*vy_fft[i0, i1]
+                                      - KY[i0, i1]*vx_fft[i0, i1])
         return rot_fft
 
     # def divfft_from_vecfft_old(self, vecx_fft, vecy_fft):
@@ -593,13 +745,13 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
     @cython.boundscheck(False)
     @cython.wraparound(False)
-    def divfft_from_vecfft(self,
-                           np.ndarray[DTYPEc_t, ndim=2] vecx_fft,
-                           np.ndarray[DTYPEc_t, ndim=2] vecy_fft):
+    def divfft_from_vecfft(self, vecx_fft, vecy_fft):
         """Return the divergence of a vector in spectral space."""
         cdef Py_ssize_t i0, i1, n0, n1
         cdef np.ndarray[DTYPEc_t, ndim=2] div_fft
         cdef np.ndarray[DTYPEf_t, ndim=2] KX, KY
+        cdef np.ndarray[DTYPEc_t, ndim=2] vx_fft = _as_double(vecx_fft)
+        cdef np.ndarray[DTYPEc_t, ndim=2] vy_fft = _as_double(vecy_fft)
 
         n0 = self.nK0_loc
         n1 = self.nK1_loc
@@ -610,8 +762,8 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
         for i0 in xrange(n0):
             for i1 in xrange(n1):
-                div_fft[i0, i1] = 1j*(KX[i0, i1]*vecx_fft[i0, i1]
-                                      + KY[i0, i1]*vecy_fft[i0, i1]
+                div_fft[i0, i1] = 1j*(KX[i0, i1]*vx_fft[i0, i1]
+                                      + KY[i0, i1]*vy_fft[i0, i1]
                                       )
         return div_fft
 
@@ -653,13 +805,13 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
         px_f_fft = np.empty([n0, n1], dtype=np.complex128)
 
-        if f_fft.dtype == np.float64:
-            ff_fft = f_fft
+        if f_fft.dtype.kind == 'f':
+            ff_fft = _as_double(f_fft)
             for i0 in xrange(n0):
                 for i1 in xrange(n1):
                     px_f_fft[i0, i1] = 1j * KX[i0, i1]*ff_fft[i0, i1]
         else:
-            fc_fft = f_fft
+            fc_fft = _as_double(f_fft)
             for i0 in xrange(n0):
                 for i1 in xrange(n1):
                     px_f_fft[i0, i1] = 1j * KX[i0, i1]*fc_fft[i0, i1]
@@ -684,13 +836,13 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
         py_f_fft = np.empty([n0, n1], dtype=np.complex128)
 
-        if f_fft.dtype == np.float64:
-            ff_fft = f_fft
+        if f_fft.dtype.kind == 'f':
+            ff_fft = _as_double(f_fft)
             for i0 in xrange(n0):
                 for i1 in xrange(n1):
                     py_f_fft[i0, i1] = 1j * KY[i0, i1]*ff_fft[i0, i1]
         else:
-            fc_fft = f_fft
+            fc_fft = _as_double(f_fft)
             for i0 in xrange(n0):
                 for i1 in xrange(n1):
                     py_f_fft[i0, i1] = 1j * KY[i0, i1]*fc_fft[i0, i1]
@@ -717,14 +869,14 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
         px_f_fft = np.empty([n0, n1], dtype=np.complex128)
         py_f_fft = np.empty([n0, n1], dtype=np.complex128)
 
-        if f_fft.dtype == np.float64:
-            ff_fft = f_fft
+        if f_fft.dtype.kind == 'f':
+            ff_fft = _as_double(f_fft)
             for i0 in xrange(n0):
                 for i1 in xrange(n1):
                     px_f_fft[i0, i1] = 1j * KX[i0, i1]*ff_fft[i0, i1]
                     py_f_fft[i0, i1] = 1j * KY[i0, i1]*ff_fft[i0, i1]
         else:
-            fc_fft = f_fft
+            fc_fft = _as_double(f_fft)
             for i0 in xrange(n0):
                 for i1 in xrange(n1):
                     px_f_fft[i0, i1] = 1j * KX[i0, i1]*fc_fft[i0, i1]
@@ -931,10 +1083,7 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
     @cython.boundscheck(False)
     @cython.wraparound(False)
-    def qapamfft_from_uxuyetafft(self,
-                                 np.ndarray[DTYPEc_t, ndim=2] ux_fft,
-                                 np.ndarray[DTYPEc_t, ndim=2] uy_fft,
-                                 np.ndarray[DTYPEc_t, ndim=2] eta_fft,
+    def qapamfft_from_uxuyetafft(self, ux_fft_in, uy_fft_in, eta_fft_in,
                                  params=None):
         """ux, uy, eta (fft) ---> q, ap, am (fft)"""
         cdef Py_ssize_t i0, i1, n0, n1
@@ -944,6 +1093,9 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
         cdef np.ndarray[DTYPEc_t, ndim=2] q_fft, ap_fft, am_fft
         cdef DTYPEc_t rot_fft, a_over2_fft, Deltaa_over2_fft
         cdef DTYPEf_t freq_Corio, f_over_c2
+        cdef np.ndarray[DTYPEc_t, ndim=2] ux_fft = _as_double(ux_fft_in)
+        cdef np.ndarray[DTYPEc_t, ndim=2] uy_fft = _as_double(uy_fft_in)
+        cdef np.ndarray[DTYPEc_t, ndim=2] eta_fft = _as_double(eta_fft_in)
 
         if params is None:
             params = self.params
@@ -1035,10 +1187,7 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
     # @cython.boundscheck(False)
     # @cython.wraparound(False)
-    def uxuyetafft_from_qapamfft(self,
-                                 np.ndarray[DTYPEc_t, ndim=2] q_fft,
-                                 np.ndarray[DTYPEc_t, ndim=2] ap_fft,
-                                 np.ndarray[DTYPEc_t, ndim=2] am_fft,
+    def uxuyetafft_from_qapamfft(self, q_fft_in, ap_fft_in, am_fft_in,
                                  params=None):
         """q, ap, am (fft) ---> ux, uy, eta (fft)"""
         cdef Py_ssize_t i0, i1, n0, n1
@@ -1051,6 +1200,9 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
         cdef np.ndarray[DTYPEc_t, ndim=2] eta_fft, ux_fft, uy_fft
         cdef DTYPEc_t div_fft, rot_fft
         cdef DTYPEf_t freq_Corio
+        cdef np.ndarray[DTYPEc_t, ndim=2] q_fft = _as_double(q_fft_in)
+        cdef np.ndarray[DTYPEc_t, ndim=2] ap_fft = _as_double(ap_fft_in)
+        cdef np.ndarray[DTYPEc_t, ndim=2] am_fft = _as_double(am_fft_in)
 
         if params is None:
             params = self.params
@@ -1135,16 +1287,11 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
     
     def dealiasing(self, *args):
         for thing in args:
-            if isinstance(thing, SetOfVariables):
-                dealiasing_setofvar(thing, self.where_dealiased,
-                                    self.nK0_loc, self.nK1_loc)
-            elif isinstance(thing, np.ndarray):
-                dealiasing_variable(thing, self.where_dealiased,
-                                    self.nK0_loc, self.nK1_loc)
+            if isinstance(thing, np.ndarray):
+                dealias(thing, self._selections_dealiased)
 
     def dealiasing_setofvar(self, sov):
-        dealiasing_setofvar(sov, self.where_dealiased,
-                            self.nK0_loc, self.nK1_loc)
+        dealias(sov, self._selections_dealiased)
 
     # def sum_wavenumbers_old(self, field_fft):
     #     S_allkx = np.sum(field_fft)
@@ -1168,11 +1315,12 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
             mean_field /= nb_proc
         return mean_field
 
-    def sum_wavenumbers(self, np.ndarray[DTYPEf_t, ndim=2] A_fft):
+    def sum_wavenumbers(self, A_fft_in):
         """Sum the given array over all wavenumbers."""
         cdef np.uint32_t ikO, ik1
         cdef np.uint32_t nk0loc, nk1loc, rank, TRANSPOSED
         cdef DTYPEf_t A0D, sum_A_fft
+        cdef np.ndarray[DTYPEf_t, ndim=2] A_fft = _as_double(A_fft_in)
 
         nk0loc = self.shapeK_loc[0]
         nk1loc = self.shapeK_loc[1]
@@ -1283,9 +1431,9 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
     @cython.boundscheck(False)
     @cython.wraparound(False)
-    def spectrum2D_from_fft(self,
-                            np.ndarray[DTYPEf_t, ndim=2] E_fft):
+    def spectrum2D_from_fft(self, E_fft_in):
         """Compute the 2D spectra. Return a dictionary."""
+        cdef np.ndarray[DTYPEf_t, ndim=2] E_fft = _as_double(E_fft_in)
         cdef np.ndarray[DTYPEf_t, ndim=2] KK
         cdef np.uint32_t ikO, ik1, ikh, nkh
         cdef np.uint32_t nk0loc, nk1loc, rank, TRANSPOSED
@@ -1369,12 +1517,11 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
             pdf = hist/((bin_edges[1]-bin_edges[0])*hist.sum())
         return pdf, bin_edges
 
-    def compute_increments_dim1(self,
-                                np.ndarray[DTYPEf_t, ndim=2] var,
-                                np.uint32_t irx):
+    def compute_increments_dim1(self, var_in, np.uint32_t irx):
         """Compute the increments of var over the dim 1."""
         cdef np.uint32_t iO, i1, n0, n1, n1new
         cdef np.ndarray[DTYPEf_t, ndim=2] inc_var
+        cdef np.ndarray[DTYPEf_t, ndim=2] var = _as_double(var_in)
         n0 = var.shape[0]
         n1 = var.shape[1]
         n1new = n1 - irx
@@ -1587,10 +1734,11 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
     @cython.boundscheck(False)
     @cython.wraparound(False)
-    def monge_ampere_from_fft(
-            self, DTYPEc_t[:, :] a_fft, DTYPEc_t[:, :] b_fft):
+    def monge_ampere_from_fft(self, a_fft_in, b_fft_in):
         cdef:
             Py_ssize_t i0, n0, i1, n1
+            DTYPEc_t[:, :] a_fft = _as_double(a_fft_in)
+            DTYPEc_t[:, :] b_fft = _as_double(b_fft_in)
             DTYPEc_t[:, :] mpxx_afft, mpyy_afft, mpxy_afft
             DTYPEc_t[:, :] mpxx_bfft, mpyy_bfft, mpxy_bfft
             DTYPEf_t[:, :] mamp
@@ -1651,8 +1799,9 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
 
         return pxx_a*pyy_b + pyy_a*pxx_b - 2*pxy_a*pxy_b
 
-    def laplacian2_fft(self, DTYPEc_t[:, :] a_fft):
+    def laplacian2_fft(self, a_fft_in):
         cdef Py_ssize_t i0, n0, i1, n1
+        cdef DTYPEc_t[:, :] a_fft = _as_double(a_fft_in)
         cdef DTYPEc_t[:, :] lap2_afft = np.empty_like(a_fft)
         cdef DTYPEf_t[:, :] K4 = self.K4
 
@@ -1663,8 +1812,9 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
                 lap2_afft[i0, i1] = a_fft[i0, i1] * K4[i0, i1]
         return np.array(lap2_afft)
 
-    def invlaplacian2_fft(self, DTYPEc_t[:, :] a_fft):
+    def invlaplacian2_fft(self, a_fft_in):
         cdef Py_ssize_t i0, n0, i1, n1
+        cdef DTYPEc_t[:, :] a_fft = _as_double(a_fft_in)
         cdef DTYPEc_t[:, :] invlap2_afft = np.empty_like(a_fft)
         cdef DTYPEf_t[:, :] K4_not0 = self.K4_not0
 
@@ -1678,30 +1828,3 @@ cdef class OperatorsPseudoSpectral2D(GridPseudoSpectral2D):
         if rank == 0:
             invlap2_afft[0, 0] = 0.
         return np.array(invlap2_afft)
-
-
-@cython.boundscheck(False)
-@cython.wraparound(False)
-cdef np.ndarray dealiasing_variable(np.ndarray[DTYPEc_t, ndim=2] ff_fft,
-                                    np.ndarray[DTYPEb_t, ndim=2] where,
-                                    int nK0loc, int nK1loc):
-    cdef np.uint32_t iKO, iK1
-    for iK0 in range(nK0loc):
-        for iK1 in range(nK1loc):
-            if where[iK0, iK1]:
-                ff_fft[iK0, iK1] = 0.
-
-
-@cython.boundscheck(False)
-@cython.wraparound(False)
-cdef np.ndarray dealiasing_setofvar(np.ndarray[DTYPEc_t, ndim=3] setofvar_fft,
-                                    np.ndarray[DTYPEb_t, ndim=2] where,
-                                    Py_ssize_t n0, Py_ssize_t n1):
-    cdef Py_ssize_t ik, nk, i0, i1
-    nk = setofvar_fft.shape[0]
-
-    for i0 in xrange(n0):
-        for i1 in xrange(n1):
-            if where[i0, i1]:
-                for ik in xrange(nk):
-                    setofvar_fft[ik, i0, i1] = 0.
@@ -9,6 +9,7 @@ Provides
    :toctree:
 
    operators
+   dealiasing
    fft
 
 .. todo:: Make a nice hierarchy of Operators classes (?)
@@ -0,0 +1,88 @@
+"""Dealiasing (:mod:`fluidsim.operators.dealiasing`)
+====================================================
+
+.. currentmodule:: fluidsim.operators.dealiasing
+
+Provides:
+
+.. autofunction:: compute_selections_dealiased
+
+.. autofunction:: dealias
+
+The dealiased region of the truncation with the 2/3 rule is a union of
+slabs (one per axis of the arrays in spectral space: ``|k_i| > k_max``).
+The slabs are computed once from the boolean array `where_dealiased`, so
+that the dealiasing only writes zeros in the dealiased modes with basic
+slicing (no scan of the whole mask and no index array). For other masks,
+the indices of the dealiased modes are also precomputed once.
+
+"""
+
+from __future__ import division
+
+from builtins import range
+
+import numpy as np
+
+
+def _as_slice(indices):
+    """Return a slice if the indices are contiguous."""
+    if indices[-1] - indices[0] + 1 == len(indices):
+        return slice(indices[0], indices[-1] + 1)
+    return indices
+
+
+def compute_selections_dealiased(where_dealiased):
+    """Compute selections covering the dealiased region.
+
+    Parameters
+    ----------
+
+    where_dealiased : array_like
+
+      Boolean (or uint8) array of the shape of one variable in spectral
+      space (local in the process).
+
+    Returns
+    -------
+
+    selections : list of tuples
+
+      Index tuples applied to the last axes of the arrays (see
+      :func:`dealias`). If the dealiased region is a union of slabs, there
+      is one tuple per axis with dealiased hyperplanes (with a slice if the
+      indices are contiguous). Otherwise, the list contains the tuple of
+      the indices of the dealiased modes.
+
+    """
+    where = np.asarray(where_dealiased, dtype=bool)
+    if not where.any():
+        return []
+
+    selections = []
+    covered = np.zeros_like(where)
+    for axis in range(where.ndim):
+        other_axes = tuple(i for i in range(where.ndim) if i != axis)
+        indices = np.nonzero(where.all(axis=other_axes))[0]
+        if len(indices) == 0:
+            continue
+        selection = ((slice(None),)*axis + (_as_slice(indices),) +
+                     (slice(None),)*(where.ndim - axis - 1))
+        selections.append(selection)
+        covered[selection] = True
+
+    if not selections or (covered != where).any():
+        return [np.nonzero(where)]
+    return selections
+
+
+def dealias(arr, selections):
+    """Set to zero the dealiased modes of an array (in place).
+
+    `arr` can have leading axes (variables of a
+    :class:`fluidsim.base.setofvariables.SetOfVariables`, members of an
+    ensemble, ...).
+
+    """
+    for selection in selections:
+        arr[(Ellipsis,) + tuple(selection)] = 0.
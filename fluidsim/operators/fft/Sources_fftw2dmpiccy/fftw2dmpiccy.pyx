@@ -128,7 +128,7 @@ of the fftw library.
 
 
     # cpdef fft2d(self, np.ndarray[DTYPEf_t, ndim=2] ffX):
-    cpdef fft2d(self, DTYPEf_t[:, :] ffX):
+    cpdef fft2d(self, ffX):
         cdef np.ndarray[DTYPEf_t, ndim=2, mode="c"] ffX_cont
         cdef np.ndarray[DTYPEc_t, ndim=2, mode="c"] ffK_cont
         ffX_cont = np.ascontiguousarray(ffX, dtype=DTYPEf)
@@ -137,7 +137,7 @@ of the fftw library.
         return ffK_cont
 
     # cpdef ifft2d(self, np.ndarray[DTYPEc_t, ndim=2] ffK):
-    cpdef ifft2d(self, DTYPEc_t[:, :] ffK):
+    cpdef ifft2d(self, ffK):
         cdef np.ndarray[DTYPEc_t, ndim=2, mode="c"] ffK_cont
         cdef np.ndarray[DTYPEf_t, ndim=2, mode="c"] ffX_cont
         ffK_cont = np.ascontiguousarray(ffK, dtype=DTYPEc)
@@ -58,6 +58,22 @@ fftw_flags = {'FFTW_CONSERVE_MEMORY': FFTW_CONSERVE_MEMORY,
 
 from cpython.ref cimport PyTypeObject
 
+
+def get_fftw_version():
+    """Return the version of the FFTW library."""
+    return (<bytes> fftw3.fftw_version).decode()
+
+
+def import_wisdom(path):
+    """Import FFTW wisdom from a file (return True if it succeeded)."""
+    return bool(fftw3.fftw_import_wisdom_from_filename(path.encode()))
+
+
+def export_wisdom(path):
+    """Export the FFTW wisdom in a file (return True if it succeeded)."""
+    return bool(fftw3.fftw_export_wisdom_to_filename(path.encode()))
+
+
 cdef extern from "numpy/arrayobject.h":
     object PyArray_NewFromDescr(PyTypeObject * subtype, np.dtype descr,
                                 int nd, np.npy_intp* dims, np.npy_intp* strides,
@@ -76,6 +92,16 @@ DTYPEc = np.complex128
 ctypedef np.complex128_t DTYPEc_t
 
 
+IF FFTW3THREADS:
+    _threads_initialized = False
+
+    def _init_threads():
+        global _threads_initialized
+        if not _threads_initialized:
+            fftw3.fftw_init_threads()
+            _threads_initialized = True
+
+
 cdef class FFT2Dmpi(object):
     """The FFT2Dmpi class is a cython wrapper for the 2D fast Fourier
     transform (sequential and MPI) of the fftw library."""
@@ -114,8 +140,11 @@ cdef class FFT2Dmpi(object):
 
     cdef size_t n_alloc_local
 
+    # number of threads of the sequential plans
+    cdef public int nb_threads
+
     def __init__(self, int n0, int n1, flags=['FFTW_MEASURE'],
-                 TRANSPOSED=True, SEQUENTIAL=None):
+                 TRANSPOSED=True, SEQUENTIAL=None, int nb_threads=1):
 
         if TRANSPOSED is None:
             TRANSPOSED = True
@@ -171,6 +200,12 @@ cdef class FFT2Dmpi(object):
 
         self.coef_norm = n0*n1
 
+        IF FFTW3THREADS:
+            self.nb_threads = nb_threads
+        ELSE:
+            # fluidsim has been built without fftw3_threads
+            self.nb_threads = 1
+
         # Allocate the carrays and create the plans
         # and create the np arrays pointing to the carrays
         if self.nb_proc == 1 or SEQUENTIAL:
@@ -202,6 +237,10 @@ cdef class FFT2Dmpi(object):
 
         # print('after alloc')
 
+        IF FFTW3THREADS:
+            _init_threads()
+            fftw3.fftw_plan_with_nthreads(self.nb_threads)
+
         self.plan_forward = fftw3.fftw_plan_dft_r2c_2d(self.n0, self.n1,
                                                        <double*> self.carrayX,
                                                        <complex*> self.carrayK,
@@ -323,13 +362,14 @@ cdef class FFT2Dmpi(object):
                 np.NPY_COMPLEX128, <void*> self.carrayK)
 
     # cpdef fft2d(self, np.ndarray[DTYPEf_t, ndim=2] ff):
-    cpdef fft2d(self, DTYPEf_t[:, :] ff):
+    cpdef fft2d(self, ff):
+        # untyped argument: fields in single precision are cast by the copy
         self.arrayX[:] = ff
         fftw3.fftw_execute(self.plan_forward)
         return self.arrayK/self.coef_norm
 
     # cpdef ifft2d(self, np.ndarray[DTYPEc_t, ndim=2] ff_fft):
-    cpdef ifft2d(self, DTYPEc_t[:, :] ff_fft):
+    cpdef ifft2d(self, ff_fft):
         """Inverse Fast Fourier Transform 2D
 
         This is THE function where most of the time is spent !
@@ -344,6 +384,30 @@ cdef class FFT2Dmpi(object):
 #### result = self.arrayX*1          # works, but maybe slower ?
         return self.arrayX.copy()
 
+    def fft2d_many(self, ff, ff_fft):
+        """Fast Fourier Transform 2D of a stack of fields
+
+        The transform of `ff[i]` is stored in `ff_fft[i]`, which avoids the
+        allocation of one array per field.
+        """
+        for i in range(len(ff)):
+            self.arrayX[:] = ff[i]
+            fftw3.fftw_execute(self.plan_forward)
+            np.divide(self.arrayK, self.coef_norm, out=ff_fft[i])
+        return ff_fft
+
+    def ifft2d_many(self, ff_fft, ff):
+        """Inverse Fast Fourier Transform 2D of a stack of fields
+
+        The inverse transform of `ff_fft[i]` is stored in `ff[i]`, which
+        avoids the allocation of one array per field.
+        """
+        for i in range(len(ff_fft)):
+            self.arrayK[:] = ff_fft[i]
+            fftw3.fftw_execute(self.plan_backward)
+            ff[i] = self.arrayX
+        return ff
+
     def __dealloc__(self):
         if self.nb_proc == 1:
             fftw3.fftw_destroy_plan(self.plan_forward)
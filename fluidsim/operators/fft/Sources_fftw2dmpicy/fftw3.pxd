@@ -35,6 +35,13 @@ cdef extern from "fftw3.h":
     void fftw_destroy_plan(fftw_plan plan)
     void fftw_free(void *mem)
 
+    int fftw_init_threads()
+    void fftw_plan_with_nthreads(int nthreads)
+
+    int fftw_export_wisdom_to_filename(const char *filename)
+    int fftw_import_wisdom_from_filename(const char *filename)
+    const char *fftw_version
+
 
 cdef enum:
     FFTW_FORWARD = -1
@@ -9,6 +9,7 @@ Provides
    :toctree:
 
    easypyfft
+   wisdom
 
 Other extension modules (fftw2dmpiccy, fftw2dmpicy) can not be imported on the readthedocs servers
 to can be be included here.
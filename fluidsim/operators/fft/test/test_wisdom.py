@@ -0,0 +1,50 @@
+import unittest
+import shutil
+import tempfile
+import os
+
+from fluiddyn.util.mpi import nb_proc
+
+from fluidsim.operators.fft import wisdom
+
+try:
+    from fluidsim.operators.fft import fftw2dmpicy
+    FFTWMPI = True
+except ImportError:
+    FFTWMPI = False
+
+
+@unittest.skipIf(nb_proc > 1, 'Not implemented.')
+@unittest.skipIf(not FFTWMPI, 'fftw2dmpicy fails to be imported.')
+class TestWisdom(unittest.TestCase):
+
+    def setUp(self):
+        self.path_dir_wisdom_old = wisdom.path_dir_wisdom
+        self.USE_WISDOM_old = wisdom.USE_WISDOM
+        wisdom.path_dir_wisdom = tempfile.mkdtemp()
+        wisdom.USE_WISDOM = True
+
+    def tearDown(self):
+        shutil.rmtree(wisdom.path_dir_wisdom)
+        wisdom.path_dir_wisdom = self.path_dir_wisdom_old
+        wisdom.USE_WISDOM = self.USE_WISDOM_old
+
+    def test_save_load(self):
+        shapeX = (16, 8)
+        self.assertFalse(wisdom.load_wisdom('fftwcy', shapeX))
+        fftw2dmpicy.FFT2Dmpi(*shapeX, TRANSPOSED=False)
+        wisdom.save_wisdom('fftwcy', shapeX)
+        self.assertTrue(wisdom.load_wisdom('fftwcy', shapeX))
+
+        # the wisdom of another version is removed
+        path_dir_old = os.path.join(wisdom.path_dir_wisdom, 'fftwcy_0.0')
+        os.mkdir(path_dir_old)
+        wisdom.save_wisdom('fftwcy', shapeX)
+        self.assertFalse(os.path.exists(path_dir_old))
+
+        # not supported backend
+        self.assertFalse(wisdom.load_wisdom('fftpack', shapeX))
+
+
+if __name__ == '__main__':
+    unittest.main()
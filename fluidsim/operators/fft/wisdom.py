@@ -0,0 +1,135 @@
+"""Persistent FFTW wisdom (:mod:`fluidsim.operators.fft.wisdom`)
+===============================================================
+
+The FFTW plans are computed with the flag FFTW_MEASURE, which can take much
+more time than a short simulation or than loading a simulation for plotting.
+The wisdom (the information on the best plans) is saved on disk after the
+first planning for a resolution and loaded before the next ones.
+
+The files are saved in the directory ``$FLUIDSIM_PATH/.fftw_wisdom`` (or in
+the directory given by the environment variable
+``FLUIDSIM_FFTW_WISDOM_DIR``), in one subdirectory per FFT backend and
+version of the FFT library, and in one file per resolution and number of
+processes. The wisdom saved with other versions of the library is removed
+when new wisdom is saved. The cache can be disabled by setting the
+environment variable ``FLUIDSIM_NO_FFTW_WISDOM``.
+
+The backends supporting the cache are 'fftwcy' (module
+:mod:`fluidsim.operators.fft.fftw2dmpicy`) and 'fftwpy' (pyfftw), i.e. the
+backends of the 2D operators :mod:`fluidsim.operators.operators`. The
+operators based on fluidfft (:mod:`fluidsim.operators.operators2d` and
+:mod:`fluidsim.operators.operators3d`) are not supported: their FFTW plans
+are computed in the fluidfft classes, which do not give access to the
+wisdom.
+
+.. autofunction:: load_wisdom
+
+.. autofunction:: save_wisdom
+
+"""
+
+from __future__ import print_function
+
+import os
+import pickle
+import re
+import shutil
+
+from fluiddyn.util import mpi
+from fluiddyn.io import FLUIDSIM_PATH
+
+USE_WISDOM = 'FLUIDSIM_NO_FFTW_WISDOM' not in os.environ
+
+path_dir_wisdom = os.environ.get(
+    'FLUIDSIM_FFTW_WISDOM_DIR', os.path.join(FLUIDSIM_PATH, '.fftw_wisdom'))
+
+
+def _import_wisdom_pyfftw(path):
+    import pyfftw
+    with open(path, 'rb') as f:
+        wisdom = pickle.load(f)
+    return any(pyfftw.import_wisdom(wisdom))
+
+
+def _export_wisdom_pyfftw(path):
+    import pyfftw
+    with open(path, 'wb') as f:
+        pickle.dump(pyfftw.export_wisdom(), f, protocol=2)
+    return True
+
+
+def _get_functions(type_fft):
+    """Return the version of the library and the import/export functions."""
+    if type_fft == 'fftwcy':
+        from fluidsim.operators.fft import fftw2dmpicy
+        return (fftw2dmpicy.get_fftw_version(), fftw2dmpicy.import_wisdom,
+                fftw2dmpicy.export_wisdom)
+    elif type_fft == 'fftwpy':
+        import pyfftw
+        return ('pyfftw-' + pyfftw.__version__, _import_wisdom_pyfftw,
+                _export_wisdom_pyfftw)
+    else:
+        raise ValueError('No wisdom for type_fft = ' + type_fft)
+
+
+def _get_path_dir_backend(type_fft, version):
+    return os.path.join(path_dir_wisdom, type_fft + '_' + re.sub(
+        r'[^A-Za-z0-9.\-]', '_', version))
+
+
+def _get_path_file(path_dir, shapeX):
+    return os.path.join(path_dir, '{}_np{}.wisdom'.format(
+        'x'.join(str(n) for n in shapeX), mpi.nb_proc))
+
+
+def load_wisdom(type_fft, shapeX):
+    """Load the wisdom saved for a backend and a resolution.
+
+    Returns True if wisdom has been loaded.
+
+    """
+    if not USE_WISDOM or type_fft not in ('fftwcy', 'fftwpy'):
+        return False
+    try:
+        version, import_wisdom, _ = _get_functions(type_fft)
+    except ImportError:
+        return False
+    path_file = _get_path_file(
+        _get_path_dir_backend(type_fft, version), shapeX)
+    if not os.path.exists(path_file):
+        return False
+    try:
+        return import_wisdom(path_file)
+    except Exception:
+        # corrupted file
+        return False
+
+
+def save_wisdom(type_fft, shapeX):
+    """Save the wisdom for a backend and a resolution (process 0)."""
+    if not USE_WISDOM or mpi.rank > 0 or \
+            type_fft not in ('fftwcy', 'fftwpy'):
+        return
+    try:
+        version, _, export_wisdom = _get_functions(type_fft)
+    except ImportError:
+        return
+
+    path_dir = _get_path_dir_backend(type_fft, version)
+    try:
+        if not os.path.exists(path_dir):
+            os.makedirs(path_dir)
+        # the wisdom obtained with other versions of the library is invalid
+        name_dir = os.path.basename(path_dir)
+        for name in os.listdir(path_dir_wisdom):
+            if name.startswith(type_fft + '_') and name != name_dir:
+                shutil.rmtree(os.path.join(path_dir_wisdom, name),
+                              ignore_errors=True)
+
+        path_file = _get_path_file(path_dir, shapeX)
+        path_tmp = path_file + '.tmp{}'.format(os.getpid())
+        if export_wisdom(path_tmp):
+            os.rename(path_tmp, path_file)
+    except (IOError, OSError):
+        # the cache is optional (for example read-only FLUIDSIM_PATH)
+        pass
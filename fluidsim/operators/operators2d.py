@@ -5,13 +5,9 @@ from fluiddyn.util import mpi
 
 from fluidfft.fft2d.operators import OperatorsPseudoSpectral2D as _Operators
 
-from . import util2d_pythran
-from .util2d_pythran import dealiasing_setofvar
-from ..base.setofvariables import SetOfVariables
-
-if not hasattr(util2d_pythran, '__pythran__'):
-    raise ValueError('util2d_pythran has to be pythranized to be efficient! '
-                     'Install pythran and recompile.')
+from .dealiasing import compute_selections_dealiased, dealias
+from ..base.setofvariables import get_dtypes
+from ..util import threads
 
 nb_proc = mpi.nb_proc
 rank = mpi.rank
@@ -36,13 +32,25 @@ class OperatorsPseudoSpectral2D(_Operators):
                    'nx': 48,
                    'ny': 48,
                    'Lx': 8,
-                   'Ly': 8}
+                   'Ly': 8,
+                   'nb_threads': None}
         params._set_child('oper', attribs=attribs)
 
     def __init__(self, params, SEQUENTIAL=None, goal_to_print=None):
 
         self.params = params
 
+        if get_dtypes(params)[0] != np.float64:
+            raise ValueError(
+                'The operators based on fluidfft only support '
+                'params.precision = "double".')
+
+        # the fluidfft classes do not take a number of threads, only the
+        # OpenMP runtime and pyfftw are configured (if nb_threads is set)
+        # (they do not give access to the FFTW wisdom either, so the
+        # wisdom cache of fluidsim.operators.fft.wisdom is not used)
+        threads.set_nb_threads_from_params(params)
+
         super(OperatorsPseudoSpectral2D, self).__init__(
             params.oper.nx, params.oper.ny, params.oper.Lx, params.oper.Ly,
             fft=params.oper.type_fft,
@@ -51,6 +59,10 @@ class OperatorsPseudoSpectral2D(_Operators):
         self.Lx = self.lx
         self.Ly = self.ly
 
+        # computed once (and not at each call of dealiasing)
+        self._selections_dealiased = compute_selections_dealiased(
+            self.where_dealiased)
+
         try:
             self.project_fft_on_realX = self._opfft.project_fft_on_realX
         except AttributeError:
@@ -69,17 +81,39 @@ class OperatorsPseudoSpectral2D(_Operators):
             a = nkx_loc_rank
             self.SAME_SIZE_IN_ALL_PROC = (a >= a.max()).all()
 
+    def fft2_many(self, arr, out=None):
+        """Compute the Fourier transforms of a stack of fields.
+
+        `arr` has the shape ``(nb_fields,) + shapeX_loc`` (for example a
+        :class:`fluidsim.base.setofvariables.SetOfVariables`). The plan of
+        the fft object is reused and the results are written in `out`.
+
+        """
+        if out is None:
+            out = np.empty((len(arr),) + tuple(self.shapeK_loc),
+                           dtype=np.complex128)
+        for i in range(len(arr)):
+            self.fft_as_arg(arr[i], out[i])
+        return out
+
+    def ifft2_many(self, arr_fft, out=None):
+        """Compute the inverse Fourier transforms of a stack of fields."""
+        if out is None:
+            out = np.empty((len(arr_fft),) + tuple(self.shapeX_loc))
+        for i in range(len(arr_fft)):
+            self.ifft_as_arg(arr_fft[i], out[i])
+        return out
+
     def dealiasing(self, *args):
         for thing in args:
-            if isinstance(thing, SetOfVariables):
-                dealiasing_setofvar(thing, self.where_dealiased,
-                                    self.nK0_loc, self.nK1_loc)
-            elif isinstance(thing, np.ndarray):
-                self.dealiasing_variable(thing)
+            if isinstance(thing, np.ndarray):
+                dealias(thing, self._selections_dealiased)
 
     def dealiasing_setofvar(self, sov):
-        dealiasing_setofvar(sov, self.where_dealiased,
-                            self.nK0_loc, self.nK1_loc)
+        dealias(sov, self._selections_dealiased)
+
+    def dealiasing_variable(self, ff_fft):
+        dealias(ff_fft, self._selections_dealiased)
 
     def constant_arrayK(self, value=None, dtype=complex, shape='loc'):
         """Return a constant array in spectral space."""
@@ -285,14 +319,8 @@ class OperatorsPseudoSpectral2D(_Operators):
     def compute_increments_dim1(self, var, irx):
         """Compute the increments of var over the dim 1."""
 
-        n0 = var.shape[0]
-        n1 = var.shape[1]
-        n1new = n1 - irx
-        inc_var = np.empty([n0, n1new])
-        for i0 in xrange(n0):
-            for i1 in xrange(n1new):
-                inc_var[i0, i1] = (var[i0, i1+irx] - var[i0, i1])
-        return inc_var
+        n1new = var.shape[1] - irx
+        return var[:, irx:] - var[:, :n1new]
 
     def pdf_normalized(self, field, nb_bins=100):
         """Compute the normalized pdf"""
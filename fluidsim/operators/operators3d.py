@@ -11,8 +11,10 @@ from fluiddyn.util.mpi import nb_proc
 
 from .operators import OperatorsPseudoSpectral2D
 from .operators2d import OperatorsPseudoSpectral2D as OpPseudoSpectral2D
+from .dealiasing import compute_selections_dealiased, dealias
 
-from fluidsim.base.setofvariables import SetOfVariables
+from fluidsim.base.setofvariables import get_dtypes
+from fluidsim.util import threads
 
 from fluidfft.fft3d.operators import OperatorsPseudoSpectral3D as _Operators
 
@@ -56,13 +58,25 @@ class OperatorsPseudoSpectral3D(_Operators):
                    'nz': 48,
                    'Lx': 2*pi,
                    'Ly': 2*pi,
-                   'Lz': 2*pi}
+                   'Lz': 2*pi,
+                   'nb_threads': None}
         params._set_child('oper', attribs=attribs)
 
     def __init__(self, params=None, SEQUENTIAL=None):
 
         self.params = params
 
+        if get_dtypes(params)[0] != np.float64:
+            raise ValueError(
+                'The operators based on fluidfft only support '
+                'params.precision = "double".')
+
+        # the fluidfft classes do not take a number of threads, only the
+        # OpenMP runtime and pyfftw are configured (if nb_threads is set)
+        # (they do not give access to the FFTW wisdom either, so the
+        # wisdom cache of fluidsim.operators.fft.wisdom is not used)
+        threads.set_nb_threads_from_params(params)
+
         super(OperatorsPseudoSpectral3D, self).__init__(
             params.oper.nx, params.oper.ny, params.oper.nz,
             params.oper.Lx, params.oper.Ly, params.oper.Lz,
@@ -82,6 +96,33 @@ class OperatorsPseudoSpectral3D(_Operators):
         self.ifft2 = self.ifft2d = self.oper2d.ifft2
         self.fft2 = self.fft2d = self.oper2d.fft2
 
+        # computed once (and not at each call of dealiasing)
+        self._selections_dealiased = compute_selections_dealiased(
+            self.where_dealiased)
+
+    def fft3d_many(self, arr, out=None):
+        """Compute the Fourier transforms of a stack of fields.
+
+        `arr` has the shape ``(nb_fields,) + shapeX_loc`` (for example a
+        :class:`fluidsim.base.setofvariables.SetOfVariables`). The plan of
+        the fft object is reused and the results are written in `out`.
+
+        """
+        if out is None:
+            out = np.empty((len(arr),) + tuple(self.shapeK_loc),
+                           dtype=np.complex128)
+        for i in range(len(arr)):
+            self.fft_as_arg(arr[i], out[i])
+        return out
+
+    def ifft3d_many(self, arr_fft, out=None):
+        """Compute the inverse Fourier transforms of a stack of fields."""
+        if out is None:
+            out = np.empty((len(arr_fft),) + tuple(self.shapeX_loc))
+        for i in range(len(arr_fft)):
+            self.ifft_as_arg(arr_fft[i], out[i])
+        return out
+
     def build_invariant_arrayX_from_2d_indices12X(self, arr2d):
 
         return self._op_fft.build_invariant_arrayX_from_2d_indices12X(
@@ -94,19 +135,8 @@ class OperatorsPseudoSpectral3D(_Operators):
 
     def dealiasing(self, *args):
         for thing in args:
-            if isinstance(thing, SetOfVariables):
-                _dealiasing_setofvar(thing, self.where_dealiased)
-            elif isinstance(thing, np.ndarray):
-                _dealiasing_variable(thing, self.where_dealiased)
-
-
-def _dealiasing_setofvar(sov, where_dealiased):
-    for i in range(sov.shape[0]):
-        sov[i][np.nonzero(where_dealiased)] = 0.
-
-
-def _dealiasing_variable(ff_fft, where_dealiased):
-    ff_fft[np.nonzero(where_dealiased)] = 0.
+            if isinstance(thing, np.ndarray):
+                dealias(thing, self._selections_dealiased)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,47 @@
+from __future__ import division
+
+import unittest
+
+import numpy as np
+
+from fluidsim.operators.dealiasing import compute_selections_dealiased, dealias
+
+
+class TestDealiasing(unittest.TestCase):
+
+    def _check(self, where, nb_selections_expected=None):
+        selections = compute_selections_dealiased(where)
+        if nb_selections_expected is not None:
+            self.assertEqual(len(selections), nb_selections_expected)
+
+        arr = np.ones((2,) + where.shape, dtype=np.complex128)
+        dealias(arr, selections)
+        for i in range(2):
+            self.assertTrue((arr[i][where] == 0).all())
+            self.assertTrue((arr[i][~where] == 1).all())
+
+    def test_slabs_3d(self):
+        """The 2/3 rule should give one slab per axis."""
+        n0, n1, n2 = 12, 8, 5
+        k0 = np.fft.fftfreq(n0, 1/n0)
+        k1 = np.fft.fftfreq(n1, 1/n1)
+        k2 = np.arange(n2)
+        K0, K1, K2 = np.meshgrid(k0, k1, k2, indexing='ij')
+        where = ((abs(K0) > 2/3*n0/2) | (abs(K1) > 2/3*n1/2) |
+                 (abs(K2) > 2/3*(n2 - 1)))
+        self._check(where, 3)
+
+    def test_irregular_mask(self):
+        """Masks which are not unions of slabs should be supported."""
+        where = np.zeros((6, 4), dtype=np.uint8)
+        where[1, 2] = where[4, 0] = 1
+        self._check(where.astype(bool))
+        self.assertEqual(len(compute_selections_dealiased(where)), 1)
+
+    def test_no_dealiasing(self):
+        where = np.zeros((4, 3), dtype=bool)
+        self.assertEqual(compute_selections_dealiased(where), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -169,6 +169,19 @@ class TestOperators(unittest.TestCase):
 
         self.assertTrue(np.allclose(ma_py, ma_cy))
 
+    def test_fft2_many(self):
+        oper = create_oper(type_fft)
+        arr = np.array([oper.random_arrayX() for i in range(3)])
+
+        arr_fft = oper.fft2_many(arr)
+        for i in range(3):
+            self.assertTrue(np.allclose(arr_fft[i], oper.fft2(arr[i])))
+
+        back = np.empty_like(arr)
+        oper.ifft2_many(arr_fft, back)
+        for i in range(3):
+            self.assertTrue(np.allclose(back[i], oper.ifft2(arr_fft[i])))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,102 @@
+"""Ensemble of NS2D simulations (:mod:`fluidsim.solvers.ns2d.ensemble`)
+=====================================================================
+
+.. autoclass:: EnsembleNS2D
+   :members:
+   :private-members:
+
+Example::
+
+  from fluidsim.solvers.ns2d.solver import Simul
+  from fluidsim.solvers.ns2d.ensemble import EnsembleNS2D
+
+  params = Simul.create_default_params()
+  ...
+  ensemble = EnsembleNS2D(Simul, params, {'nu_8': [1., 2., 4., 8.]})
+  ensemble.start()
+
+"""
+from __future__ import division
+
+import numpy as np
+
+from fluidsim.base.ensemble import EnsembleBase
+from fluidsim.base.setofvariables import SetOfVariables
+
+
+class EnsembleNS2D(EnsembleBase):
+    """Ensemble of simulations of the solver ns2d.
+
+    The viscosities and `beta` can vary between the members.
+
+    """
+    _keys_params_members = EnsembleBase._keys_params_members + ('beta',)
+
+    def statephys_from_statefft(self):
+        """Compute `self.state_phys` from `self.state_fft`."""
+        oper = self.oper
+        rot_fft = self.state_fft.get_var('rot_fft')
+        state_phys = self.state_phys
+        # the transforms are written in the arrays of state_phys
+        self.ifft2_members(rot_fft, state_phys.get_var('rot'))
+        self.ifft2_members(
+            1j*oper.KY_over_K2*rot_fft, state_phys.get_var('ux'))
+        self.ifft2_members(
+            -1j*oper.KX_over_K2*rot_fft, state_phys.get_var('uy'))
+
+    def tendencies_nonlin(self, state_fft=None, out=None):
+        """Compute the nonlinear tendencies of all members.
+
+        Same computation as
+        :func:`fluidsim.solvers.ns2d.solver.Simul.tendencies_nonlin` with
+        arrays with a leading member axis.
+
+        """
+        oper = self.oper
+        ifft2_members = self.ifft2_members
+
+        if state_fft is None:
+            rot_fft = self.state_fft.get_var('rot_fft')
+            ux = self.state_phys.get_var('ux')
+            uy = self.state_phys.get_var('uy')
+        else:
+            rot_fft = state_fft.get_var('rot_fft')
+            ux = ifft2_members(1j*oper.KY_over_K2*rot_fft)
+            uy = ifft2_members(-1j*oper.KX_over_K2*rot_fft)
+
+        px_rot = ifft2_members(1j*oper.KX*rot_fft)
+        py_rot = ifft2_members(1j*oper.KY*rot_fft)
+
+        beta = self.get_param('beta')
+        if np.all(beta == 0):
+            Frot = -ux*px_rot - uy*py_rot
+        else:
+            Frot = -ux*px_rot - uy*(py_rot + beta)
+
+        if out is None:
+            tendencies_fft = SetOfVariables(like=self.state_fft)
+        else:
+            tendencies_fft = out
+        Frot_fft = self.fft2_members(Frot, tendencies_fft.get_var('rot_fft'))
+        self.dealiasing(Frot_fft)
+        return tendencies_fft
+
+    def compute_energy_members(self):
+        """Compute the spatially averaged energy of each member."""
+        oper = self.oper
+        rot_fft = self.state_fft.get_var('rot_fft')
+        energy_fft = np.abs(rot_fft)**2/(2*oper.K2_not0)
+        return np.array([oper.sum_wavenumbers(energy_fft_member)
+                         for energy_fft_member in energy_fft])
+
+    def _compute_deltat_CFL(self):
+        oper = self.oper
+        max_ux = abs(self.state_phys.get_var('ux')).reshape(
+            self.nb_members, -1).max(axis=1)
+        max_uy = abs(self.state_phys.get_var('uy')).reshape(
+            self.nb_members, -1).max(axis=1)
+        tmp = (max_ux/oper.deltax + max_uy/oper.deltay).max()
+        if tmp > 0:
+            return self.sim.time_stepping.CFL / tmp
+        else:
+            return self.deltat_max
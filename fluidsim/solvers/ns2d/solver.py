@@ -15,6 +15,8 @@ This module provides two classes defining the pseudo-spectral solver
 """
 from __future__ import division
 
+import numpy as np
+
 from fluidsim.base.setofvariables import SetOfVariables
 
 from fluidsim.base.solvers.pseudo_spect import (
@@ -23,6 +25,8 @@ from fluidsim.base.solvers.pseudo_spect import (
 from . import util_pythran
 
 compute_Frot = util_pythran.compute_Frot
+compute_vel_grad_rot_fft = util_pythran.compute_vel_grad_rot_fft
+compute_grad_rot_fft = util_pythran.compute_grad_rot_fft
 
 
 class InfoSolverNS2D(InfoSolverPseudoSpectral):
@@ -78,6 +82,10 @@ class Simul(SimulBasePseudoSpectral):
     """
     InfoSolver = InfoSolverNS2D
 
+    #: Use the fused computation of the nonlinear term (if the operators
+    #: provide `ifft2_many`).
+    USE_FUSED_NONLIN = True
+
     @staticmethod
     def _complete_params_with_default(params):
         """Complete the `params` container (static method)."""
@@ -85,7 +93,7 @@ class Simul(SimulBasePseudoSpectral):
         attribs = {'beta': 0.}
         params._set_attribs(attribs)
 
-    def tendencies_nonlin(self, state_fft=None):
+    def tendencies_nonlin(self, state_fft=None, out=None):
         r"""Compute the nonlinear tendencies.
 
         Parameters
@@ -102,6 +110,12 @@ class Simul(SimulBasePseudoSpectral):
             These two possibilities are used during the Runge-Kutta
             time-stepping.
 
+        out : :class:`fluidsim.base.setofvariables.SetOfVariables`
+            optional
+
+            Array in which the tendencies are stored. If not provided, a
+            new array is allocated.
+
         Returns
         -------
 
@@ -127,6 +141,12 @@ class Simul(SimulBasePseudoSpectral):
         fft2 = oper.fft2
         ifft2 = oper.ifft2
 
+        if self.USE_FUSED_NONLIN and hasattr(oper, 'ifft2_many'):
+            Frot = self._compute_Frot_fused(state_fft)
+            Frot_fft = fft2(Frot)
+            oper.dealiasing(Frot_fft)
+            return self._tendencies_from_Frot_fft(Frot_fft, out)
+
         # get or compute rot_fft, ux and uy
         if state_fft is None:
             rot_fft = self.state.state_fft.get_var('rot_fft')
@@ -143,6 +163,9 @@ class Simul(SimulBasePseudoSpectral):
         px_rot = ifft2(px_rot_fft)
         py_rot = ifft2(py_rot_fft)
 
+        # the pythran kernels only accept arrays in double precision
+        ux = np.asarray(ux, dtype=np.float64)
+        uy = np.asarray(uy, dtype=np.float64)
         Frot = compute_Frot(ux, uy, px_rot, py_rot, self.params.beta)
 
         # if self.params.beta == 0:
@@ -159,7 +182,13 @@ class Simul(SimulBasePseudoSpectral):
         #       ).format(self.oper.sum_wavenumbers(T_rot),
         #                self.oper.sum_wavenumbers(abs(T_rot)))
 
-        tendencies_fft = SetOfVariables(like=self.state.state_fft)
+        return self._tendencies_from_Frot_fft(Frot_fft, out)
+
+    def _tendencies_from_Frot_fft(self, Frot_fft, out):
+        if out is None:
+            tendencies_fft = SetOfVariables(like=self.state.state_fft)
+        else:
+            tendencies_fft = out
         tendencies_fft.set_var('rot_fft', Frot_fft)
 
         if self.params.FORCING:
@@ -167,6 +196,51 @@ class Simul(SimulBasePseudoSpectral):
 
         return tendencies_fft
 
+    def _get_buffers_nonlin(self):
+        """Return the buffers used by :func:`_compute_Frot_fused`."""
+        try:
+            return self._buffers_nonlin
+        except AttributeError:
+            oper = self.oper
+            self._buffers_nonlin = (
+                np.empty((4,) + tuple(oper.shapeK_loc), dtype=np.complex128),
+                np.empty((4,) + tuple(oper.shapeX_loc)))
+            return self._buffers_nonlin
+
+    def _compute_Frot_fused(self, state_fft=None):
+        """Compute the nonlinear term in physical space.
+
+        The 4 (or 2) fields in Fourier space are computed by one pythran
+        kernel in preallocated buffers and transformed by one call of
+        `oper.ifft2_many`.
+
+        """
+        oper = self.oper
+        fields_fft, fields = self._get_buffers_nonlin()
+
+        # the pythran kernels only accept arrays in double precision (no
+        # copy with params.precision = 'double')
+        if state_fft is None:
+            rot_fft = np.asarray(self.state.state_fft.get_var('rot_fft'),
+                                 dtype=np.complex128)
+            ux = np.asarray(self.state.state_phys.get_var('ux'),
+                            dtype=np.float64)
+            uy = np.asarray(self.state.state_phys.get_var('uy'),
+                            dtype=np.float64)
+            compute_grad_rot_fft(rot_fft, oper.KX, oper.KY, fields_fft[2:])
+            oper.ifft2_many(fields_fft[2:], fields[2:])
+        else:
+            rot_fft = np.asarray(state_fft.get_var('rot_fft'),
+                                 dtype=np.complex128)
+            compute_vel_grad_rot_fft(
+                rot_fft, oper.KX, oper.KY, oper.KX_over_K2, oper.KY_over_K2,
+                fields_fft)
+            oper.ifft2_many(fields_fft, fields)
+            ux = fields[0]
+            uy = fields[1]
+
+        return compute_Frot(ux, uy, fields[2], fields[3], self.params.beta)
+
 
 if __name__ == "__main__":
 
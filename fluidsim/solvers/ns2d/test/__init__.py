@@ -0,0 +1,28 @@
+from fluidsim.solvers.ns2d.solver import Simul
+
+
+def create_params_test(Simul=Simul, nh=32, init_fields='dipole',
+                       **kwargs_time_stepping):
+    """Create the parameters of a small simulation (without saving) used by
+    the tests. The parameters of the time stepping can be modified with the
+    keyword arguments."""
+    params = Simul.create_default_params()
+
+    params.short_name_type_run = 'test'
+
+    params.oper.nx = nh
+    params.oper.ny = nh
+    Lh = 6.
+    params.oper.Lx = Lh
+    params.oper.Ly = Lh
+    params.nu_8 = 2.
+
+    params.init_fields.type = init_fields
+    params.output.HAS_TO_SAVE = False
+
+    params.time_stepping.USE_CFL = False
+    params.time_stepping.deltat0 = 0.01
+    for key, value in kwargs_time_stepping.items():
+        params.time_stepping[key] = value
+
+    return params
@@ -0,0 +1,52 @@
+from __future__ import division
+
+import unittest
+import shutil
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.solvers.ns2d.ensemble import EnsembleNS2D
+
+from . import create_params_test
+
+
+def create_params(nu_8=2.):
+    params = create_params_test(USE_T_END=False, it_end=4)
+    params.nu_8 = nu_8
+    return params
+
+
+@unittest.skipIf(mpi.nb_proc > 1, 'The ensemble mode does not support MPI')
+class TestEnsembleNS2D(unittest.TestCase):
+
+    def test_members_equal_simuls(self):
+        """Each member should be equal to the corresponding simulation."""
+        values_nu_8 = [2., 20.]
+
+        with stdout_redirected():
+            ensemble = EnsembleNS2D(
+                Simul, create_params(), {'nu_8': values_nu_8})
+            ensemble.start()
+        shutil.rmtree(ensemble.sim.output.path_run)
+
+        self.assertEqual(ensemble.state_fft.shape[0], len(values_nu_8))
+        energies = ensemble.compute_energy_members()
+
+        for im, nu_8 in enumerate(values_nu_8):
+            with stdout_redirected():
+                sim = Simul(create_params(nu_8))
+                sim.time_stepping.start()
+            shutil.rmtree(sim.output.path_run)
+
+            state_fft_ref = sim.state.state_fft
+            state_fft = ensemble.state_fft[im]
+            self.assertLess(abs(state_fft - state_fft_ref).max(),
+                            1e-10*abs(state_fft_ref).max())
+            self.assertAlmostEqual(
+                energies[im] / sim.output.compute_energy(), 1.)
+
+
+if __name__ == '__main__':
+    unittest.main()
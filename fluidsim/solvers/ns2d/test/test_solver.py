@@ -13,6 +13,9 @@ from fluiddyn.io import stdout_redirected
 
 from fluidsim.solvers.ns2d.solver import Simul
 from fluidsim.solvers.ns2d.solver_fluidfft import Simul as Simul2
+from fluidsim.base.time_stepping import pseudo_spect_pythran
+
+from . import create_params_test
 
 
 class TestSolverNS2D(unittest.TestCase):
@@ -65,6 +68,198 @@ class TestSolverNS2D(unittest.TestCase):
         #            sim.oper.sum_wavenumbers(T_rot),
         #            sim.oper.sum_wavenumbers(abs(T_rot)))
 
+    def test_fused_nonlin(self):
+        """The fused and the former computations of the nonlinear term
+        should give the same tendencies."""
+        params = create_params_test(self.Simul, init_fields='noise')
+        with stdout_redirected():
+            self.sim = sim = self.Simul(params)
+        self.assertTrue(hasattr(sim.oper, 'ifft2_many'))
+
+        for beta in (0., 1.):
+            sim.params.beta = beta
+            # tendencies computed from state_fft and from the global state
+            for state_fft in (sim.state.state_fft, None):
+                tendencies = []
+                for use_fused in (True, False):
+                    sim.USE_FUSED_NONLIN = use_fused
+                    tendencies.append(
+                        sim.tendencies_nonlin(state_fft=state_fft).copy())
+                tend_fused, tend_ref = tendencies
+                self.assertLess(abs(tend_fused - tend_ref).max(),
+                                1e-13*abs(tend_ref).max())
+
+    def _compare_time_stepping(self, type_time_scheme_ref='RK4', rtol=1e-10,
+                               **kwargs_time_stepping):
+        """Compare the states obtained with the default time stepping and
+        with the time stepping modified by *kwargs_time_stepping*."""
+        sims = []
+        for kwargs in ({}, kwargs_time_stepping):
+            params = create_params_test(
+                self.Simul, USE_T_END=False, it_end=4,
+                type_time_scheme=type_time_scheme_ref)
+            for key, value in kwargs.items():
+                params.time_stepping[key] = value
+
+            with stdout_redirected():
+                sim = self.Simul(params)
+                sim.time_stepping.start()
+            sims.append(sim)
+
+        if mpi.rank == 0:
+            for sim in sims:
+                shutil.rmtree(sim.output.path_run)
+
+        state_fft_ref, state_fft = [sim.state.state_fft for sim in sims]
+        self.assertLess(abs(state_fft - state_fft_ref).max(),
+                        rtol*abs(state_fft_ref).max())
+
+    def test_inplace_time_stepping(self):
+        """The in-place and the default schemes should give the same state."""
+        self._compare_time_stepping(USE_INPLACE=True)
+
+    @unittest.skipIf(not hasattr(pseudo_spect_pythran, '__pythran__'),
+                     'pseudo_spect_pythran is not pythranized')
+    def test_pythran_kernels(self):
+        """The fused kernels should give the same state."""
+        for type_time_scheme in ('RK2', 'RK4'):
+            self._compare_time_stepping(
+                type_time_scheme, type_kernels='pythran')
+
+    def test_low_storage_time_stepping(self):
+        """The low-storage schemes should be close to the RK4 scheme."""
+        for type_time_scheme in ('RK3_2N', 'RK4_2N'):
+            self._compare_time_stepping(
+                rtol=1e-5, type_time_scheme=type_time_scheme)
+
+    def test_low_storage_exact_coefs(self):
+        """The exponentials of the low-storage scheme should be computed
+        once for a constant time step."""
+        params = create_params_test(
+            self.Simul, USE_T_END=False, it_end=4, type_time_scheme='RK4_2N')
+        with stdout_redirected():
+            self.sim = sim = self.Simul(params)
+
+        time_stepping = sim.time_stepping
+        get_exact_coefs = time_stepping._get_exact_coefs_RK_2N
+        nb_computations = [0]
+
+        def get_exact_coefs_counted(dt):
+            if dt != time_stepping._deltat_exact_coefs_RK_2N:
+                nb_computations[0] += 1
+            return get_exact_coefs(dt)
+
+        time_stepping._get_exact_coefs_RK_2N = get_exact_coefs_counted
+        with stdout_redirected():
+            time_stepping.start()
+
+        self.assertEqual(nb_computations[0], 1)
+        dt = time_stepping.deltat
+        for delta_c, exact in time_stepping._exact_coefs_RK_2N.items():
+            self.assertTrue(np.allclose(
+                exact, np.exp(-delta_c*dt*time_stepping.freq_lin)))
+
+    @staticmethod
+    def _count_evaluations(sim):
+        """Count the evaluations of the tendencies by the time stepping."""
+        time_stepping = sim.time_stepping
+        tendencies_nonlin = time_stepping._tendencies_nonlin_inplace
+        nb_evaluations = [0]
+
+        def tendencies_nonlin_counted(state_fft=None, out=None):
+            nb_evaluations[0] += 1
+            return tendencies_nonlin(state_fft, out=out)
+
+        time_stepping._tendencies_nonlin_inplace = tendencies_nonlin_counted
+        return nb_evaluations
+
+    def test_adaptive_time_stepping(self):
+        """The adaptive scheme RK23 should be close to a fine RK4."""
+        sims = []
+        for type_time_scheme in ('RK23', 'RK4'):
+            params = create_params_test(
+                self.Simul, USE_T_END=False,
+                type_time_scheme=type_time_scheme)
+            if type_time_scheme == 'RK23':
+                params.time_stepping.it_end = 5
+                params.time_stepping.adaptive.rtol = 1e-8
+            else:
+                nb_steps = 50
+                params.time_stepping.deltat0 = sims[0].time_stepping.t / \
+                    nb_steps
+                params.time_stepping.it_end = nb_steps
+
+            with stdout_redirected():
+                sim = self.Simul(params)
+                if type_time_scheme == 'RK23':
+                    nb_evaluations = self._count_evaluations(sim)
+                sim.time_stepping.start()
+            sims.append(sim)
+
+        if mpi.rank == 0:
+            for sim in sims:
+                shutil.rmtree(sim.output.path_run)
+
+        # first same as last: 3 evaluations per trial (+ 1 for the first)
+        time_stepping = sims[0].time_stepping
+        self.assertEqual(
+            nb_evaluations[0],
+            1 + 3*(time_stepping.it + time_stepping.nb_steps_rejected))
+
+        state_fft, state_fft_ref = [sim.state.state_fft for sim in sims]
+        self.assertLess(abs(state_fft - state_fft_ref).max(),
+                        1e-5*abs(state_fft_ref).max())
+
+    def test_single_precision(self):
+        """The energy statistics in single precision should be close to the
+        ones in double precision."""
+        sims = []
+        for precision in ('double', 'single'):
+            params = create_params_test(
+                self.Simul, USE_T_END=False, it_end=10)
+            params.precision = precision
+
+            with stdout_redirected():
+                sim = self.Simul(params)
+                sim.time_stepping.start()
+            sims.append(sim)
+
+        if mpi.rank == 0:
+            for sim in sims:
+                shutil.rmtree(sim.output.path_run)
+
+        sim_ref, sim = sims
+        self.assertEqual(sim.state.state_fft.dtype, np.complex64)
+        self.assertEqual(sim.state.state_phys.dtype, np.float32)
+
+        for key in ('energy', 'enstrophy'):
+            value_ref, value = [
+                getattr(s.output, 'compute_' + key)() for s in sims]
+            self.assertTrue(np.allclose(value, value_ref, rtol=1e-4))
+
+    def test_deltat_ladder(self):
+        """The time steps should be on the ladder and the coefs cached."""
+        params = create_params_test(
+            self.Simul, init_fields='noise', USE_CFL=True, USE_T_END=False,
+            it_end=10, USE_DELTAT_LADDER=True)
+
+        with stdout_redirected():
+            self.sim = sim = self.Simul(params)
+            sim.time_stepping.start()
+
+        time_stepping = sim.time_stepping
+        ratio = params.time_stepping.deltat_ladder_ratio
+        index = np.log(time_stepping.deltat_max / time_stepping.deltat) / \
+            np.log(ratio)
+        self.assertAlmostEqual(index, round(index))
+
+        coefs = time_stepping.exact_linear_coefs
+        self.assertGreater(coefs.nb_cache_misses, 0)
+        self.assertLessEqual(coefs.nb_cache_hits + coefs.nb_cache_misses,
+                             params.time_stepping.it_end)
+        self.assertTrue(np.allclose(
+            coefs.exact2, np.exp(-time_stepping.deltat/2*coefs.freq_lin)))
+
     def test_forcing(self):
 
         params = self.Simul.create_default_params()
@@ -1,3 +1,8 @@
+# The loops over the rows are parallelized with OpenMP if the extension is
+# compiled with OpenMP (environment variable FLUIDSIM_OPENMP set during the
+# build, number of threads given by params.oper.nb_threads).
+
+import numpy as np
 
 
 # pythran export compute_Frot(
@@ -5,7 +10,38 @@
 
 
 def compute_Frot(ux, uy, px_rot, py_rot, beta):
-    if beta == 0:
-        return -ux*px_rot - uy*py_rot
-    else:
-        return -ux*px_rot - uy*(py_rot + beta)
+    Frot = np.empty_like(ux)
+    #omp parallel for
+    for i0 in range(ux.shape[0]):
+        if beta == 0:
+            Frot[i0] = -ux[i0]*px_rot[i0] - uy[i0]*py_rot[i0]
+        else:
+            Frot[i0] = -ux[i0]*px_rot[i0] - uy[i0]*(py_rot[i0] + beta)
+    return Frot
+
+
+# pythran export compute_vel_grad_rot_fft(
+#     complex128[][], float64[][], float64[][], float64[][], float64[][],
+#     complex128[][][])
+
+
+def compute_vel_grad_rot_fft(rot_fft, KX, KY, KX_over_K2, KY_over_K2, out):
+    """Compute ux_fft, uy_fft, px_rot_fft and py_rot_fft in out[0:4]."""
+    #omp parallel for
+    for i0 in range(rot_fft.shape[0]):
+        out[0, i0] = 1j*KY_over_K2[i0]*rot_fft[i0]
+        out[1, i0] = -1j*KX_over_K2[i0]*rot_fft[i0]
+        out[2, i0] = 1j*KX[i0]*rot_fft[i0]
+        out[3, i0] = 1j*KY[i0]*rot_fft[i0]
+
+
+# pythran export compute_grad_rot_fft(
+#     complex128[][], float64[][], float64[][], complex128[][][])
+
+
+def compute_grad_rot_fft(rot_fft, KX, KY, out):
+    """Compute px_rot_fft and py_rot_fft in out[0:2]."""
+    #omp parallel for
+    for i0 in range(rot_fft.shape[0]):
+        out[0, i0] = 1j*KX[i0]*rot_fft[i0]
+        out[1, i0] = 1j*KY[i0]*rot_fft[i0]
@@ -105,10 +105,13 @@ class Simul(SimulBasePseudoSpectral):
         """
         SimulBasePseudoSpectral._complete_params_with_default(params)
 
-    def tendencies_nonlin(self, state_fft=None):
+    def tendencies_nonlin(self, state_fft=None, out=None):
+        """Compute the nonlinear tendencies.
+
+        If the array `out` is provided, the tendencies are stored in it.
+
+        """
         oper = self.oper
-        fft3d = oper.fft3d
-        ifft3d = oper.ifft3d
 
         if state_fft is None:
             vx = self.state.state_phys.get_var('vx')
@@ -120,26 +123,19 @@ class Simul(SimulBasePseudoSpectral):
             vx_fft = state_fft.get_var('vx_fft')
             vy_fft = state_fft.get_var('vy_fft')
             vz_fft = state_fft.get_var('vz_fft')
-            vx = ifft3d(vx_fft)
-            vy = ifft3d(vy_fft)
-            vz = ifft3d(vz_fft)
+            vx, vy, vz = oper.ifft3d_many(state_fft)
 
-        Fvx, Fvy, Fvz = oper.vgradv_from_v(
-            vx, vy, vz, vx_fft, vy_fft, vz_fft)
+        Fv = oper.vgradv_from_v(vx, vy, vz, vx_fft, vy_fft, vz_fft)
 
-        Fvx_fft = fft3d(Fvx)
-        Fvy_fft = fft3d(Fvy)
-        Fvz_fft = fft3d(Fvz)
-
-        oper.project_perpk3d(Fvx_fft, Fvy_fft, Fvz_fft)
-
-        tendencies_fft = SetOfVariables(
-            like=self.state.state_fft,
-            info='tendencies_nonlin')
+        if out is None:
+            tendencies_fft = SetOfVariables(
+                like=self.state.state_fft,
+                info='tendencies_nonlin')
+        else:
+            tendencies_fft = out
 
-        tendencies_fft.set_var('vx_fft', Fvx_fft)
-        tendencies_fft.set_var('vy_fft', Fvy_fft)
-        tendencies_fft.set_var('vz_fft', Fvz_fft)
+        oper.fft3d_many(Fv, tendencies_fft)
+        oper.project_perpk3d(*tendencies_fft)
 
         if self.params.FORCING:
             tendencies_fft += self.forcing.get_forcing()
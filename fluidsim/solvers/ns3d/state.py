@@ -6,6 +6,7 @@ import numpy as np
 
 
 from fluidsim.base.state import StatePseudoSpectral
+from fluidsim.base.setofvariables import SetOfVariables
 
 from fluiddyn.util import mpi
 
@@ -60,22 +61,18 @@ class StateNS3D(StatePseudoSpectral):
         return result
 
     def statephys_from_statefft(self):
-        vx_fft = self.state_fft.get_var('vx_fft')
-        vy_fft = self.state_fft.get_var('vy_fft')
-        vz_fft = self.state_fft.get_var('vz_fft')
-
-        self.state_phys.set_var('vx', self.oper.ifft3d(vx_fft))
-        self.state_phys.set_var('vy', self.oper.ifft3d(vy_fft))
-        self.state_phys.set_var('vz', self.oper.ifft3d(vz_fft))
+        self.oper.ifft3d_many(self.state_fft, self.state_phys)
 
     def statefft_from_statephys(self):
-        vx = self.state_phys.get_var('vx')
-        vy = self.state_phys.get_var('vy')
-        vz = self.state_phys.get_var('vz')
-
-        self.state_fft.set_var('vx_fft', self.oper.fft3d(vx))
-        self.state_fft.set_var('vy_fft', self.oper.fft3d(vy))
-        self.state_fft.set_var('vz_fft', self.oper.fft3d(vz))
+        self.oper.fft3d_many(self.state_phys, self.state_fft)
+
+    def return_statephys_from_statefft(self, state_fft=None):
+        """Return the state in physical space."""
+        if state_fft is None:
+            state_fft = self.state_fft
+        state_phys = SetOfVariables(like=self.state_phys)
+        self.oper.ifft3d_many(state_fft, state_phys)
+        return state_phys
 
     def init_from_vxvyfft(self, vx_fft, vy_fft):
         self.state_fft.set_var('vx_fft', vx_fft)
@@ -35,6 +35,9 @@ class CorrelationsFreq(SpecificOutput):
 
     _tag = 'correl_freq'
     _name_file = _tag + '.h5'
+    # the period is a number of time steps: online_save is called at each
+    # time step
+    _attribs_online = {}
 
     @staticmethod
     def _complete_params_with_default(params):
@@ -87,9 +90,11 @@ class CorrelationsFreq(SpecificOutput):
                 link_corr4 = f['corr4']
                 link_corr2 = f['corr2']
                 link_nb_means = f['nb_means']
-                self.corr4 = link_corr4[-1]
-                self.corr2 = link_corr2[-1]
-                self.nb_means_times = link_nb_means[-1]
+                # the datasets can be preallocated (see hdf5_layout)
+                it_last = f['times'].shape[0] - 1
+                self.corr4 = link_corr4[it_last]
+                self.corr2 = link_corr2[it_last]
+                self.nb_means_times = link_nb_means[it_last]
                 self.periods_fill = f['periods_fill'][...]
                 if self.sim.time_stepping.deltat != f['deltat'][...]:
                     raise ValueError()
@@ -388,16 +393,18 @@ class CorrelationsFreq(SpecificOutput):
 
     def _compute_norm_pick_corr4(self):
         with h5py.File(self.path_file, 'r') as f:
-            corr4 = f['corr4'][:]
-            nb_means = f['nb_means'][:]
+            nt = f['times'].shape[0]
+            corr4 = f['corr4'][:nt]
+            nb_means = f['nb_means'][:nt]
         fcorr4 = self._compute_norm_pick_corr4_from_corr4(corr4)
 
         return nb_means, fcorr4
 
     def _compute_dnormpickC4_over_dnbmean(self):
         with h5py.File(self.path_file, 'r') as f:
-            corr4 = f['corr4'][:]
-            nb_means = f['nb_means'][:]
+            nt = f['times'].shape[0]
+            corr4 = f['corr4'][:nt]
+            nb_means = f['nb_means'][:nt]
 
         fcorr4 = self._compute_norm_pick_corr4_from_corr4(corr4)
 
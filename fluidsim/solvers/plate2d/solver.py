@@ -166,8 +166,12 @@ class Simul(SimulBasePseudoSpectral):
         attribs = {'beta': 0.}
         params._set_attribs(attribs)
 
-    def tendencies_nonlin(self, state_fft=None):
-        """Compute the "nonlinear" tendencies."""
+    def tendencies_nonlin(self, state_fft=None, out=None):
+        """Compute the "nonlinear" tendencies.
+
+        If `out` is given, the tendencies are stored in this array instead
+        of in a newly allocated one.
+        """
         oper = self.oper
 
         if state_fft is None:
@@ -186,9 +190,12 @@ class Simul(SimulBasePseudoSpectral):
         oper.dealiasing(F_fft)
         oper.dealiasing(w_fft)
 
-        tendencies_fft = SetOfVariables(
-            like=self.state.state_fft,
-            info='tendencies_nonlin')
+        if out is None:
+            tendencies_fft = SetOfVariables(
+                like=self.state.state_fft,
+                info='tendencies_nonlin')
+        else:
+            tendencies_fft = out
 
         tendencies_fft.set_var('w_fft', F_fft)
         tendencies_fft.set_var('z_fft', w_fft)
@@ -0,0 +1,144 @@
+"""Ensemble of SW1L simulations (:mod:`fluidsim.solvers.sw1l.ensemble`)
+=====================================================================
+
+.. autoclass:: EnsembleSW1L
+   :members:
+   :private-members:
+
+Example::
+
+  from fluidsim.solvers.sw1l.solver import Simul
+  from fluidsim.solvers.sw1l.ensemble import EnsembleSW1L
+
+  params = Simul.create_default_params()
+  ...
+  ensemble = EnsembleSW1L(Simul, params, {'f': [0., 1., 2., 4.]})
+  ensemble.start()
+
+"""
+from __future__ import division
+
+from math import pi
+
+import numpy as np
+
+from fluidsim.base.ensemble import EnsembleBase
+from fluidsim.base.setofvariables import SetOfVariables
+
+
+class EnsembleSW1L(EnsembleBase):
+    """Ensemble of simulations of the solver sw1l.
+
+    The viscosities, `f` and `c2` can vary between the members. All members
+    start from the initial state of the simulation created with `params`
+    (for example, the surface displacement of the initial fields computed
+    with `params.f` and `params.c2`).
+
+    """
+    _keys_params_members = EnsembleBase._keys_params_members + ('f', 'c2')
+
+    def __init__(self, Simul, params, params_members):
+        if params.beta != 0:
+            raise ValueError(
+                'The ensemble mode of sw1l does not support beta != 0.')
+        super(EnsembleSW1L, self).__init__(Simul, params, params_members)
+
+    def statephys_from_statefft(self):
+        """Compute `self.state_phys` from `self.state_fft`."""
+        self._statephys_from_statefft(self.state_fft, self.state_phys)
+
+    def _statephys_from_statefft(self, state_fft, state_phys):
+        oper = self.oper
+        ifft2_members = self.ifft2_members
+        ux_fft = state_fft.get_var('ux_fft')
+        uy_fft = state_fft.get_var('uy_fft')
+        state_phys.set_var('ux', ifft2_members(ux_fft))
+        state_phys.set_var('uy', ifft2_members(uy_fft))
+        state_phys.set_var('eta', ifft2_members(
+            state_fft.get_var('eta_fft')))
+        state_phys.set_var('rot', ifft2_members(
+            1j*(oper.KX*uy_fft - oper.KY*ux_fft)))
+
+    def tendencies_nonlin(self, state_fft=None, out=None):
+        """Compute the nonlinear tendencies of all members.
+
+        Same computation as
+        :func:`fluidsim.solvers.sw1l.solver.Simul.tendencies_nonlin` with
+        arrays with a leading member axis.
+
+        """
+        oper = self.oper
+        fft2_members = self.fft2_members
+
+        if state_fft is None:
+            state_phys = self.state_phys
+        else:
+            state_phys = SetOfVariables(like=self.state_phys)
+            self._statephys_from_statefft(state_fft, state_phys)
+
+        ux = state_phys.get_var('ux')
+        uy = state_phys.get_var('uy')
+        eta = state_phys.get_var('eta')
+        rot = state_phys.get_var('rot')
+
+        f = self.get_param('f')
+        if np.all(f == 0):
+            rot_abs = rot
+        else:
+            rot_abs = rot + f
+
+        F1x = rot_abs*uy
+        F1y = -rot_abs*ux
+        tmp_fft = fft2_members(self.get_param('c2')*eta + (ux**2 + uy**2)/2)
+        gradx_fft = 1j*oper.KX*tmp_fft
+        grady_fft = 1j*oper.KY*tmp_fft
+        self.dealiasing(gradx_fft, grady_fft)
+        Fx_fft = fft2_members(F1x) - gradx_fft
+        Fy_fft = fft2_members(F1y) - grady_fft
+
+        Feta_fft = -1j*(oper.KX*fft2_members((eta + 1)*ux) +
+                        oper.KY*fft2_members((eta + 1)*uy))
+
+        if out is None:
+            tendencies_fft = SetOfVariables(
+                like=self.state_fft, info='tendencies_nonlin')
+        else:
+            tendencies_fft = out
+        tendencies_fft.set_var('ux_fft', Fx_fft)
+        tendencies_fft.set_var('uy_fft', Fy_fft)
+        tendencies_fft.set_var('eta_fft', Feta_fft)
+
+        self.dealiasing(tendencies_fft)
+        return tendencies_fft
+
+    def compute_energy_members(self):
+        """Compute the spatially averaged quadratic energy of each member."""
+        oper = self.oper
+        state_fft = self.state_fft
+        energy_fft = (
+            np.abs(state_fft.get_var('ux_fft'))**2 +
+            np.abs(state_fft.get_var('uy_fft'))**2 +
+            self.get_param('c2')*np.abs(state_fft.get_var('eta_fft'))**2)/2
+        return np.array([oper.sum_wavenumbers(energy_fft_member)
+                         for energy_fft_member in energy_fft])
+
+    def _compute_deltat_CFL(self):
+        oper = self.oper
+        params = self.params
+        CFL = self.sim.time_stepping.CFL
+
+        max_ux = abs(self.state_phys.get_var('ux')).reshape(
+            self.nb_members, -1).max(axis=1)
+        max_uy = abs(self.state_phys.get_var('uy')).reshape(
+            self.nb_members, -1).max(axis=1)
+        tmp = (max_ux/oper.deltax + max_uy/oper.deltay).max()
+        if tmp > 0:
+            deltat_CFL = CFL / tmp
+        else:
+            deltat_CFL = self.deltat_max
+
+        Lh = max(params.oper.Lx, params.oper.Ly)
+        k_min = 2*pi/Lh
+        c = np.sqrt(self.get_param('f')**2/k_min**2 + self.get_param('c2'))
+        deltat_wave = CFL*min(oper.deltax, oper.deltay)/np.max(c)
+        return min(deltat_CFL, deltat_wave)
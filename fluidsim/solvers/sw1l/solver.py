@@ -5,6 +5,9 @@
 from __future__ import division
 
 from past.utils import old_div
+
+import numpy as np
+
 from fluidsim.base.setofvariables import SetOfVariables
 from fluidsim.base.solvers.pseudo_spect import (
     SimulBasePseudoSpectral, InfoSolverPseudoSpectral)
@@ -66,9 +69,17 @@ class Simul(SimulBasePseudoSpectral):
                 'c2 = {0:6.5g} ; f = {1:6.5g} ; kd2 = {2:6.5g}'.format(
                     params.c2, params.f, params.kd2))
 
-    def tendencies_nonlin(self, state_fft=None):
+    def _get_buffer_nonlin(self):
+        """Return the buffer of 5 fields used in `tendencies_nonlin`."""
+        try:
+            return self._buffer_nonlin
+        except AttributeError:
+            self._buffer_nonlin = np.empty(
+                (5,) + tuple(self.oper.shapeX_loc))
+            return self._buffer_nonlin
+
+    def tendencies_nonlin(self, state_fft=None, out=None):
         oper = self.oper
-        fft2 = oper.fft2
 
         if state_fft is None:
             state_phys = self.state.state_phys
@@ -87,20 +98,30 @@ class Simul(SimulBasePseudoSpectral):
         if self.params.beta != 0:
             rot_abs += self.params.beta * oper.YY
 
-        F1x = rot_abs*uy
-        F1y = -rot_abs*ux
-        gradx_fft, grady_fft = oper.gradfft_from_fft(
-            fft2(self.params.c2*eta + old_div((ux**2+uy**2),2)))
+        # the 5 fields are transformed with one call of fft2_many
+        fields = self._get_buffer_nonlin()
+        fields[0] = self.params.c2*eta + old_div((ux**2+uy**2),2)
+        np.multiply(rot_abs, uy, out=fields[1])
+        np.multiply(rot_abs, ux, out=fields[2])
+        fields[2] *= -1
+        np.add(eta, 1, out=fields[4])
+        np.multiply(fields[4], ux, out=fields[3])
+        fields[4] *= uy
+        fields_fft = oper.fft2_many(fields)
+
+        gradx_fft, grady_fft = oper.gradfft_from_fft(fields_fft[0])
         oper.dealiasing(gradx_fft, grady_fft)
-        Fx_fft = fft2(F1x) - gradx_fft
-        Fy_fft = fft2(F1y) - grady_fft
+        Fx_fft = fields_fft[1] - gradx_fft
+        Fy_fft = fields_fft[2] - grady_fft
 
-        Feta_fft = -oper.divfft_from_vecfft(fft2((eta+1)*ux),
-                                            fft2((eta+1)*uy))
+        Feta_fft = -oper.divfft_from_vecfft(fields_fft[3], fields_fft[4])
 
-        tendencies_fft = SetOfVariables(
-            like=self.state.state_fft,
-            info='tendencies_nonlin')
+        if out is None:
+            tendencies_fft = SetOfVariables(
+                like=self.state.state_fft,
+                info='tendencies_nonlin')
+        else:
+            tendencies_fft = out
         tendencies_fft.set_var('ux_fft', Fx_fft)
         tendencies_fft.set_var('uy_fft', Fy_fft)
         tendencies_fft.set_var('eta_fft', Feta_fft)
@@ -115,8 +136,6 @@ class Simul(SimulBasePseudoSpectral):
 
 if __name__ == "__main__":
 
-    import numpy as np
-
     import fluiddyn as fld
 
     params = Simul.create_default_params()
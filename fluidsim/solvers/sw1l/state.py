@@ -109,42 +109,27 @@ class StateSW1L(StatePseudoSpectral):
 
     def statefft_from_statephys(self):
         """Compute the state in Fourier space."""
-        ux = self.state_phys.get_var('ux')
-        uy = self.state_phys.get_var('uy')
-        eta = self.state_phys.get_var('eta')
-        self.state_fft.set_var('ux_fft', self.oper.fft2(ux))
-        self.state_fft.set_var('uy_fft', self.oper.fft2(uy))
-        self.state_fft.set_var('eta_fft', self.oper.fft2(eta))
+        # ux, uy and eta are the 3 first variables of state_phys
+        self.oper.fft2_many(self.state_phys[:3], self.state_fft)
 
     def statephys_from_statefft(self):
         """Compute the state in physical space."""
-        ifft2 = self.oper.ifft2
-        ux_fft = self.state_fft.get_var('ux_fft')
-        uy_fft = self.state_fft.get_var('uy_fft')
-        eta_fft = self.state_fft.get_var('eta_fft')
-        self.state_phys.set_var('ux', ifft2(ux_fft))
-        self.state_phys.set_var('uy', ifft2(uy_fft))
-        self.state_phys.set_var('eta', ifft2(eta_fft))
-        rot_fft = self.oper.rotfft_from_vecfft(ux_fft, uy_fft)
-        self.state_phys.set_var('rot', ifft2(rot_fft))
+        self._statephys_from_statefft(self.state_fft, self.state_phys)
 
     def return_statephys_from_statefft(self, state_fft=None):
         """Return the state in physical space."""
-        ifft2 = self.oper.ifft2
         if state_fft is None:
             state_fft = self.state_fft
-        ux_fft = state_fft.get_var('ux_fft')
-        uy_fft = state_fft.get_var('uy_fft')
-        eta_fft = state_fft.get_var('eta_fft')
         state_phys = SetOfVariables(like=self.state_phys)
-        state_phys.set_var('ux', ifft2(ux_fft))
-        state_phys.set_var('uy', ifft2(uy_fft))
-        state_phys.set_var('eta', ifft2(eta_fft))
+        self._statephys_from_statefft(state_fft, state_phys)
+        return state_phys
 
+    def _statephys_from_statefft(self, state_fft, state_phys):
+        ux_fft = state_fft.get_var('ux_fft')
+        uy_fft = state_fft.get_var('uy_fft')
+        self.oper.ifft2_many(state_fft, state_phys[:3])
         rot_fft = self.oper.rotfft_from_vecfft(ux_fft, uy_fft)
-        state_phys.set_var('rot', ifft2(rot_fft))
-
-        return state_phys
+        state_phys.set_var('rot', self.oper.ifft2(rot_fft))
 
     def init_statefft_from(self, **kwargs):
         if len(kwargs) == 1:
@@ -0,0 +1,69 @@
+from __future__ import division
+
+import unittest
+import shutil
+
+import numpy as np
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.sw1l.solver import Simul
+from fluidsim.solvers.sw1l.ensemble import EnsembleSW1L
+from fluidsim.solvers.ns2d.test import create_params_test
+
+
+def create_params(f=1., c2=100.):
+    params = create_params_test(
+        Simul, USE_T_END=False, it_end=4, deltat0=0.005)
+    params.f = f
+    params.c2 = c2
+    return params
+
+
+def compute_energy(sim):
+    """Quadratic energy (as in EnsembleSW1L.compute_energy_members)."""
+    state = sim.state
+    energy_fft = (np.abs(state('ux_fft'))**2 + np.abs(state('uy_fft'))**2 +
+                  sim.params.c2*np.abs(state('eta_fft'))**2)/2
+    return sim.oper.sum_wavenumbers(energy_fft)
+
+
+@unittest.skipIf(mpi.nb_proc > 1, 'The ensemble mode does not support MPI')
+class TestEnsembleSW1L(unittest.TestCase):
+
+    def test_members_equal_simuls(self):
+        """Each member should be equal to the corresponding simulation."""
+        params_members = {'f': [0., 1., 2.], 'c2': [100., 200., 100.],
+                          'nu_8': [2., 2., 20.]}
+
+        with stdout_redirected():
+            ensemble = EnsembleSW1L(Simul, create_params(), params_members)
+            ensemble.start()
+        shutil.rmtree(ensemble.sim.output.path_run)
+
+        self.assertEqual(ensemble.state_fft.shape[0], 3)
+        energies = ensemble.compute_energy_members()
+
+        for im in range(3):
+            params = create_params(params_members['f'][im],
+                                   params_members['c2'][im])
+            params.nu_8 = params_members['nu_8'][im]
+            with stdout_redirected():
+                sim = Simul(params)
+                # the initial state depends on f and c2 (balanced eta) and
+                # the members start from the state of the template
+                sim.state.state_fft[:] = ensemble.sim.state.state_fft
+                sim.state.statephys_from_statefft()
+                sim.time_stepping.start()
+            shutil.rmtree(sim.output.path_run)
+
+            state_fft_ref = sim.state.state_fft
+            state_fft = ensemble.state_fft[im]
+            self.assertLess(abs(state_fft - state_fft_ref).max(),
+                            1e-10*abs(state_fft_ref).max())
+            self.assertAlmostEqual(energies[im] / compute_energy(sim), 1.)
+
+
+if __name__ == '__main__':
+    unittest.main()
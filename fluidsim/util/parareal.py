@@ -0,0 +1,325 @@
+"""Parallel-in-time integration (:mod:`fluidsim.util.parareal`)
+===============================================================
+
+Provides:
+
+.. autoclass:: Parareal
+   :members:
+
+The Parareal algorithm (Lions, Maday & Turinici, 2001) splits the time
+interval in windows. A cheap coarse propagator :math:`G` is applied
+sequentially over the windows and the fine propagator :math:`F` (the
+simulation as defined by `params`) is computed in parallel over the windows
+with a pool of processes. At the iteration :math:`k`, the state at the
+beginning of the window :math:`n+1` is corrected as
+
+.. math::
+
+   U_{n+1}^{k+1} = G(U_n^{k+1}) + F(U_n^k) - G(U_n^k).
+
+The coarse propagator uses a coarser resolution (the states are transferred
+with the functions `coarse_seq_from_fft_loc` and `fft_loc_from_coarse_seq` of
+the operators) and possibly a cheaper time scheme and a larger time step.
+
+The driver works without MPI on one multi-core computer (the processes are
+forked). The fine propagators have to be deterministic, so random forcing
+can not be used.
+
+Example::
+
+  from fluidsim.solvers.ns2d.solver import Simul
+  from fluidsim.util.parareal import Parareal
+
+  params = Simul.create_default_params()
+  ...
+  params.time_stepping.USE_CFL = False
+  params.time_stepping.deltat0 = 1e-3
+  params.time_stepping.t_end = 10.
+
+  parareal = Parareal(Simul, params, nb_windows=8, coef_coarse=2)
+  parareal.run()
+  sim = parareal.sim
+
+"""
+
+from __future__ import division, print_function
+
+from builtins import range
+from builtins import object
+from copy import deepcopy
+from time import time
+import multiprocessing
+
+import numpy as np
+
+from fluiddyn.util import mpi
+from fluiddyn.io import stdout_redirected
+
+
+def _create_sim_helper(Simul, params):
+    """Create a simulation used only as a propagator."""
+    with stdout_redirected():
+        sim = Simul(params)
+        sim.output.init_with_initialized_state()
+    return sim
+
+
+def _propagate(sim, state_fft, t_start, nb_steps):
+    """Advance *state_fft* of *nb_steps* time steps from *t_start*."""
+    sim.state.state_fft[:] = state_fft
+    sim.state.statephys_from_statefft()
+    time_stepping = sim.time_stepping
+    time_stepping.t = t_start
+    time_stepping.it = 0
+    for it in range(nb_steps):
+        time_stepping.one_time_step()
+    return np.array(sim.state.state_fft)
+
+
+# global variables of the worker processes
+_sim_fine = None
+_nb_steps_fine = None
+
+
+def _init_worker(Simul, params, nb_steps):
+    global _sim_fine, _nb_steps_fine
+    _sim_fine = _create_sim_helper(Simul, params)
+    _nb_steps_fine = nb_steps
+
+
+def _propagate_fine_worker(args):
+    state_fft, t_start = args
+    return _propagate(_sim_fine, state_fft, t_start, _nb_steps_fine)
+
+
+def _norm(state_fft):
+    return np.sqrt((abs(state_fft)**2).sum())
+
+
+class Parareal(object):
+    """Parareal driver over a Simul class.
+
+    Parameters
+    ----------
+
+    Simul : class
+
+      The Simul class of a 2D pseudo-spectral solver (for example ns2d or
+      sw1l).
+
+    params : :class:`fluidsim.base.params.Parameters`
+
+      Parameters of the fine simulation. The time step has to be constant
+      (`params.time_stepping.USE_CFL = False`) and the simulation is run
+      till `params.time_stepping.t_end`.
+
+    nb_windows : int
+
+      Number of time windows.
+
+    coef_coarse : int
+
+      Ratio between the resolutions of the fine and coarse propagators.
+
+    type_time_scheme_coarse : str
+
+      Time scheme of the coarse propagator.
+
+    deltat_coarse : float
+
+      Time step of the coarse propagator (by default, the fine time step
+      multiplied by `coef_coarse`).
+
+    nb_processes : int
+
+      Number of processes of the pool (by default, the number of cores).
+
+    tolerance : float
+
+      The iterations are stopped when the maximum relative correction of the
+      states at the beginning of the windows is smaller than this value.
+
+    nb_iterations_max : int
+
+      Maximum number of iterations (by default `nb_windows`, for which the
+      result is equal to the one of the fine simulation).
+
+    """
+    def __init__(self, Simul, params, nb_windows, coef_coarse=2,
+                 type_time_scheme_coarse='RK2', deltat_coarse=None,
+                 nb_processes=None, tolerance=1e-6, nb_iterations_max=None):
+
+        if mpi.nb_proc > 1:
+            raise ValueError('Parareal has to be used without MPI.')
+
+        params_ts = params.time_stepping
+        if params_ts.USE_CFL:
+            raise ValueError(
+                'Parareal needs a constant time step '
+                '(params.time_stepping.USE_CFL = False).')
+
+        self.Simul = Simul
+        self.nb_windows = nb_windows
+        self.tolerance = tolerance
+        if nb_iterations_max is None:
+            nb_iterations_max = nb_windows
+        self.nb_iterations_max = nb_iterations_max
+        self.nb_processes = nb_processes
+
+        self.t_end = params_ts.t_end
+        self.duration_window = self.t_end / nb_windows
+
+        self.sim = Simul(params)
+
+        # the propagators do not save and use the directory of self.sim
+        params_helper = deepcopy(self.sim.params)
+        params_helper.NEW_DIR_RESULTS = False
+        params_helper.output.HAS_TO_SAVE = False
+        params_helper.output.ONLINE_PLOT_OK = False
+        params_helper.output.periods_print.print_stdout = 0.
+        params_helper.time_stepping.USE_T_END = False
+
+        self.params_fine = params_helper
+        self.nb_steps_fine = self._compute_nb_steps(params_ts.deltat0)
+
+        params_coarse = deepcopy(params_helper)
+        params_coarse.oper.nx = params.oper.nx // coef_coarse
+        params_coarse.oper.ny = params.oper.ny // coef_coarse
+        params_coarse.time_stepping.type_time_scheme = \
+            type_time_scheme_coarse
+        if deltat_coarse is None:
+            deltat_coarse = params_ts.deltat0 * coef_coarse
+        params_coarse.time_stepping.deltat0 = deltat_coarse
+        self.nb_steps_coarse = self._compute_nb_steps(deltat_coarse)
+
+        self.coef_coarse = coef_coarse
+        self.sim_coarse = _create_sim_helper(Simul, params_coarse)
+        self.shapeK_loc_coarse = self.sim_coarse.oper.shapeK_loc
+
+        self.convergence = []
+
+    def _compute_nb_steps(self, deltat):
+        nb_steps = int(round(self.duration_window / deltat))
+        if abs(nb_steps*deltat - self.duration_window) > \
+                1e-10*self.duration_window:
+            raise ValueError(
+                'The duration of the windows ({}) has to be a multiple of the '
+                'time step ({}).'.format(self.duration_window, deltat))
+        return nb_steps
+
+    def _coarse_from_fine(self, state_fft):
+        if self.coef_coarse == 1:
+            return state_fft
+        oper = self.sim.oper
+        return np.array([
+            oper.coarse_seq_from_fft_loc(var_fft, self.shapeK_loc_coarse)
+            for var_fft in state_fft])
+
+    def _fine_from_coarse(self, state_fft_coarse):
+        if self.coef_coarse == 1:
+            return state_fft_coarse
+        oper = self.sim.oper
+        state_fft = np.array([
+            oper.fft_loc_from_coarse_seq(var_fft, self.shapeK_loc_coarse)
+            for var_fft in state_fft_coarse])
+        oper.dealiasing(state_fft)
+        return state_fft
+
+    def propagate_coarse(self, state_fft, t_start):
+        """Coarse propagation of *state_fft* over one window."""
+        state_fft_coarse = _propagate(
+            self.sim_coarse, self._coarse_from_fine(state_fft), t_start,
+            self.nb_steps_coarse)
+        return self._fine_from_coarse(state_fft_coarse)
+
+    def _print(self, to_print):
+        self.sim.output.print_stdout(to_print)
+
+    def run(self):
+        """Run the Parareal iterations.
+
+        At the end, the state of `self.sim` is the state at `t_end`.
+
+        """
+        nb_windows = self.nb_windows
+        times_start = [iw*self.duration_window for iw in range(nb_windows)]
+
+        self._print(
+            'Parareal: {} windows, {} fine and {} coarse time steps per '
+            'window'.format(nb_windows, self.nb_steps_fine,
+                            self.nb_steps_coarse))
+
+        # initial coarse sweep
+        t_start_iter = time()
+        states = [np.array(self.sim.state.state_fft)]
+        states_coarse = [None]
+        for iw in range(nb_windows):
+            states_coarse.append(
+                self.propagate_coarse(states[iw], times_start[iw]))
+            states.append(states_coarse[iw + 1])
+        self._print(
+            'Parareal: initial coarse sweep in {:.3g} s'.format(
+                time() - t_start_iter))
+
+        try:
+            context = multiprocessing.get_context('fork')
+        except AttributeError:
+            # Python 2 (fork on Unix)
+            context = multiprocessing
+
+        pool = context.Pool(
+            self.nb_processes, initializer=_init_worker,
+            initargs=(self.Simul, self.params_fine, self.nb_steps_fine))
+
+        try:
+            for iteration in range(self.nb_iterations_max):
+                t_start_iter = time()
+                # the states before the window `iteration` are converged
+                states_fine = pool.map(
+                    _propagate_fine_worker,
+                    [(states[iw], times_start[iw])
+                     for iw in range(iteration, nb_windows)])
+                duration_fine = time() - t_start_iter
+
+                t_start_coarse = time()
+                correction_max = 0.
+                for iw in range(iteration, nb_windows):
+                    state_coarse = self.propagate_coarse(
+                        states[iw], times_start[iw])
+                    new_state = (state_coarse + states_fine[iw - iteration] -
+                                 states_coarse[iw + 1])
+                    correction = (_norm(new_state - states[iw + 1]) /
+                                  _norm(states[iw + 1]))
+                    correction_max = max(correction_max, correction)
+                    states_coarse[iw + 1] = state_coarse
+                    states[iw + 1] = new_state
+                duration_coarse = time() - t_start_coarse
+
+                self.convergence.append({
+                    'iteration': iteration + 1,
+                    'correction_max': correction_max,
+                    'duration_fine': duration_fine,
+                    'duration_coarse': duration_coarse})
+
+                self._print(
+                    'Parareal: iteration {:3d} ; max relative correction = '
+                    '{:9.3e} ; fine {:.3g} s ; coarse {:.3g} s'.format(
+                        iteration + 1, correction_max, duration_fine,
+                        duration_coarse))
+
+                if correction_max < self.tolerance:
+                    break
+        finally:
+            pool.close()
+            pool.join()
+
+        sim = self.sim
+        sim.state.state_fft[:] = states[-1]
+        sim.state.statephys_from_statefft()
+        sim.time_stepping.t = self.t_end
+        sim.time_stepping.it = self.nb_steps_fine*nb_windows
+
+        output = sim.output
+        output.init_with_initialized_state()
+        if output.has_to_save:
+            output.phys_fields.save()
@@ -0,0 +1,265 @@
+"""Parameter sweeps (:mod:`fluidsim.util.sweep`)
+===============================================
+
+Provides:
+
+.. autofunction:: grid_overrides
+
+.. autoclass:: Sweep
+   :members:
+
+A sweep is a set of simulations defined by a base `params` and a list of
+overrides. The overrides are dictionaries whose keys are the dotted names of
+the parameters (for example ``'nu_8'``, ``'oper.nx'`` or
+``'time_stepping.t_end'``). The simulations are run in a bounded pool of
+processes (forked, without MPI).
+
+In each worker process, the operators are reused by the simulations with
+the same resolution (see
+:func:`fluidsim.base.solvers.base.enable_operators_reuse`): the FFT plans
+and the arrays of wavenumbers are only computed once per process and per
+resolution. The jobs are sorted by resolution to favor this reuse.
+
+The state of the jobs is saved in a json file after each job, so that an
+interrupted sweep can be resumed by running it again: the jobs already done
+are not run again (the failed jobs are run again).
+
+Example::
+
+  from fluidsim.solvers.ns2d.solver import Simul
+  from fluidsim.util.sweep import Sweep, grid_overrides
+
+  params = Simul.create_default_params()
+  ...
+  overrides = grid_overrides({'oper.nx': [64, 128], 'nu_8': [1e-8, 1e-9]})
+  sweep = Sweep(Simul, params, overrides, 'sweep_nu8.json', nb_processes=4)
+  sweep.run()
+  print(sweep.make_summary_table())
+
+"""
+
+from __future__ import division, print_function
+
+from builtins import object
+from copy import deepcopy
+from itertools import product
+from time import time
+import json
+import multiprocessing
+import os
+import traceback
+
+from fluiddyn.util import mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.base.solvers.base import enable_operators_reuse
+
+
+def grid_overrides(values):
+    """Return the list of overrides of a grid of parameters.
+
+    Parameters
+    ----------
+
+    values : dict
+
+      ``{dotted name: sequence of values}``. The overrides are the
+      cartesian product of the sequences.
+
+    """
+    keys = sorted(values.keys())
+    return [dict(zip(keys, combination))
+            for combination in product(*[values[key] for key in keys])]
+
+
+def params_from_overrides(params, overrides):
+    """Return a copy of *params* modified by *overrides*."""
+    params = deepcopy(params)
+    for name, value in overrides.items():
+        names = name.split('.')
+        child = params
+        for name_child in names[:-1]:
+            child = getattr(child, name_child)
+        if not hasattr(child, names[-1]):
+            raise AttributeError(
+                'Parameter {} does not exist.'.format(name))
+        setattr(child, names[-1], value)
+    return params
+
+
+def _key_resolution(overrides):
+    return sorted((key, repr(value)) for key, value in overrides.items()
+                  if key.startswith('oper.'))
+
+
+# global variables of the worker processes
+_Simul = None
+_params = None
+
+
+def _init_worker(Simul, params):
+    global _Simul, _params
+    _Simul = Simul
+    _params = params
+    enable_operators_reuse()
+
+
+def _run_job(args):
+    index, overrides = args
+    result = {'index': index, 'pid': os.getpid()}
+    t_start = time()
+    try:
+        params = params_from_overrides(_params, overrides)
+        with stdout_redirected():
+            sim = _Simul(params)
+            duration_init = time() - t_start
+            sim.time_stepping.start()
+    except Exception as error:
+        result.update({
+            'status': 'failed', 'duration': time() - t_start,
+            'error': '{}: {}'.format(type(error).__name__, error),
+            'traceback': traceback.format_exc()})
+    else:
+        result.update({
+            'status': 'done', 'duration': time() - t_start,
+            'duration_init': duration_init,
+            'path_run': sim.output.path_run,
+            't': sim.time_stepping.t, 'it': sim.time_stepping.it})
+    return result
+
+
+class Sweep(object):
+    """Run a set of simulations in a bounded pool of processes.
+
+    Parameters
+    ----------
+
+    Simul : class
+
+      The Simul class of the solver.
+
+    params : :class:`fluidsim.base.params.Parameters`
+
+      The base parameters.
+
+    overrides : list of dict
+
+      One dictionary ``{dotted name: value}`` per simulation (see
+      :func:`grid_overrides`). The values have to be serializable in json.
+
+    path_state : str
+
+      Path of the json file containing the state of the jobs. If the file
+      exists, the sweep is resumed.
+
+    nb_processes : int
+
+      Number of processes of the pool (by default, the number of cores).
+
+    """
+    def __init__(self, Simul, params, overrides, path_state,
+                 nb_processes=None):
+
+        if mpi.nb_proc > 1:
+            raise ValueError('Sweep has to be used without MPI.')
+
+        self.Simul = Simul
+        self.params = params
+        self.overrides = [dict(over) for over in overrides]
+        self.path_state = os.path.abspath(path_state)
+        self.nb_processes = nb_processes
+
+        self.results = {}
+        if os.path.exists(self.path_state):
+            self._load_state()
+
+    def _load_state(self):
+        with open(self.path_state) as f:
+            state = json.load(f)
+
+        # json converts tuples in lists
+        if json.loads(json.dumps(self.overrides)) != state['overrides']:
+            raise ValueError(
+                'The overrides are different from the ones saved in {}. '
+                'Use another path_state.'.format(self.path_state))
+
+        self.results = {int(index): result
+                        for index, result in state['results'].items()}
+
+    def _save_state(self):
+        path_tmp = self.path_state + '.tmp'
+        with open(path_tmp, 'w') as f:
+            json.dump({'overrides': self.overrides,
+                       'results': self.results}, f, indent=1)
+        os.rename(path_tmp, self.path_state)
+
+    def get_jobs_to_run(self):
+        """Return the indices of the jobs not done (sorted by resolution)."""
+        indices = [index for index in range(len(self.overrides))
+                   if self.results.get(index, {}).get('status') != 'done']
+        return sorted(
+            indices, key=lambda index: _key_resolution(self.overrides[index]))
+
+    def run(self):
+        """Run the jobs not done and return the results."""
+        indices = self.get_jobs_to_run()
+        if not indices:
+            return self.results
+
+        self._save_state()
+
+        try:
+            context = multiprocessing.get_context('fork')
+        except AttributeError:
+            # Python 2 (fork on Unix)
+            context = multiprocessing
+
+        nb_processes = self.nb_processes
+        if nb_processes is not None:
+            nb_processes = min(nb_processes, len(indices))
+
+        pool = context.Pool(
+            nb_processes, initializer=_init_worker,
+            initargs=(self.Simul, self.params))
+        try:
+            jobs = [(index, self.overrides[index]) for index in indices]
+            for result in pool.imap_unordered(_run_job, jobs):
+                self.results[result['index']] = result
+                self._save_state()
+        finally:
+            pool.close()
+            pool.join()
+
+        return self.results
+
+    def make_summary_table(self):
+        """Return a table (str) summarizing the jobs."""
+        lines = ['{:>5s} {:>8s} {:>10s} {:>10s}  {}'.format(
+            'index', 'status', 'duration', 'init', 'overrides')]
+        for index, overrides in enumerate(self.overrides):
+            result = self.results.get(index, {})
+            status = result.get('status', 'pending')
+            line = '{:5d} {:>8s} {:>10s} {:>10s}  {}'.format(
+                index, status,
+                _format_duration(result.get('duration')),
+                _format_duration(result.get('duration_init')),
+                ', '.join('{}={!r}'.format(key, overrides[key])
+                          for key in sorted(overrides)))
+            if status == 'failed':
+                line += '\n      ' + result['error']
+            lines.append(line)
+
+        nb_done = sum(result.get('status') == 'done'
+                      for result in self.results.values())
+        nb_failed = sum(result.get('status') == 'failed'
+                        for result in self.results.values())
+        lines.append('{} jobs: {} done, {} failed, {} pending'.format(
+            len(self.overrides), nb_done, nb_failed,
+            len(self.overrides) - nb_done - nb_failed))
+        return '\n'.join(lines)
+
+
+def _format_duration(duration):
+    if duration is None:
+        return '-'
+    return '{:.3g} s'.format(duration)
@@ -0,0 +1,51 @@
+from __future__ import division
+
+import unittest
+import shutil
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.util.parareal import Parareal
+from fluidsim.solvers.ns2d.test import create_params_test
+
+
+def create_params():
+    return create_params_test(t_end=0.08)
+
+
+@unittest.skipIf(mpi.nb_proc > 1, 'Parareal has to be used without MPI')
+class TestParareal(unittest.TestCase):
+
+    def tearDown(self):
+        for sim in getattr(self, 'sims', []):
+            shutil.rmtree(sim.output.path_run)
+
+    def test_parareal(self):
+        """After nb_windows iterations, Parareal gives the fine solution."""
+        nb_windows = 4
+        params = create_params()
+        with stdout_redirected():
+            parareal = Parareal(
+                Simul, params, nb_windows, coef_coarse=2,
+                nb_processes=2, tolerance=0.)
+            parareal.run()
+
+            params = create_params()
+            params.time_stepping.USE_T_END = False
+            params.time_stepping.it_end = 8
+            sim = Simul(params)
+            sim.time_stepping.start()
+
+        self.sims = [parareal.sim, sim]
+
+        self.assertEqual(len(parareal.convergence), nb_windows)
+        state_fft = parareal.sim.state.state_fft
+        state_fft_ref = sim.state.state_fft
+        self.assertLess(abs(state_fft - state_fft_ref).max(),
+                        1e-10*abs(state_fft_ref).max())
+
+
+if __name__ == '__main__':
+    unittest.main()
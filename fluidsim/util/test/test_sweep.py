@@ -0,0 +1,97 @@
+from __future__ import division
+
+import unittest
+import shutil
+import tempfile
+import os
+
+import fluiddyn.util.mpi as mpi
+
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.base.solvers.base import disable_operators_reuse
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.util import sweep as sweep_module
+from fluidsim.util.sweep import Sweep, grid_overrides, params_from_overrides
+from fluidsim.solvers.ns2d.test import create_params_test
+
+
+def create_params():
+    return create_params_test(nh=16, USE_T_END=False, it_end=2)
+
+
+@unittest.skipIf(mpi.nb_proc > 1, 'Sweep has to be used without MPI')
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.path_tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for result in getattr(self, 'results', {}).values():
+            if 'path_run' in result:
+                shutil.rmtree(result['path_run'])
+        shutil.rmtree(self.path_tmp)
+
+    def test_overrides(self):
+        overrides = grid_overrides({'nu_8': [1., 2.], 'oper.nx': [16, 32]})
+        self.assertEqual(len(overrides), 4)
+        params = params_from_overrides(create_params(), overrides[-1])
+        self.assertEqual(params.nu_8, 2.)
+        self.assertEqual(params.oper.nx, 32)
+        with self.assertRaises(AttributeError):
+            params_from_overrides(create_params(), {'oper.not_a_param': 1})
+
+    def test_operators_reuse(self):
+        """In a worker, the operators are reused by the simulations with the
+        same `params.oper`."""
+        sweep_module._init_worker(Simul, create_params())
+        sims = []
+        try:
+            for overrides in ({'nu_8': 1.}, {'nu_8': 2.}, {'oper.nx': 32}):
+                params = params_from_overrides(
+                    sweep_module._params, overrides)
+                with stdout_redirected():
+                    sims.append(sweep_module._Simul(params))
+        finally:
+            disable_operators_reuse()
+            for sim in sims:
+                shutil.rmtree(sim.output.path_run)
+
+        sim0, sim1, sim2 = sims
+        self.assertIs(sim1.oper, sim0.oper)
+        self.assertIs(sim1.oper.params, sim1.params)
+        self.assertIsNot(sim2.oper, sim0.oper)
+        self.assertEqual(sim2.oper.nx_seq, 32)
+
+        # without reuse (the default), new operators are created
+        with stdout_redirected():
+            sim = Simul(create_params())
+        shutil.rmtree(sim.output.path_run)
+        self.assertIsNot(sim.oper, sim0.oper)
+
+    def test_sweep(self):
+        """Run a sweep with one failing job and resume it."""
+        overrides = grid_overrides({'nu_8': [1., 2.], 'oper.nx': [16, 32]})
+        overrides.append({'init_fields.type': 'not_a_type'})
+        path_state = os.path.join(self.path_tmp, 'sweep.json')
+
+        sweep = Sweep(Simul, create_params(), overrides, path_state,
+                      nb_processes=2)
+        self.results = results = sweep.run()
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[4]['status'], 'failed')
+        for index in range(4):
+            self.assertEqual(results[index]['status'], 'done')
+            self.assertEqual(results[index]['it'], 2)
+        self.assertIn('4 done, 1 failed', sweep.make_summary_table())
+
+        # resume: only the failed job is run again
+        sweep = Sweep(Simul, create_params(), overrides, path_state)
+        self.assertEqual(sweep.get_jobs_to_run(), [4])
+
+        with self.assertRaises(ValueError):
+            Sweep(Simul, create_params(), overrides[:2], path_state)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+from __future__ import division
+
+import unittest
+import os
+
+import numpy as np
+
+from fluiddyn.util.paramcontainer import ParamContainer
+
+from fluidsim.base.time_stepping.pseudo_spect import (
+    _rk4_step0_inplace, _rk4_step2_inplace)
+from fluidsim.util import threads
+from fluidsim.util.threads import (
+    ChunkedThreadPool, get_nb_threads, set_nb_threads_from_params,
+    get_shared_thread_pool)
+
+
+def random_state(shape):
+    return np.random.rand(*shape) + 1j*np.random.rand(*shape)
+
+
+class TestChunkedThreadPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ChunkedThreadPool(3)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_stage_combinations(self):
+        """Chunked and direct stage combinations should be equal."""
+        shape = (2, 17, 9)
+        dt = 0.01
+        diss = np.random.rand(*shape[1:])
+        diss2 = np.random.rand(*shape[1:])
+        state_fft = random_state(shape)
+        tendencies_fft = random_state(shape)
+        temp_fft = random_state(shape)
+
+        for func in (_rk4_step0_inplace, _rk4_step2_inplace):
+            arrays = [[tendencies_fft.copy(), temp_fft.copy(),
+                       np.empty(shape, dtype=np.complex128)]
+                      for i in range(2)]
+
+            tendencies, temp, approx = arrays[0]
+            func(state_fft, tendencies, diss, diss2, dt, temp, approx)
+
+            tendencies, temp, approx = arrays[1]
+            self.pool.run(func, state_fft, tendencies, diss, diss2, dt,
+                          temp, approx)
+
+            for arr_ref, arr in zip(*arrays):
+                self.assertTrue(np.allclose(arr_ref, arr))
+
+    def test_small_arrays(self):
+        """Arrays smaller than the number of threads should be supported."""
+        arr = np.ones((2, 2))
+        self.pool.run(np.multiply, arr, 2., arr)
+        self.assertTrue(np.allclose(arr, 2.))
+
+
+class TestSharedThreadPool(unittest.TestCase):
+
+    def test_shared(self):
+        """The pools should be reused (one per number of threads)."""
+        pool = get_shared_thread_pool(2)
+        self.assertIs(get_shared_thread_pool(2), pool)
+        self.assertIsNot(get_shared_thread_pool(3), pool)
+
+    def test_forked(self):
+        """A pool created in another process should not be used."""
+        pool = get_shared_thread_pool(2)
+        threads._shared_pools[2] = (os.getpid() + 1, pool)
+        pool_new = get_shared_thread_pool(2)
+        self.assertIsNot(pool_new, pool)
+        self.assertIs(get_shared_thread_pool(2), pool_new)
+        pool.close()
+
+
+class TestNbThreads(unittest.TestCase):
+
+    def test_default_untouched(self):
+        """With nb_threads = None, the settings should not be modified."""
+        params = ParamContainer(tag='params')
+        params._set_child('oper', attribs={'nb_threads': None})
+        omp_num_threads = os.environ.get('OMP_NUM_THREADS')
+        os.environ['OMP_NUM_THREADS'] = '7'
+        try:
+            set_nb_threads_from_params(params)
+            self.assertEqual(os.environ['OMP_NUM_THREADS'], '7')
+            self.assertEqual(get_nb_threads(params), 1)
+        finally:
+            if omp_num_threads is None:
+                del os.environ['OMP_NUM_THREADS']
+            else:
+                os.environ['OMP_NUM_THREADS'] = omp_num_threads
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import shutil
+
+import fluiddyn.util.mpi as mpi
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.util.timers import Timers
+
+
+class TestTimers(unittest.TestCase):
+
+    def test_timers(self):
+        timers = Timers()
+        timers.add('a', 1.)
+        timers.add('a', 2.)
+        timers.call('b', lambda x: x, 1)
+        timers.add_total(4.)
+        self.assertEqual(timers.durations['a'], 3.)
+        self.assertEqual(timers.nb_calls['a'], 2)
+        self.assertEqual(timers.nb_calls['b'], 1)
+        self.assertIn('75.00', timers.make_str())
+        timers.reset()
+        self.assertEqual(len(timers.durations), 0)
+
+    def test_simul(self):
+        """The phases and the specific outputs should be timed."""
+        params = Simul.create_default_params()
+        params.short_name_type_run = 'test'
+        params.oper.nx = params.oper.ny = 16
+        params.init_fields.type = 'noise'
+        params.time_stepping.USE_CFL = False
+        params.time_stepping.USE_T_END = False
+        params.time_stepping.it_end = 4
+        params.time_stepping.USE_TIMERS = True
+        params.time_stepping.period_print_timers = 1e-10
+        params.output.ONLINE_PLOT_OK = False
+        params.output.periods_save.spatial_means = 1e-10
+        params.output.periods_print.print_stdout = 1e-10
+
+        with stdout_redirected():
+            sim = Simul(params)
+            sim.time_stepping.start()
+
+        timers = sim.time_stepping.timers
+        for name in ('output', 'computation',
+                     'output.save.spatial_means',
+                     'output.print.print_stdout'):
+            self.assertEqual(timers.nb_calls[name], 4)
+
+        if mpi.rank == 0:
+            self.assertTrue(os.path.exists(
+                os.path.join(sim.output.path_run, 'timers.txt')))
+            shutil.rmtree(sim.output.path_run)
+
+
+if __name__ == '__main__':
+    unittest.main()
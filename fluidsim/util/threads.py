@@ -0,0 +1,173 @@
+"""Thread budget (:mod:`fluidsim.util.threads`)
+=============================================
+
+Provides:
+
+.. autofunction:: get_nb_threads
+
+.. autofunction:: set_nb_threads
+
+.. autofunction:: set_nb_threads_from_params
+
+.. autofunction:: get_shared_thread_pool
+
+.. autoclass:: ChunkedThreadPool
+   :members:
+
+The number of threads used by a process can be given by
+`params.oper.nb_threads`. By default (None), the thread settings of the
+process (for example the environment variable `OMP_NUM_THREADS`) are not
+modified and fluidsim uses one thread for its own threaded features. If
+`params.oper.nb_threads` is set (1 is the good choice with MPI), it is used
+by:
+
+- the FFT backend `fftwcy` (threaded FFTW plans, if fluidsim has been built
+  with the library fftw3_threads),
+
+- the OpenMP loops of the pythran kernels of the solver ns2d
+  (:mod:`fluidsim.solvers.ns2d.util_pythran`, if the extensions have been
+  compiled with OpenMP, i.e. with the environment variable
+  `FLUIDSIM_OPENMP` set during the build), through the optional package
+  `threadpoolctl` and the environment variable `OMP_NUM_THREADS`,
+
+- pyfftw (`pyfftw.config.NUM_THREADS`),
+
+- the elementwise stage combinations of the in-place time stepping with
+  numpy kernels (see :class:`ChunkedThreadPool`).
+
+"""
+
+from __future__ import division
+
+from builtins import range
+from builtins import object
+from multiprocessing.pool import ThreadPool
+import multiprocessing
+import os
+
+import numpy as np
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+nb_cores = multiprocessing.cpu_count()
+
+
+def get_nb_threads(params):
+    """Return the number of threads given by `params.oper.nb_threads` (1 if
+    it is None)."""
+    try:
+        nb_threads = params.oper.nb_threads
+    except AttributeError:
+        # parameters saved before the introduction of nb_threads
+        return 1
+    if nb_threads is None:
+        return 1
+    nb_threads = int(nb_threads)
+    if nb_threads < 1:
+        raise ValueError('params.oper.nb_threads has to be larger than 0.')
+    return nb_threads
+
+
+def set_nb_threads_from_params(params):
+    """Set the number of threads of the OpenMP runtime and of pyfftw only if
+    `params.oper.nb_threads` is not None."""
+    if getattr(params.oper, 'nb_threads', None) is not None:
+        set_nb_threads(get_nb_threads(params))
+
+
+def set_nb_threads(nb_threads):
+    """Set the number of threads of the OpenMP runtime and of pyfftw (for
+    the whole process)."""
+    os.environ['OMP_NUM_THREADS'] = str(nb_threads)
+    if threadpool_limits is not None:
+        threadpool_limits(limits=nb_threads, user_api='openmp')
+    try:
+        import pyfftw
+    except ImportError:
+        pass
+    else:
+        pyfftw.config.NUM_THREADS = nb_threads
+
+
+def _chunk(arg, start, stop):
+    if isinstance(arg, np.ndarray) and arg.ndim >= 2:
+        return arg.view(np.ndarray)[..., start:stop, :]
+    return arg
+
+
+class ChunkedThreadPool(object):
+    """Run elementwise functions on chunks of arrays in a pool of threads.
+
+    The arrays (with at least 2 dimensions) are split along their
+    before-last axis, so that arrays with different leading dimensions
+    (for example the state and the array `diss` broadcasted over the
+    variables) are split consistently. The functions have to work in place
+    with numpy functions releasing the GIL.
+
+    Parameters
+    ----------
+
+    nb_threads : int
+
+      Number of threads (and of chunks).
+
+    """
+    def __init__(self, nb_threads):
+        self.nb_threads = nb_threads
+        self._pool = ThreadPool(nb_threads)
+
+    def run(self, func, *args):
+        """Call `func(*args)` chunk by chunk in the threads."""
+        size = None
+        for arg in args:
+            if isinstance(arg, np.ndarray) and arg.ndim >= 2:
+                size = arg.shape[-2]
+                break
+
+        nb_chunks = min(self.nb_threads, size or 1)
+        if nb_chunks <= 1:
+            func(*args)
+            return
+
+        bounds = np.linspace(0, size, nb_chunks + 1).astype(int)
+
+        def run_chunk(index):
+            start, stop = bounds[index], bounds[index + 1]
+            func(*[_chunk(arg, start, stop) for arg in args])
+
+        self._pool.map(run_chunk, range(nb_chunks))
+
+    def close(self):
+        """Terminate the threads."""
+        self._pool.close()
+        self._pool.join()
+
+
+# pools shared by the simulations of a process {nb_threads: (pid, pool)}
+_shared_pools = {}
+
+
+def get_shared_thread_pool(nb_threads):
+    """Return a :class:`ChunkedThreadPool` shared in the process.
+
+    The pools are created once per number of threads and reused by the
+    simulations (for example the runs of a sweep or of the parareal driver),
+    so that the threads are not leaked by each simulation. A pool inherited
+    from a parent process (fork) is not used since its threads do not exist
+    in the child process.
+
+    """
+    pid = os.getpid()
+    try:
+        pid_pool, pool = _shared_pools[nb_threads]
+    except KeyError:
+        pass
+    else:
+        if pid_pool == pid:
+            return pool
+    pool = ChunkedThreadPool(nb_threads)
+    _shared_pools[nb_threads] = (pid, pool)
+    return pool
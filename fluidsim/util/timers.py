@@ -0,0 +1,96 @@
+"""Timers of the phases of the time steps (:mod:`fluidsim.util.timers`)
+=====================================================================
+
+Provides:
+
+.. autoclass:: Timers
+   :members:
+
+The timers are activated with `params.time_stepping.USE_TIMERS = True`.
+The durations of the phases of
+:func:`fluidsim.base.time_stepping.base.TimeSteppingBase.one_time_step`
+('CFL', 'forcing', 'output' and 'computation') and of each call of the
+methods `online_save`, `online_print` and `online_plot` of the specific
+outputs (for example 'output.save.spectra') are accumulated. The breakdown is
+printed every `params.time_stepping.period_print_timers` (in simulation time,
+0 means only at the end of the simulation) and saved at the end of the
+simulation in the file `timers.txt` of the directory of the run.
+
+"""
+
+from __future__ import print_function, division
+
+from builtins import object
+from collections import OrderedDict
+from timeit import default_timer
+
+from fluiddyn.util import mpi
+
+
+class Timers(object):
+    """Accumulate the durations (and the numbers of calls) of named phases.
+
+    The overhead is of the order of a microsecond per measurement::
+
+      t_start = default_timer()
+      ...
+      timers.add('name', default_timer() - t_start)
+
+    """
+
+    def __init__(self):
+        self.durations = OrderedDict()
+        self.nb_calls = OrderedDict()
+        self.total = 0.
+
+    def add(self, name, duration):
+        """Add the duration of one call of a phase."""
+        try:
+            self.durations[name] += duration
+            self.nb_calls[name] += 1
+        except KeyError:
+            self.durations[name] = duration
+            self.nb_calls[name] = 1
+
+    def add_total(self, duration):
+        """Add the duration of one time step (used for the percentages)."""
+        self.total += duration
+
+    def call(self, name, func, *args, **kwargs):
+        """Call `func` and add its duration."""
+        t_start = default_timer()
+        result = func(*args, **kwargs)
+        self.add(name, default_timer() - t_start)
+        return result
+
+    def reset(self):
+        """Reset all timers."""
+        self.durations.clear()
+        self.nb_calls.clear()
+        self.total = 0.
+
+    def make_str(self):
+        """Make a table of the durations (from the longest to the shortest)."""
+        total = self.total
+        lines = ['timers: {:10.4g} s in the time steps'.format(total),
+                 '    {:30s} {:>11s} {:>7s} {:>9s} {:>11s}'.format(
+                     'phase', 'time (s)', '%', 'calls', 'per call')]
+        items = sorted(self.durations.items(),
+                       key=lambda item: item[1], reverse=True)
+        for name, duration in items:
+            nb_calls = self.nb_calls[name]
+            if total > 0:
+                percentage = 100 * duration / total
+            else:
+                percentage = 0.
+            lines.append(
+                '    {:30s} {:11.4g} {:7.2f} {:9d} {:11.4g}'.format(
+                    name, duration, percentage, nb_calls,
+                    duration / nb_calls))
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path_file):
+        """Save the table in a text file (only by the process 0)."""
+        if mpi.rank == 0:
+            with open(path_file, 'w') as f:
+                f.write(self.make_str())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+python bench_adaptive_time_stepping.py
+python bench_adaptive_time_stepping.py sw1l 128 1e-5
+
+Compare the number of time steps per unit of simulated time and the error
+of the adaptive scheme RK23 (`params.time_stepping.type_time_scheme =
+'RK23'`) and of the RK4 scheme with the CFL condition. The error is
+computed against a RK4 simulation with a time step about 10 times smaller
+than the smallest time step of the other runs.
+
+The arguments are the solver, the number of modes in each direction and the
+relative tolerance of the adaptive scheme.
+
+"""
+from __future__ import print_function
+
+import sys
+
+import numpy as np
+
+import fluidsim
+
+key_solver = 'sw1l'
+nh = 128
+rtol = 1e-5
+if len(sys.argv) > 1:
+    key_solver = sys.argv[1]
+if len(sys.argv) > 2:
+    nh = int(sys.argv[2])
+if len(sys.argv) > 3:
+    rtol = float(sys.argv[3])
+
+Simul = fluidsim.import_simul_class_from_key(key_solver)
+
+t_end = 1.
+
+
+def create_sim(type_time_scheme, deltat=None):
+    # same initial noise for all simulations
+    np.random.seed(0)
+
+    params = Simul.create_default_params()
+
+    params.short_name_type_run = 'bench_adaptive'
+
+    params.oper.nx = nh
+    params.oper.ny = nh
+    Lh = 6.
+    params.oper.Lx = Lh
+    params.oper.Ly = Lh
+
+    params.oper.coef_dealiasing = 2./3
+
+    delta_x = Lh/nh
+    params.nu_8 = 2.*10e-1*delta_x**8
+
+    try:
+        params.f = 1.
+        params.c2 = 200.
+    except (KeyError, AttributeError):
+        pass
+
+    params.init_fields.type = 'noise'
+
+    params.time_stepping.t_end = t_end
+    params.time_stepping.type_time_scheme = type_time_scheme
+    params.time_stepping.adaptive.rtol = rtol
+    if deltat is not None:
+        params.time_stepping.USE_CFL = False
+        params.time_stepping.USE_T_END = False
+        params.time_stepping.deltat0 = deltat
+        params.time_stepping.it_end = int(round(t_end / deltat))
+
+    params.output.periods_print.print_stdout = 0
+    params.output.HAS_TO_SAVE = False
+
+    return Simul(params)
+
+
+def run(type_time_scheme, deltat=None):
+    sim = create_sim(type_time_scheme, deltat)
+    time_stepping = sim.time_stepping
+    deltats = []
+    while time_stepping.t < t_end - 1e-12:
+        # the last time step is shortened to arrive exactly at t_end
+        time_stepping.deltat_max = min(
+            time_stepping.deltat_max, t_end - time_stepping.t)
+        time_stepping.one_time_step()
+        deltats.append(time_stepping.deltat)
+    return sim, np.array(deltats)
+
+
+if __name__ == '__main__':
+
+    results = {}
+    for type_time_scheme in ('RK4', 'RK23'):
+        results[type_time_scheme] = run(type_time_scheme)
+
+    deltat_min = min(deltats.min() for sim, deltats in results.values())
+    nb_steps_ref = int(np.ceil(10*t_end/deltat_min))
+    sim_ref, _ = run('RK4', deltat=t_end/nb_steps_ref)
+    state_fft_ref = sim_ref.state.state_fft
+    norm_ref = abs(state_fft_ref).max()
+
+    print('\nsolver {}, {}x{}, rtol = {:g}'.format(
+        key_solver, nh, nh, rtol))
+    for type_time_scheme, (sim, deltats) in sorted(results.items()):
+        error = abs(sim.state.state_fft - state_fft_ref).max() / norm_ref
+        print('{:5s}: {:6d} steps per unit time ; relative error {:9.3e}'
+              ''.format(type_time_scheme, len(deltats), error), end='')
+        if hasattr(sim.time_stepping, 'nb_steps_rejected'):
+            print(' ; rejected steps: {}'.format(
+                sim.time_stepping.nb_steps_rejected), end='')
+        print()
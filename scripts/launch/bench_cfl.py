@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+python bench_cfl.py
+python bench_cfl.py 2048 256
+
+Compare the reduction used for the CFL condition: the former expression
+(``abs(ux).max()`` for each component, with a temporary array per
+component) and :func:`fluidsim.base.time_stepping.base.compute_max_abs`
+(one pass if cfl_pythran is pythranized), for 2 components on a 2D grid and
+3 components on a 3D grid.
+
+With `params.time_stepping.nb_steps_CFL = N`, the cost per step of the CFL
+condition is further divided by N. In profiling outputs (for example
+simul3d_profile.py with `USE_CFL = True`), it appears in the method
+`_compute_time_increment_CLF` of the time stepping.
+
+"""
+from __future__ import print_function
+
+import sys
+from timeit import repeat
+
+import numpy as np
+
+from fluidsim.base.time_stepping import cfl_pythran
+from fluidsim.base.time_stepping.base import compute_max_abs
+
+nh = 1024
+n3d = 128
+if len(sys.argv) > 1:
+    nh = int(sys.argv[1])
+if len(sys.argv) > 2:
+    n3d = int(sys.argv[2])
+
+if not hasattr(cfl_pythran, '__pythran__'):
+    print('Warning: fluidsim.base.time_stepping.cfl_pythran is not '
+          'pythranized!')
+
+
+def max_abs_former(*arrays):
+    return tuple(abs(arr).max() for arr in arrays)
+
+
+if __name__ == '__main__':
+
+    cases = [('2D {}^2'.format(nh), (nh, nh), 2),
+             ('3D {}^3'.format(n3d), (n3d, n3d, n3d), 3)]
+
+    print('{:>12s} {:>12s} {:>12s} {:>8s}'.format(
+        'case', 'former (s)', 'new (s)', 'speedup'))
+    for name, shape, nb_components in cases:
+        arrays = [np.random.randn(*shape) for i in range(nb_components)]
+        times = []
+        for func in (max_abs_former, compute_max_abs):
+            times.append(min(repeat(
+                lambda: func(*arrays), number=10, repeat=3)) / 10)
+        print('{:>12s} {:12.3e} {:12.3e} {:8.2f}'.format(
+            name, times[0], times[1], times[0]/times[1]))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+python bench_dealiasing.py
+python bench_dealiasing.py 256
+
+Compare the dealiasing of a 3D state (3 variables, arrays of the shape of
+the spectral arrays of fluidfft, sequential) done with the former method
+(`np.nonzero(where_dealiased)` at each call), with the boolean mask and with
+the selections precomputed by
+:func:`fluidsim.operators.dealiasing.compute_selections_dealiased`.
+
+"""
+from __future__ import print_function, division
+
+import sys
+from timeit import repeat
+
+import numpy as np
+
+from fluidsim.operators.dealiasing import compute_selections_dealiased, dealias
+
+n = 128
+if len(sys.argv) > 1:
+    n = int(sys.argv[1])
+
+coef_dealiasing = 2/3
+
+
+def create_where_dealiased(n):
+    kz = np.fft.fftfreq(n, 1/n)
+    ky = np.fft.fftfreq(n, 1/n)
+    kx = np.arange(n//2 + 1)
+    KZ, KY, KX = np.meshgrid(kz, ky, kx, indexing='ij')
+    kmax = coef_dealiasing*n/2
+    return (abs(KX) > kmax) | (abs(KY) > kmax) | (abs(KZ) > kmax)
+
+
+def dealiasing_nonzero(sov, where_dealiased):
+    for i in range(sov.shape[0]):
+        sov[i][np.nonzero(where_dealiased)] = 0.
+
+
+def dealiasing_mask(sov, where_dealiased):
+    sov[..., where_dealiased] = 0.
+
+
+if __name__ == '__main__':
+
+    where_dealiased = create_where_dealiased(n)
+    state_fft = np.ones((3,) + where_dealiased.shape, dtype=np.complex128)
+
+    selections = compute_selections_dealiased(where_dealiased)
+    print('{}^3: {} selections (slabs)'.format(n, len(selections)))
+
+    funcs = [
+        ('np.nonzero', lambda: dealiasing_nonzero(state_fft, where_dealiased)),
+        ('mask', lambda: dealiasing_mask(state_fft, where_dealiased)),
+        ('selections', lambda: dealias(state_fft, selections))]
+
+    t_ref = None
+    for name, func in funcs:
+        t = min(repeat(func, number=10, repeat=3)) / 10
+        if t_ref is None:
+            t_ref = t
+        print('{:>12s}: {:.3e} s (speedup {:.1f})'.format(name, t, t_ref/t))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+python bench_ensemble.py
+python bench_ensemble.py 16 32
+
+Compare the throughput (simulated members x time steps per second) of an
+ensemble of small ns2d simulations run in one batched state
+(:class:`fluidsim.solvers.ns2d.ensemble.EnsembleNS2D`) and of the same
+simulations run one after the other.
+
+The arguments are the number of members and the number of modes in each
+direction.
+
+"""
+from __future__ import print_function
+
+import sys
+from time import time
+
+import numpy as np
+
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.solvers.ns2d.ensemble import EnsembleNS2D
+
+nb_members = 16
+nh = 32
+if len(sys.argv) > 1:
+    nb_members = int(sys.argv[1])
+if len(sys.argv) > 2:
+    nh = int(sys.argv[2])
+
+nb_steps = 20
+values_nu_8 = np.logspace(-1, 1, nb_members)
+
+
+def create_params(nu_8=1.):
+    params = Simul.create_default_params()
+
+    params.short_name_type_run = 'bench_ensemble'
+
+    params.oper.nx = nh
+    params.oper.ny = nh
+    Lh = 6.
+    params.oper.Lx = Lh
+    params.oper.Ly = Lh
+    params.oper.coef_dealiasing = 2./3
+    params.nu_8 = nu_8
+
+    params.init_fields.type = 'dipole'
+
+    params.time_stepping.USE_CFL = False
+    params.time_stepping.deltat0 = 1e-3
+    params.time_stepping.USE_T_END = False
+    params.time_stepping.it_end = nb_steps
+
+    params.output.periods_print.print_stdout = 0
+    params.output.HAS_TO_SAVE = False
+
+    return params
+
+
+def bench_separate():
+    sims = []
+    with stdout_redirected():
+        for nu_8 in values_nu_8:
+            sims.append(Simul(create_params(nu_8)))
+    t_start = time()
+    for sim in sims:
+        for it in range(nb_steps):
+            sim.time_stepping.one_time_step()
+    return time() - t_start
+
+
+def bench_ensemble():
+    with stdout_redirected():
+        ensemble = EnsembleNS2D(Simul, create_params(),
+                                {'nu_8': values_nu_8})
+    t_start = time()
+    for it in range(nb_steps):
+        ensemble.one_time_step()
+    return time() - t_start
+
+
+if __name__ == '__main__':
+
+    durations = {'separate': bench_separate(), 'ensemble': bench_ensemble()}
+
+    print('\nsolver ns2d, {}x{}, {} members, {} time steps'.format(
+        nh, nh, nb_members, nb_steps))
+    for key in ('separate', 'ensemble'):
+        duration = durations[key]
+        print('{:8s}: {:8.4f} s ; {:10.1f} member steps/s'.format(
+            key, duration, nb_members*nb_steps/duration))
+    print('speedup: {:.2f}'.format(
+        durations['separate'] / durations['ensemble']))
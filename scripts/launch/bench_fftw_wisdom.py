@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+python bench_fftw_wisdom.py
+python bench_fftw_wisdom.py ns2d 1024
+
+Measure the time to the first time step (creation of the simulation object
+and one time step) without FFTW wisdom, with an empty wisdom cache (the
+wisdom is computed and saved) and with the saved wisdom (see
+:mod:`fluidsim.operators.fft.wisdom`).
+
+Each measurement is done in a new process since FFTW keeps the wisdom in
+memory. The wisdom is saved in a temporary directory.
+
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+key_solver = 'ns2d'
+nh = 512
+if len(sys.argv) > 1:
+    key_solver = sys.argv[1]
+if len(sys.argv) > 2:
+    nh = int(sys.argv[2])
+
+code = """
+from time import time
+t_start = time()
+import fluidsim
+from fluiddyn.io import stdout_redirected
+Simul = fluidsim.import_simul_class_from_key('{key_solver}')
+params = Simul.create_default_params()
+params.short_name_type_run = 'bench_wisdom'
+params.oper.nx = params.oper.ny = {nh}
+params.init_fields.type = 'noise'
+params.output.HAS_TO_SAVE = False
+params.output.periods_print.print_stdout = 0
+with stdout_redirected():
+    sim = Simul(params)
+    sim.time_stepping.one_time_step()
+print(time() - t_start)
+import shutil
+shutil.rmtree(sim.output.path_run)
+""".format(key_solver=key_solver, nh=nh)
+
+
+def time_to_first_step(env):
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return float(output.split()[-1])
+
+
+if __name__ == '__main__':
+
+    path_dir_wisdom = tempfile.mkdtemp()
+    env = dict(os.environ)
+    env['FLUIDSIM_FFTW_WISDOM_DIR'] = path_dir_wisdom
+    env_no_wisdom = dict(env)
+    env_no_wisdom['FLUIDSIM_NO_FFTW_WISDOM'] = '1'
+
+    try:
+        durations = [
+            ('without wisdom', time_to_first_step(env_no_wisdom)),
+            ('empty cache', time_to_first_step(env)),
+            ('saved wisdom', time_to_first_step(env))]
+    finally:
+        shutil.rmtree(path_dir_wisdom)
+
+    print('\nsolver {}, {}x{}: time to the first time step'.format(
+        key_solver, nh, nh))
+    for name, duration in durations:
+        print('{:15s}: {:8.3f} s'.format(name, duration))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+python bench_hdf5_layout.py
+python bench_hdf5_layout.py 2000 512
+
+Compare the layouts of the hdf5 files of the specific outputs (see
+:mod:`fluidsim.base.output.hdf5_layout`) for a file similar to spectra1D.h5
+(3 datasets, 2000 saved times and rows of 512 floats by default). The file
+is opened at each save as in
+:func:`fluidsim.base.output.base.SpecificOutput.add_dico_arrays_to_file`.
+
+- former: default chunks and one resize per save,
+
+- chunked: chunks of about 64 kB, geometric preallocation (`coef_alloc` set
+  to 2) and free space reused,
+
+- gzip: same with the filters shuffle and gzip (level 4),
+
+- lzf: same with the filters shuffle and lzf.
+
+For each layout, the size of the file, the time to write all the rows and
+the time to read the whole datasets are given. For example (2000 saved
+times, rows of 512 floats with 10 % of noise)::
+
+  layout      size (MB)    write (s)     read (s)
+  former         25.024        4.949       0.0604
+  chunked        24.677        5.614       0.0230
+  gzip           20.814       20.546       0.0889
+  lzf            27.568       17.593       0.1252
+
+The writes are dominated by the opening of the file at each save (see
+:mod:`fluidsim.base.output.async_writer` to avoid it). The reads are faster
+with the chunks containing several rows. The compression of such noisy data
+is not very efficient and it is not used by default.
+
+"""
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+from time import time
+
+import numpy as np
+import h5py
+
+from fluiddyn.util.paramcontainer import ParamContainer
+
+from fluidsim.base.output import hdf5_layout
+
+nb_times = 2000
+size_row = 512
+if len(sys.argv) > 1:
+    nb_times = int(sys.argv[1])
+if len(sys.argv) > 2:
+    size_row = int(sys.argv[2])
+
+keys = ['spectrum1Dkx_E', 'spectrum1Dky_E', 'spectrum1Dkx_EK']
+
+# smooth data (as spectra), compressible
+kx = np.arange(1, size_row + 1)
+rows = {key: kx**(-5/3) * (1 + 0.1*np.random.rand(nb_times, size_row))
+        for key in keys}
+
+
+def write_former(path_file):
+    with h5py.File(path_file, 'w') as f:
+        f.create_dataset('times', data=[0.], maxshape=(None,))
+        for key in keys:
+            f.create_dataset(key, data=rows[key][:1],
+                             maxshape=(None, size_row))
+    for it in range(1, nb_times):
+        with h5py.File(path_file, 'r+') as f:
+            dset_times = f['times']
+            dset_times.resize((it+1,))
+            dset_times[it] = it
+            for key in keys:
+                dset = f[key]
+                dset.resize((it+1, size_row))
+                dset[it] = rows[key][it]
+
+
+def write_new(path_file, params_layout):
+    with hdf5_layout.create_file(path_file) as f:
+        f.attrs['coef_alloc'] = params_layout.coef_alloc
+        hdf5_layout.create_dataset_rows(
+            f, 'times', np.float64(0.), params_layout)
+        for key in keys:
+            hdf5_layout.create_dataset_rows(
+                f, key, rows[key][0], params_layout)
+    for it in range(1, nb_times):
+        with h5py.File(path_file, 'r+') as f:
+            hdf5_layout.append_to_file(
+                f, [float(it)], {key: rows[key][it:it+1] for key in keys})
+    with h5py.File(path_file, 'r+') as f:
+        hdf5_layout.trim_file(f)
+
+
+def read(path_file):
+    with h5py.File(path_file, 'r') as f:
+        for key in keys:
+            f[key][...]
+
+
+def create_params_layout(compression=None):
+    params = ParamContainer(tag='params')
+    params._set_child('output')
+    hdf5_layout._complete_params_with_default(params)
+    params_layout = params.output.hdf5_layout
+    params_layout.coef_alloc = 2.
+    if compression is not None:
+        params_layout.compression = compression
+        params_layout.shuffle = True
+        if compression == 'gzip':
+            params_layout.compression_opts = 4
+    return params_layout
+
+
+if __name__ == '__main__':
+
+    path_dir = tempfile.mkdtemp()
+
+    layouts = [('former', None),
+               ('chunked', create_params_layout()),
+               ('gzip', create_params_layout('gzip')),
+               ('lzf', create_params_layout('lzf'))]
+
+    print('{} saved times, rows of {} floats ({} datasets)'.format(
+        nb_times, size_row, len(keys)))
+    print('{:8s} {:>12s} {:>12s} {:>12s}'.format(
+        'layout', 'size (MB)', 'write (s)', 'read (s)'))
+
+    for name, params_layout in layouts:
+        path_file = os.path.join(path_dir, name + '.h5')
+        t_start = time()
+        if params_layout is None:
+            write_former(path_file)
+        else:
+            write_new(path_file, params_layout)
+        t_write = time() - t_start
+
+        t_start = time()
+        read(path_file)
+        t_read = time() - t_start
+
+        size = os.path.getsize(path_file) / 1e6
+        print('{:8s} {:12.3f} {:12.3f} {:12.4f}'.format(
+            name, size, t_write, t_read))
+
+    shutil.rmtree(path_dir)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+python bench_increments.py
+python bench_increments.py 1024
+
+Compare the computation of the pdfs of the increments of one field (nh x nh,
+x direction, all separations of the output `increments`) done as before
+(`oper.compute_increments_dim1` and `oper.pdf_normalized` for each
+separation) with
+:func:`fluidsim.base.output.increments.compute_pdfs_increments`. The y
+direction is also timed.
+
+The pdfs are computed in one pass over the field for the ranges of the
+histograms and one pass to fill them if the module
+`fluidsim.base.output.increments_pythran` is pythranized.
+
+"""
+from __future__ import print_function
+
+import sys
+from timeit import repeat
+
+import numpy as np
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.base.output import increments_pythran
+from fluidsim.base.output.increments import (
+    compute_separations, compute_pdfs_increments)
+
+nh = 512
+if len(sys.argv) > 1:
+    nh = int(sys.argv[1])
+
+nbins = 400
+
+if not hasattr(increments_pythran, '__pythran__'):
+    print('Warning: fluidsim.base.output.increments_pythran is not '
+          'pythranized!')
+
+params = Simul.create_default_params()
+params.oper.nx = params.oper.ny = nh
+Operators = Simul.info_solver.import_classes()['Operators']
+oper = Operators(params=params)
+
+rxs = compute_separations(nh)
+var = np.random.randn(*oper.shapeX_loc)
+
+
+def compute_former():
+    pdf_var = np.empty([rxs.size, nbins])
+    for irx, rx in enumerate(rxs):
+        inc_var = oper.compute_increments_dim1(var, rx)
+        pdf_var[irx], bin_edges_var = oper.pdf_normalized(inc_var, nbins)
+    return pdf_var
+
+
+if __name__ == '__main__':
+
+    times = []
+    for func in (compute_former,
+                 lambda: compute_pdfs_increments(var, rxs, nbins),
+                 lambda: compute_pdfs_increments(var, rxs, nbins, axis=0)):
+        times.append(min(repeat(func, number=1, repeat=3)))
+
+    print('nh = {}, {} separations, {} bins'.format(nh, rxs.size, nbins))
+    print('former (x):                  {:10.3e} s'.format(times[0]))
+    print('compute_pdfs_increments (x): {:10.3e} s (speedup {:.1f})'.format(
+        times[1], times[0]/times[1]))
+    print('compute_pdfs_increments (y): {:10.3e} s'.format(times[2]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+python bench_inplace_time_stepping.py
+python bench_inplace_time_stepping.py sw1l 1024
+
+Compare the time stepping with and without the preallocated stage arrays
+(`params.time_stepping.USE_INPLACE`). For each mode, the script prints the
+mean duration of a time step and the peak of memory allocated during the
+time stepping (measured with tracemalloc, Python >= 3.4).
+
+"""
+from __future__ import print_function
+
+import sys
+from time import time
+
+import fluidsim
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+key_solver = 'ns2d'
+nh = 512
+if len(sys.argv) > 1:
+    key_solver = sys.argv[1]
+if len(sys.argv) > 2:
+    nh = int(sys.argv[2])
+
+Simul = fluidsim.import_simul_class_from_key(key_solver)
+
+
+def create_sim(use_inplace):
+    params = Simul.create_default_params()
+
+    params.short_name_type_run = 'bench_inplace'
+
+    params.oper.nx = nh
+    params.oper.ny = nh
+    Lh = 6.
+    params.oper.Lx = Lh
+    params.oper.Ly = Lh
+
+    params.oper.coef_dealiasing = 2./3
+
+    delta_x = Lh/nh
+    params.nu_8 = 2.*10e-1*delta_x**8
+
+    try:
+        params.f = 1.
+        params.c2 = 200.
+    except (KeyError, AttributeError):
+        pass
+
+    params.init_fields.type = 'noise'
+
+    params.time_stepping.deltat0 = 1.e-4
+    params.time_stepping.USE_CFL = False
+    params.time_stepping.USE_T_END = False
+    params.time_stepping.it_end = 20
+    params.time_stepping.USE_INPLACE = use_inplace
+
+    params.output.periods_print.print_stdout = 0
+    params.output.HAS_TO_SAVE = False
+
+    return Simul(params)
+
+
+def bench(use_inplace):
+    sim = create_sim(use_inplace)
+    # one step to initialize everything
+    sim.time_stepping.one_time_step()
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+    it_end = sim.params.time_stepping.it_end
+    t_start = time()
+    for it in range(it_end):
+        sim.time_stepping.one_time_step()
+    duration = (time() - t_start) / it_end
+
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        peak = float('nan')
+
+    return duration, peak
+
+
+if __name__ == '__main__':
+
+    results = {}
+    for use_inplace in (False, True):
+        results[use_inplace] = bench(use_inplace)
+
+    print('\nsolver {}, {}x{}'.format(key_solver, nh, nh))
+    for use_inplace, (duration, peak) in results.items():
+        print('USE_INPLACE = {!s:5}: {:8.4f} s/step ; '
+              'peak allocated memory: {:8.2f} Mo'.format(
+                  use_inplace, duration, peak*1.e-6))
+
+    duration_ref, peak_ref = results[False]
+    duration, peak = results[True]
+    print('speedup: {:.2f} ; memory ratio: {:.2f}'.format(
+        duration_ref / duration, peak / peak_ref))
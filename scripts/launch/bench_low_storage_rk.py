@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+python bench_low_storage_rk.py
+python bench_low_storage_rk.py 128
+
+Compare the memory used by the time schemes on a 3D case (solver ns3d): the
+default RK4, the in-place RK4 (`params.time_stepping.USE_INPLACE`) and the
+low-storage schemes 'RK3_2N' and 'RK4_2N'.
+
+For each scheme, the script prints the peak of memory allocated during the
+time stepping (measured with tracemalloc, Python >= 3.4) in number of copies
+of the state (it includes the arrays allocated in `tendencies_nonlin`) and
+the mean duration of a time step.
+
+"""
+from __future__ import print_function
+
+import sys
+from time import time
+
+from fluidsim.solvers.ns3d.solver import Simul
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+n = 64
+if len(sys.argv) > 1:
+    n = int(sys.argv[1])
+
+schemes = [('RK4', False), ('RK4', True), ('RK3_2N', False),
+           ('RK4_2N', False)]
+
+
+def create_sim(type_time_scheme, use_inplace):
+    params = Simul.create_default_params()
+
+    params.short_name_type_run = 'bench_2N'
+
+    params.oper.nx = n
+    params.oper.ny = n
+    params.oper.nz = n
+    L = 6.
+    params.oper.Lx = L
+    params.oper.Ly = L
+    params.oper.Lz = L
+
+    params.oper.coef_dealiasing = 2./3
+    params.oper.type_fft = 'fluidfft.fft3d.with_fftw3d'
+
+    params.nu_8 = 1.
+
+    params.init_fields.type = 'dipole'
+
+    params.time_stepping.deltat0 = 1.e-4
+    params.time_stepping.USE_CFL = False
+    params.time_stepping.USE_T_END = False
+    params.time_stepping.it_end = 4
+    params.time_stepping.type_time_scheme = type_time_scheme
+    params.time_stepping.USE_INPLACE = use_inplace
+
+    params.output.periods_print.print_stdout = 0
+    params.output.HAS_TO_SAVE = False
+
+    return Simul(params)
+
+
+def bench(type_time_scheme, use_inplace):
+    sim = create_sim(type_time_scheme, use_inplace)
+    # one step to initialize everything
+    sim.time_stepping.one_time_step()
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+
+    it_end = sim.params.time_stepping.it_end
+    t_start = time()
+    for it in range(it_end):
+        sim.time_stepping.one_time_step()
+    duration = (time() - t_start) / it_end
+
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        peak = float('nan')
+
+    # the preallocated arrays are allocated before tracemalloc.start()
+    nb_stage_arrays = getattr(sim.time_stepping, 'nb_stage_arrays', 0)
+    nb_copies = nb_stage_arrays + peak / sim.state.state_fft.nbytes
+
+    return duration, nb_copies
+
+
+if __name__ == '__main__':
+
+    results = []
+    for type_time_scheme, use_inplace in schemes:
+        results.append(bench(type_time_scheme, use_inplace))
+
+    print('\nsolver ns3d, {0}x{0}x{0}'.format(n))
+    for (type_time_scheme, use_inplace), (duration, nb_copies) in zip(
+            schemes, results):
+        name = type_time_scheme
+        if use_inplace:
+            name += ' (in place)'
+        print('{:16s}: {:8.4f} s/step ; '
+              'peak state copies: {:5.2f}'.format(
+                  name, duration, nb_copies))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+python bench_ns2d_tendencies.py
+python bench_ns2d_tendencies.py 512 1024
+
+Compare the computation of the nonlinear term of the solver ns2d with the
+fused path (one pythran kernel computing the fields in Fourier space in
+preallocated buffers and one call of `oper.ifft2_many`) and with the former
+path (`Simul.USE_FUSED_NONLIN = False`).
+
+The arguments are the resolutions (default 512, 1024 and 2048). Both calls
+of `tendencies_nonlin` used during the Runge-Kutta time stepping are
+measured (with and without `state_fft`).
+
+"""
+from __future__ import print_function
+
+import sys
+from timeit import repeat
+
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+from fluidsim.solvers.ns2d import util_pythran
+
+resolutions = [512, 1024, 2048]
+if len(sys.argv) > 1:
+    resolutions = [int(arg) for arg in sys.argv[1:]]
+
+if not hasattr(util_pythran, '__pythran__'):
+    print('Warning: fluidsim.solvers.ns2d.util_pythran is not pythranized!')
+
+
+def create_sim(nh):
+    params = Simul.create_default_params()
+    params.short_name_type_run = 'bench_tendencies'
+    params.oper.nx = params.oper.ny = nh
+    params.init_fields.type = 'noise'
+    params.output.HAS_TO_SAVE = False
+    params.output.periods_print.print_stdout = 0
+    with stdout_redirected():
+        sim = Simul(params)
+    return sim
+
+
+def bench(sim, use_fused, number=10):
+    sim.USE_FUSED_NONLIN = use_fused
+    state_fft = sim.state.state_fft.copy()
+    out = sim.state.state_fft.copy()
+
+    def from_state():
+        sim.tendencies_nonlin(out=out)
+
+    def from_state_fft():
+        sim.tendencies_nonlin(state_fft, out=out)
+
+    return [min(repeat(func, number=number, repeat=3)) / number
+            for func in (from_state, from_state_fft)]
+
+
+if __name__ == '__main__':
+
+    print('{:>10s} {:>8s} {:>14s} {:>14s}'.format(
+        'resolution', 'path', 'state (s)', 'state_fft (s)'))
+    for nh in resolutions:
+        sim = create_sim(nh)
+        times_ref = bench(sim, False)
+        times = bench(sim, True)
+        for name, (t0, t1) in (('former', times_ref), ('fused', times)):
+            print('{:>10s} {:>8s} {:14.3e} {:14.3e}'.format(
+                '{}^2'.format(nh), name, t0, t1))
+        print('{:>10s} {:>8s} {:14.2f} {:14.2f}'.format(
+            '', 'speedup', times_ref[0]/times[0], times_ref[1]/times[1]))
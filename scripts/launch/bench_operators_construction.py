@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+python bench_operators_construction.py
+python bench_operators_construction.py 512 128
+
+Report the construction time of the operators and the memory used by their
+arrays (measured with tracemalloc, Python >= 3.4) for the solvers ns2d and
+sw1l (nh x nh, default 1024) and ns3d (n x n x n, default 256).
+
+For the 2D operators, most arrays of wavenumbers are computed on first
+access, so the memory is also reported after the access of all these
+arrays, which corresponds to the former eager construction.
+
+"""
+from __future__ import print_function
+
+import gc
+import sys
+from importlib import import_module
+from time import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+nh = 1024
+n3d = 256
+if len(sys.argv) > 1:
+    nh = int(sys.argv[1])
+if len(sys.argv) > 2:
+    n3d = int(sys.argv[2])
+
+names_lazy_arrays = [
+    'XX', 'YY', 'RR', 'KX2', 'KY2', 'K2', 'K4', 'K8', 'KK', 'KK_not0',
+    'K2_not0', 'K4_not0', 'KX_over_K2', 'KY_over_K2', 'Kappa2',
+    'Kappa_over_ic', 'f_over_c2Kappa2']
+
+
+def _get_memory():
+    if tracemalloc is None:
+        return float('nan')
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 2.**20
+
+
+def bench(key_solver, n):
+    Simul = import_module(
+        'fluidsim.solvers.{}.solver'.format(key_solver)).Simul
+    params = Simul.create_default_params()
+    params.oper.nx = params.oper.ny = n
+    if hasattr(params.oper, 'nz'):
+        params.oper.nz = n
+    Operators = Simul.info_solver.import_classes()['Operators']
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+    memory_start = _get_memory()
+    t_start = time()
+    oper = Operators(params=params)
+    duration = time() - t_start
+    memory = _get_memory() - memory_start
+
+    if hasattr(oper, 'release_arrays'):
+        for name in names_lazy_arrays:
+            getattr(oper, name)
+        memory_all = _get_memory() - memory_start
+    else:
+        memory_all = memory
+
+    if tracemalloc is not None:
+        tracemalloc.stop()
+
+    return duration, memory, memory_all
+
+
+if __name__ == '__main__':
+
+    cases = [('ns2d', nh), ('sw1l', nh), ('ns3d', n3d)]
+    results = [bench(key_solver, n) for key_solver, n in cases]
+
+    print('\n{:6s} {:>12s} {:>10s} {:>14s} {:>14s}'.format(
+        'solver', 'resolution', 'time (s)', 'memory (MiB)',
+        'all arrays'))
+    for (key_solver, n), (duration, memory, memory_all) in zip(
+            cases, results):
+        if key_solver == 'ns3d':
+            resolution = '{}^3'.format(n)
+        else:
+            resolution = '{}^2'.format(n)
+        print('{:6s} {:>12s} {:10.3f} {:14.1f} {:14.1f}'.format(
+            key_solver, resolution, duration, memory, memory_all))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+python bench_output_schedule.py
+python bench_output_schedule.py 128
+
+Measure the cost per time step of `sim.output.one_time_step` for a ns2d
+simulation (64x64 by default) with the usual specific outputs saved (with
+periods much longer than the time step, so that the outputs almost never
+work). The former loop (all keys of `periods_print`, `periods_plot` and
+`periods_save` scanned at each time step, each output checking itself its
+period) is compared with the priority queue of
+:func:`fluidsim.base.output.base.OutputBase._init_online_schedule`.
+
+The total duration of a time step is also given to estimate the share of
+the outputs.
+
+"""
+from __future__ import print_function
+
+import sys
+import shutil
+from timeit import repeat
+
+from fluiddyn.io import stdout_redirected
+
+from fluidsim.solvers.ns2d.solver import Simul
+
+nh = 64
+if len(sys.argv) > 1:
+    nh = int(sys.argv[1])
+
+params = Simul.create_default_params()
+params.short_name_type_run = 'bench'
+params.oper.nx = params.oper.ny = nh
+params.init_fields.type = 'noise'
+params.time_stepping.USE_CFL = False
+params.time_stepping.deltat0 = 1e-4
+params.output.ONLINE_PLOT_OK = False
+params.output.periods_print.print_stdout = 1.
+for key in ('phys_fields', 'spectra', 'spatial_means', 'spect_energy_budg',
+            'increments'):
+    params.output.periods_save[key] = 1.
+
+with stdout_redirected():
+    sim = Simul(params)
+    sim.output.init_with_initialized_state()
+
+
+def one_time_step_former(output):
+    params = output.params
+    for k in params.periods_print._get_key_attribs():
+        period = params.periods_print.__dict__[k]
+        if period != 0:
+            output.__dict__[k].online_print()
+
+    if params.ONLINE_PLOT_OK:
+        for k in params.periods_plot._get_key_attribs():
+            period = params.periods_plot.__dict__[k]
+            if period != 0:
+                output.__dict__[k].online_plot()
+
+    if output.has_to_save:
+        for k in params.periods_save._get_key_attribs():
+            period = params.periods_save.__dict__[k]
+            if period != 0:
+                output.__dict__[k].online_save()
+
+
+if __name__ == '__main__':
+
+    number = 1000
+    with stdout_redirected():
+        # the outputs work at the first call
+        sim.output.one_time_step()
+        sim.time_stepping.t += sim.time_stepping.deltat
+
+        t_former = min(repeat(
+            lambda: one_time_step_former(sim.output),
+            number=number, repeat=5)) / number
+        t_new = min(repeat(
+            sim.output.one_time_step, number=number, repeat=5)) / number
+        t_step = min(repeat(
+            sim.time_stepping.one_time_step_computation,
+            number=10, repeat=3)) / 10
+
+    print('nh = {}, {} online methods'.format(
+        nh, len(sim.output._online_methods)))
+    print('output.one_time_step (former): {:10.3e} s'.format(t_former))
+    print('output.one_time_step (queue):  {:10.3e} s'.format(t_new))
+    print('speedup: {:.1f}'.format(t_former / t_new))
+    print('one_time_step_computation:     {:10.3e} s'.format(t_step))
+    print('share of the outputs (former): {:.2f} %'.format(
+        100 * t_former / (t_step + t_former)))
+    print('share of the outputs (queue):  {:.2f} %'.format(
+        100 * t_new / (t_step + t_new)))
+
+    shutil.rmtree(sim.output.path_run)
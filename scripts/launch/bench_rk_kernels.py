@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+python bench_rk_kernels.py
+python bench_rk_kernels.py 1024 3
+
+Compare the stage combinations of the RK4 scheme and the computation of the
+exact linear coefficients written with Numpy (allocating and in-place
+versions) and with the fused kernels of
+:mod:`fluidsim.base.time_stepping.pseudo_spect_pythran`
+(`params.time_stepping.type_kernels = 'pythran'`).
+
+The arguments are the number of modes in each direction and the number of
+variables of the state.
+
+"""
+from __future__ import print_function, division
+
+import sys
+from timeit import repeat
+
+import numpy as np
+
+from fluidsim.base.time_stepping import pseudo_spect_pythran as kernels
+
+nh = 512
+nb_vars = 1
+if len(sys.argv) > 1:
+    nh = int(sys.argv[1])
+if len(sys.argv) > 2:
+    nb_vars = int(sys.argv[2])
+
+if not hasattr(kernels, '__pythran__'):
+    print('Warning: pseudo_spect_pythran is not pythranized!')
+
+shapeK = (nh, nh//2 + 1)
+shape = (nb_vars,) + shapeK
+
+dt = 1.e-3
+freq_lin = np.random.rand(*shapeK)
+diss = np.exp(-dt*freq_lin)
+diss2 = np.exp(-dt/2*freq_lin)
+
+
+def random_state():
+    return np.random.rand(*shape) + 1j*np.random.rand(*shape)
+
+
+state_fft = random_state()
+tendencies_fft = random_state()
+state_fft_temp = random_state()
+state_fft_approx = random_state()
+tmp = random_state()
+exact = np.empty_like(freq_lin)
+exact2 = np.empty_like(freq_lin)
+
+
+def stages_numpy():
+    state_fft_temp = (state_fft + dt/6*tendencies_fft)*diss
+    state_fft_approx = (state_fft + dt/2*tendencies_fft)*diss2
+    state_fft_temp += dt/3*diss2*tendencies_fft
+    state_fft_approx = state_fft*diss2 + dt/2*tendencies_fft
+    state_fft_temp += dt/3*diss2*tendencies_fft
+    state_fft_approx = state_fft*diss + dt*diss2*tendencies_fft
+    return state_fft_temp + dt/6*tendencies_fft, state_fft_approx
+
+
+def stages_numpy_inplace():
+    # same operations as in TimeSteppingPseudoSpectral._time_step_RK4_inplace
+    # (the buffer tmp is used so that tendencies_fft is not modified)
+    np.multiply(tendencies_fft, dt/6, out=state_fft_temp)
+    np.add(state_fft_temp, state_fft, out=state_fft_temp)
+    np.multiply(state_fft_temp, diss, out=state_fft_temp)
+    np.multiply(tendencies_fft, dt/2, out=state_fft_approx)
+    np.add(state_fft_approx, state_fft, out=state_fft_approx)
+    np.multiply(state_fft_approx, diss2, out=state_fft_approx)
+    for coef in (diss2, diss):
+        np.multiply(tendencies_fft, diss2, out=tmp)
+        np.multiply(tmp, dt/3, out=state_fft_approx)
+        np.add(state_fft_temp, state_fft_approx, out=state_fft_temp)
+        np.multiply(state_fft, coef, out=state_fft_approx)
+        np.multiply(tmp, dt, out=tmp)
+        np.add(state_fft_approx, tmp, out=state_fft_approx)
+    np.multiply(tendencies_fft, dt/6, out=tmp)
+    np.add(state_fft_temp, tmp, out=state_fft_approx)
+
+
+def stages_pythran():
+    kernels.rk4_step0(state_fft, tendencies_fft, diss, diss2, dt,
+                      state_fft_temp, state_fft_approx)
+    kernels.rk4_step1(state_fft, tendencies_fft, diss2, dt,
+                      state_fft_temp, state_fft_approx)
+    kernels.rk4_step2(state_fft, tendencies_fft, diss, diss2, dt,
+                      state_fft_temp, state_fft_approx)
+    kernels.rk4_step3(state_fft_approx, tendencies_fft, dt, state_fft_temp)
+
+
+def exact_numpy():
+    return np.exp(-dt*freq_lin), np.exp(-dt/2*freq_lin)
+
+
+def exact_pythran():
+    kernels.compute_exact_coefs(freq_lin, dt, exact, exact2)
+
+
+def bench(func, number=20):
+    return min(repeat(func, number=number, repeat=3)) / number
+
+
+if __name__ == '__main__':
+
+    print('state: {} complex128, {:.1f} Mo per array'.format(
+        shape, state_fft.nbytes*1e-6))
+
+    print('\nRK4 stage combinations (1 time step):')
+    t_ref = bench(stages_numpy)
+    for name, func in (('numpy', stages_numpy),
+                       ('numpy in place', stages_numpy_inplace),
+                       ('pythran', stages_pythran)):
+        t = bench(func)
+        print('{:15s}: {:.3e} s (speedup {:.2f})'.format(name, t, t_ref/t))
+
+    print('\nexact linear coefficients:')
+    t_ref = bench(exact_numpy)
+    for name, func in (('numpy', exact_numpy),
+                       ('pythran', exact_pythran)):
+        t = bench(func)
+        print('{:15s}: {:.3e} s (speedup {:.2f})'.format(name, t, t_ref/t))
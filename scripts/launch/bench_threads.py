@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+python bench_threads.py
+python bench_threads.py ns2d 1024 8
+
+Strong scaling of a sequential simulation with the number of threads
+`params.oper.nb_threads` (1, 2, 4, ... up to the given maximum, by default
+the number of cores). The in-place time stepping is used, with numpy
+kernels (stage combinations computed in threads) and, if
+pseudo_spect_pythran is pythranized, with pythran kernels (not threaded).
+For ns2d, the kernels of the nonlinear term
+(fluidsim.solvers.ns2d.util_pythran) are threaded if the extensions have
+been compiled with OpenMP, i.e. `FLUIDSIM_OPENMP` set during the build.
+
+Each measurement is done in a new process since the OpenMP runtime reads
+the number of threads at its initialization.
+
+"""
+from __future__ import print_function, division
+
+import multiprocessing
+import subprocess
+import sys
+
+from fluidsim.base.time_stepping import pseudo_spect_pythran
+
+key_solver = 'ns2d'
+nh = 1024
+nb_threads_max = multiprocessing.cpu_count()
+if len(sys.argv) > 1:
+    key_solver = sys.argv[1]
+if len(sys.argv) > 2:
+    nh = int(sys.argv[2])
+if len(sys.argv) > 3:
+    nb_threads_max = int(sys.argv[3])
+
+code = """
+from time import time
+import shutil
+import fluidsim
+from fluiddyn.io import stdout_redirected
+Simul = fluidsim.import_simul_class_from_key('{key_solver}')
+params = Simul.create_default_params()
+params.short_name_type_run = 'bench_threads'
+params.oper.nx = params.oper.ny = {nh}
+params.oper.nb_threads = {nb_threads}
+params.init_fields.type = 'noise'
+params.time_stepping.USE_CFL = False
+params.time_stepping.deltat0 = 1e-4
+params.time_stepping.USE_INPLACE = True
+params.time_stepping.type_kernels = '{type_kernels}'
+params.output.HAS_TO_SAVE = False
+params.output.periods_print.print_stdout = 0
+with stdout_redirected():
+    sim = Simul(params)
+    sim.time_stepping.one_time_step()
+    t_start = time()
+    for it in range(10):
+        sim.time_stepping.one_time_step()
+print((time() - t_start) / 10)
+shutil.rmtree(sim.output.path_run)
+"""
+
+
+def time_step_duration(nb_threads, type_kernels):
+    output = subprocess.check_output([sys.executable, '-c', code.format(
+        key_solver=key_solver, nh=nh, nb_threads=nb_threads,
+        type_kernels=type_kernels)])
+    return float(output.split()[-1])
+
+
+if __name__ == '__main__':
+
+    list_nb_threads = [1]
+    while 2*list_nb_threads[-1] <= nb_threads_max:
+        list_nb_threads.append(2*list_nb_threads[-1])
+
+    types_kernels = ['numpy']
+    if hasattr(pseudo_spect_pythran, '__pythran__'):
+        types_kernels.append('pythran')
+
+    print('solver {}, {}x{}: duration of one time step'.format(
+        key_solver, nh, nh))
+    for type_kernels in types_kernels:
+        print('\nkernels ' + type_kernels)
+        print('{:>8s} {:>12s} {:>8s} {:>11s}'.format(
+            'threads', 'time (s)', 'speedup', 'efficiency'))
+        t_ref = None
+        for nb_threads in list_nb_threads:
+            t = time_step_duration(nb_threads, type_kernels)
+            if t_ref is None:
+                t_ref = t
+            speedup = t_ref / t
+            print('{:8d} {:12.3e} {:8.2f} {:11.2f}'.format(
+                nb_threads, t, speedup, speedup / nb_threads))
@@ -30,7 +30,8 @@ except ImportError:
 
 import numpy as np
 
-from config import MPI4PY, FFTW3, FFTW3MPI, dict_ldd, dict_lib, dict_inc
+from config import (
+    MPI4PY, FFTW3, FFTW3MPI, FFTW3THREADS, dict_ldd, dict_lib, dict_inc)
 
 print('Running fluidsim setup.py on platform ' + sys.platform)
 
@@ -89,7 +90,8 @@ if FFTW3:
             include_dirs=include_dirs,
             libraries=libraries,
             library_dirs=library_dirs,
-            cython_compile_time_env={'MPI4PY': MPI4PY},
+            cython_compile_time_env={'MPI4PY': MPI4PY,
+                                     'FFTW3THREADS': FFTW3THREADS},
             sources=[path_sources + '/fftw2dmpicy.' + ext_source])
         ext_modules.append(ext_fftw2dmpicy)
 
@@ -148,6 +150,11 @@ def modification_date(filename):
     return datetime.fromtimestamp(t)
 
 
+# the pythran extensions are compiled with OpenMP if the environment variable
+# FLUIDSIM_OPENMP is set
+use_openmp = 'FLUIDSIM_OPENMP' in os.environ
+
+
 def make_pythran_extensions(modules):
     develop = sys.argv[-1] == 'develop'
     extensions = []
@@ -161,6 +168,9 @@ def make_pythran_extensions(modules):
            modification_date(bin_file) < modification_date(py_file):
             pext = PythranExtension(mod, [py_file])
             pext.include_dirs.append(np.get_include())
+            if use_openmp:
+                pext.extra_compile_args.append('-fopenmp')
+                pext.extra_link_args.append('-fopenmp')
             extensions.append(pext)
     return extensions
 
@@ -217,4 +227,7 @@ setup(name='fluidsim',
           doc=['Sphinx>=1.1', 'numpydoc'],
           parallel=['mpi4py']),
       cmdclass={"build_ext": build_ext},
-      ext_modules=ext_modules)
+      ext_modules=ext_modules,
+      entry_points={
+          'console_scripts':
+          ['fluidsim-bench = fluidsim.bench.bench:main']})